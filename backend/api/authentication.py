@@ -0,0 +1,214 @@
+"""Аутентификация по токену с кешем «токен → пользователь».
+
+TokenAuthentication выполняет запрос Token JOIN User на каждый запрос.
+Здесь результат запоминается в общем кеше settings.AUTH_TOKEN_CACHE_ALIAS
+(ключ — хеш токена) на AUTH_TOKEN_CACHE_TTL секунд и в LRU процесса на
+AUTH_TOKEN_LOCAL_CACHE_TTL секунд. В кеше лежат значения полей
+пользователя и токена, на каждый запрос из них собираются новые объекты,
+поэтому изменения request.user в одном запросе не попадают в другие.
+
+Записи сбрасываются сигналами: удаление токена (выход, удаление
+пользователя) и сохранение пользователя (смена пароля, деактивация).
+Сброс сдвигает поколение токена в общем кеше, и записи старого поколения
+не принимаются. Запись из БД помечается поколением, прочитанным до
+запроса к БД, поэтому промах, начавшийся до сброса, не вернёт в кеш
+отозванный токен. В процессе, где произошёл сброс, локальная запись
+удаляется сразу, в остальных живёт не дольше AUTH_TOKEN_LOCAL_CACHE_TTL
+секунд: ради этих секунд запросы не ходят в общий кеш.
+
+Сброс должен быть виден всем процессам, поэтому с локальным кешем
+процесса (locmem, dummy) кеширование отключено. Небезопасные запросы
+(смена пароля, правка профиля) всегда читают пользователя из БД: они
+могут сохранить request.user целиком.
+"""
+
+from collections import OrderedDict
+from hashlib import sha256
+from threading import Lock
+from time import monotonic
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram.cache import is_process_local
+from foodgram.db.routers import use_primary
+from .constants import (
+    AUTH_TOKEN_CACHE_TTL,
+    AUTH_TOKEN_LOCAL_CACHE_SIZE,
+    AUTH_TOKEN_LOCAL_CACHE_TTL,
+)
+
+User = get_user_model()
+SHARED_KEY_PREFIX = "auth_token"
+GENERATION_KEY_PREFIX = "auth_token_generation"
+
+
+def _values(instance):
+    return tuple(
+        getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+    )
+
+
+def _instance(model, values):
+    names = [field.attname for field in model._meta.concrete_fields]
+    return model.from_db(DEFAULT_DB_ALIAS, names, values)
+
+
+def get_shared_cache():
+    """Общий кеш токенов или None, если он не настроен или локален."""
+    alias = getattr(settings, "AUTH_TOKEN_CACHE_ALIAS", None)
+    if not alias or is_process_local(caches[alias]):
+        return None
+    return caches[alias]
+
+
+def shared_keys(key):
+    """Ключи записи и поколения токена в общем кеше."""
+    digest = sha256(key.encode()).hexdigest()
+    return f"{SHARED_KEY_PREFIX}:{digest}", f"{GENERATION_KEY_PREFIX}:{digest}"
+
+
+class TokenCache:
+    """Кеш «ключ токена → (поля пользователя, поля токена)» в два уровня.
+
+    Общий кеш хранит (поколение, снимок); LRU процесса — снимки, уже
+    проверенные по поколению, на local_ttl секунд.
+    """
+
+    def __init__(
+        self,
+        ttl=AUTH_TOKEN_CACHE_TTL,
+        size=AUTH_TOKEN_LOCAL_CACHE_SIZE,
+        local_ttl=AUTH_TOKEN_LOCAL_CACHE_TTL,
+    ):
+        self.ttl = ttl
+        self.size = size
+        self.local_ttl = local_ttl
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._stats = dict.fromkeys(
+            ("hits", "shared_hits", "misses", "invalidations"), 0
+        )
+
+    def get(self, key):
+        """(снимок или None, поколение для set).
+
+        При промахе поколение создаётся, если его нет: set() запишет
+        снимок с ним, и сброс между get() и set() сделает снимок
+        недействительным.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, snapshot = entry
+                if expires > monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return snapshot, None
+                del self._entries[key]
+        shared = get_shared_cache()
+        if shared is None:
+            return None, None
+        entry_key, generation_key = shared_keys(key)
+        values = shared.get_many([entry_key, generation_key])
+        generation = values.get(generation_key)
+        entry = values.get(entry_key)
+        if entry is not None and generation is not None:
+            entry_generation, snapshot = entry
+            if entry_generation == generation:
+                with self._lock:
+                    self._stats["shared_hits"] += 1
+                self._store(key, snapshot)
+                return snapshot, None
+        with self._lock:
+            self._stats["misses"] += 1
+        if generation is None:
+            # Поколение живёт дольше записи: пропавшее поколение делает
+            # записи недействительными, а не наоборот.
+            shared.add(generation_key, uuid4().hex, self.ttl * 2)
+            generation = shared.get(generation_key)
+        return None, generation
+
+    def set(self, key, generation, snapshot):
+        """Запоминает снимок, прочитанный из БД после get(key)."""
+        shared = get_shared_cache()
+        if shared is None or generation is None:
+            return
+        shared.set(shared_keys(key)[0], (generation, snapshot), self.ttl)
+        self._store(key, snapshot)
+
+    def _store(self, key, snapshot):
+        with self._lock:
+            self._entries[key] = (monotonic() + self.local_ttl, snapshot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys):
+        """Сдвигает поколение токенов; записи старого поколения отброшены."""
+        keys = list(keys)
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        shared = get_shared_cache()
+        if shared is None or not keys:
+            return
+        pairs = [shared_keys(key) for key in keys]
+        shared.set_many(
+            {generation_key: uuid4().hex for _, generation_key in pairs},
+            self.ttl * 2,
+        )
+        shared.delete_many([entry_key for entry_key, _ in pairs])
+        with self._lock:
+            self._stats["invalidations"] += len(keys)
+
+    def invalidate_user(self, user_id):
+        """Убирает все токены пользователя."""
+        self.invalidate(
+            Token.objects.filter(user_id=user_id).values_list("key", flat=True)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Счётчики процесса: попадания в LRU и общий кеш, промахи."""
+        with self._lock:
+            stats = dict(self._stats, size=len(self._entries))
+        hits = stats["hits"] + stats["shared_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0
+        return stats
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication, который не ходит в БД при попадании в кеш."""
+
+    use_cache = True
+
+    def authenticate(self, request):
+        self.use_cache = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        snapshot, generation = (
+            token_cache.get(key) if self.use_cache else (None, None)
+        )
+        if snapshot is not None:
+            user_values, token_values = snapshot
+            return _instance(User, user_values), _instance(Token, token_values)
+        with use_primary():
+            user, token = super().authenticate_credentials(key)
+        token_cache.set(key, generation, (_values(user), _values(token)))
+        return user, token
@@ -0,0 +1,9 @@
+"""Нагрузочные замеры API.
+
+Модули bench_*.py не подхватываются обычным запуском тестов; каждый
+запускается отдельно на тестовой базе, например:
+
+    python manage.py test api.benchmarks.bench_similar --keepdb
+
+Объём данных задаётся переменными окружения BENCH_*.
+"""
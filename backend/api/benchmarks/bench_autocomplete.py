@@ -0,0 +1,73 @@
+"""Автодополнение ингредиентов: индекс в памяти против запроса к БД.
+
+Справочник — data/ingredients.csv (около 2,2k строк). Для префиксов
+разной длины замеряются ответ /api/ingredients/?name=, поиск по индексу
+без HTTP-обвязки и прежний путь: ILIKE 'x%' и IngredientSerializer (без
+ограничения INGREDIENT_SEARCH_LIMIT, как и было).
+"""
+
+from io import StringIO
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.catalogs import ingredient_index
+from api.serializers import IngredientSerializer
+from api.tests.utils import LOCAL_CACHES
+from recipes.models import Ingredient
+
+from .utils import BenchmarkCase, percentile
+
+PREFIXES = ("с", "сы", "сыр", "картоф", "нет такого")
+SAMPLES = 500
+
+
+def timed(function, samples=SAMPLES):
+    timings = []
+    for _ in range(samples):
+        started = perf_counter()
+        function()
+        timings.append(perf_counter() - started)
+    return (
+        f"p50 {percentile(timings, 0.5) * 1e6:.0f} мкс, "
+        f"p99 {percentile(timings, 0.99) * 1e6:.0f} мкс"
+    )
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class AutocompleteBenchmark(BenchmarkCase):
+    def setUp(self):
+        call_command(
+            "fill_ingredients_from_csv",
+            path=str(settings.BASE_DIR / "data" / "ingredients.csv"),
+            stdout=StringIO(),
+        )
+        ingredient_index.expire_version()
+
+    def test_autocomplete(self):
+        client = APIClient()
+        print(f"Ингредиентов: {Ingredient.objects.count()}")
+        for prefix in PREFIXES:
+            url = f"/api/ingredients/?name={prefix}"
+            self.assertEqual(client.get(url).status_code, 200)
+
+            def orm():
+                return JSONRenderer().render(
+                    IngredientSerializer(
+                        Ingredient.objects.filter(name__istartswith=prefix),
+                        many=True,
+                    ).data
+                )
+
+            found = Ingredient.objects.filter(name__istartswith=prefix).count()
+            print(f"{prefix!r} ({found} совпадений):")
+            print(f"  ответ API: {timed(lambda: client.get(url))}")
+            print(
+                "  индекс: "
+                f"{timed(lambda: ingredient_index.search(prefix))}"
+            )
+            print(f"  ORM и сериализатор: {timed(orm)}")
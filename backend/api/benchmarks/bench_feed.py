@@ -0,0 +1,137 @@
+"""Смена режима ленты на BENCH_USERS пользователях (по умолчанию 100k).
+
+Подписчики распределены по авторам неравномерно: у автора ранга r их
+BENCH_TOP_SUBSCRIBERS // r, у первых авторов — больше FEED_FANOUT_LIMIT.
+Отдельный автор стоит на пороге (FEED_FANOUT_LIMIT - 1 подписчиков) с
+заполненными лентами. Замеряются запросы подписки, в том числе та, что
+переводит его на подмешивание, и перенос лент командой recount_counters.
+"""
+
+from io import StringIO
+from time import perf_counter
+
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api.tests.utils import LOCAL_CACHES
+from recipes.constants import FEED_FANOUT_LIMIT, FEED_FANOUT_RESUME_LIMIT
+from recipes.feed import sync_fanout_mode
+from recipes.models import FeedEntry
+from users.models import Profile, Subscription, User
+
+from .utils import (
+    BenchmarkCase,
+    create_recipes,
+    create_users,
+    execute,
+    measure,
+    percentile,
+    scale,
+)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class FeedModeBenchmark(BenchmarkCase):
+    def setUp(self):
+        users = create_users(scale("USERS", 100_000))
+        authors = scale("AUTHORS", 1_000)
+        self.first = users[0]
+        self.edge = users[0] + authors
+        self.subscribers = (self.edge + 1, users[1])
+        create_recipes(
+            (authors + 1) * scale("FEED_RECIPES", 20),
+            (users[0], self.edge),
+        )
+        execute(
+            """
+            INSERT INTO users_subscription (user_id, author_id)
+            SELECT %s + s, %s + r - 1
+            FROM generate_series(1, %s) AS r,
+                 generate_series(0, LEAST(%s / r, %s) - 1) AS s
+            UNION ALL
+            SELECT %s + s, %s FROM generate_series(0, %s) AS s
+            """,
+            [
+                self.subscribers[0],
+                users[0],
+                authors,
+                scale("TOP_SUBSCRIBERS", 2 * FEED_FANOUT_LIMIT),
+                self.subscribers[1] - self.subscribers[0],
+                self.subscribers[0],
+                self.edge,
+                FEED_FANOUT_LIMIT - 2,
+            ],
+        )
+        execute(
+            """
+            UPDATE users_profile p
+            SET subscribers_count = counted.total,
+                feed_merged = counted.total >= %s
+            FROM (
+                SELECT author_id, COUNT(*) AS total FROM users_subscription
+                GROUP BY author_id
+            ) counted
+            WHERE p.user_id = counted.author_id
+            """,
+            [FEED_FANOUT_LIMIT],
+        )
+        execute("""
+            INSERT INTO recipes_feedentry (user_id, recipe_id, author_id)
+            SELECT sub.user_id, recipe.id, recipe.author_id
+            FROM users_subscription sub
+            JOIN users_profile p ON p.user_id = sub.author_id
+            JOIN recipes_recipe recipe ON recipe.author_id = sub.author_id
+            WHERE NOT p.feed_merged
+            """)
+        execute("ANALYZE")
+        print(
+            f"Пользователей {users[1] - users[0] + 1}, подписок "
+            f"{Subscription.objects.count()}, записей лент "
+            f"{FeedEntry.objects.count()}"
+        )
+
+    def subscribe(self, user_id, author_id):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=user_id))
+        started = perf_counter()
+        response = client.post(f"/api/users/{author_id}/subscribe/")
+        elapsed = perf_counter() - started
+        self.assertEqual(response.status_code, 201)
+        return elapsed
+
+    def test_switch_modes(self):
+        # Обычные подписки: подписчики из хвоста на авторов разного ранга
+        samples = [
+            self.subscribe(self.subscribers[1] - rank, self.first + rank)
+            for rank in range(200)
+        ]
+        print(
+            f"Подписка: p50 {percentile(samples, 0.5) * 1000:.1f} мс, "
+            f"p99 {percentile(samples, 0.99) * 1000:.1f} мс"
+        )
+        entries = FeedEntry.objects.filter(author_id=self.edge).count()
+        elapsed = self.subscribe(self.subscribers[1], self.edge)
+        print(
+            f"Подписка, переводящая автора с {entries} записями лент на "
+            f"подмешивание: {elapsed * 1000:.1f} мс"
+        )
+        self.assertTrue(Profile.objects.get(user_id=self.edge).feed_merged)
+
+        with measure("recount_counters (счётчики и ленты)"):
+            call_command("recount_counters", stdout=StringIO())
+        self.assertFalse(FeedEntry.objects.filter(author_id=self.edge))
+
+        Subscription.objects.filter(
+            author_id=self.edge,
+            pk__in=Subscription.objects.filter(author_id=self.edge).values(
+                "pk"
+            )[: FEED_FANOUT_LIMIT - FEED_FANOUT_RESUME_LIMIT + 1],
+        ).delete()
+        with measure("Возврат автора к fan-out с дозаполнением лент"):
+            sync_fanout_mode(self.edge)
+        self.assertFalse(Profile.objects.get(user_id=self.edge).feed_merged)
+        print(
+            "Записей лент автора после возврата: "
+            f"{FeedEntry.objects.filter(author_id=self.edge).count()}"
+        )
@@ -0,0 +1,71 @@
+"""Импорт BENCH_IMPORT_ROWS ингредиентов (по умолчанию 1M) из csv и json.
+
+Файл содержит каждую строку дважды, так что половина строк — дубли.
+Замеряются первый импорт, повторный импорт того же файла (ничего не
+добавляет) и пробный запуск: время и рост пикового RSS процесса.
+"""
+
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+
+from recipes.models import Ingredient
+
+from .utils import BenchmarkCase, execute, measure, scale
+
+
+def rows(count):
+    for number in range(count // 2):
+        row = (f"ингредиент {number}", ("г", "мл", "шт")[number % 3])
+        yield row
+        yield row
+
+
+class ImportBenchmark(BenchmarkCase):
+    def setUp(self):
+        count = scale("IMPORT_ROWS", 1_000_000)
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = {
+            "csv": os.path.join(self.directory.name, "ingredients.csv"),
+            "json": os.path.join(self.directory.name, "ingredients.json"),
+        }
+        with open(self.paths["csv"], "w", encoding="utf-8") as file:
+            csv.writer(file).writerows(rows(count))
+        # Файлы пишутся построчно, чтобы не поднять пиковый RSS до замера
+        with open(self.paths["json"], "w", encoding="utf-8") as file:
+            file.write("[\n")
+            for number, (name, unit) in enumerate(rows(count)):
+                item = {"name": name, "measurement_unit": unit}
+                file.write(",\n" if number else "")
+                file.write(json.dumps(item, ensure_ascii=False))
+            file.write("\n]\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def load(self, label, file_format, **options):
+        with measure(f"{label} ({file_format})"):
+            call_command(
+                "fill_ingredients_from_csv",
+                path=self.paths[file_format],
+                stdout=StringIO(),
+                **options,
+            )
+        return Ingredient.objects.count()
+
+    def test_import(self):
+        for file_format in self.paths:
+            # delete() отправил бы post_delete на каждый ингредиент
+            execute("TRUNCATE recipes_ingredient CASCADE")
+            self.load("Пробный запуск", file_format, dry_run=True)
+            self.assertEqual(Ingredient.objects.count(), 0)
+            created = self.load("Первый импорт", file_format)
+            self.assertEqual(
+                self.load("Повторный импорт", file_format), created
+            )
+            print(f"Добавлено ингредиентов: {created}")
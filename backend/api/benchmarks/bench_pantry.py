@@ -0,0 +1,98 @@
+"""Поиск по имеющимся продуктам на BENCH_RECIPES рецептах (по умолчанию 200k).
+
+У рецепта по 8 ингредиентов из BENCH_INGREDIENTS (по умолчанию 200,
+чтобы большие наборы покрывали заметную долю рецептов).
+Для продуктовых наборов из PANTRY_SIZES ингредиентов замеряются поиск по
+снимку индекса, тот же поиск запросом к БД (search_database) и полный
+ответ /api/recipes/pantry/.
+"""
+
+import random
+import tempfile
+from time import perf_counter
+
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api.tests.utils import LOCAL_CACHES
+from recipes.pantry import build_snapshot, pantry_index, search_database
+from users.models import User
+
+from .utils import (
+    BenchmarkCase,
+    create_ingredients,
+    create_recipes,
+    create_users,
+    measure,
+    percentile,
+    scale,
+)
+
+PANTRY_SIZES = (5, 10, 25, 50, 100)
+MAX_MISSING = 2
+LIMIT = 20
+SAMPLES = 30
+
+
+def timed(function):
+    timings = []
+    for _ in range(SAMPLES):
+        started = perf_counter()
+        function()
+        timings.append(perf_counter() - started)
+    return (
+        f"p50 {percentile(timings, 0.5) * 1000:.1f} мс, "
+        f"p99 {percentile(timings, 0.99) * 1000:.1f} мс"
+    )
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class PantryBenchmark(BenchmarkCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.index_dir_override = override_settings(
+            PANTRY_INDEX_DIR=self.directory.name
+        )
+        self.index_dir_override.enable()
+        self.ingredients = create_ingredients(scale("INGREDIENTS", 200))
+        self.user = create_users(1, "reader")[0]
+        create_recipes(
+            scale("RECIPES", 200_000),
+            create_users(100, "author"),
+            ingredients=self.ingredients,
+        )
+        with measure("Построение снимка"):
+            build_snapshot()
+
+    def tearDown(self):
+        self.index_dir_override.disable()
+        self.directory.cleanup()
+        super().tearDown()
+
+    def test_pantry(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=self.user))
+        generator = random.Random(0)
+        for size in PANTRY_SIZES:
+            pantry = generator.sample(
+                range(self.ingredients[0], self.ingredients[1] + 1), size
+            )
+            url = "/api/recipes/pantry/?ingredients=" + ",".join(
+                map(str, pantry)
+            )
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            arguments = (pantry, MAX_MISSING, LIMIT)
+            found = pantry_index.search(*arguments)
+            self.assertEqual(
+                [missing for _, missing in found],
+                [missing for _, missing in search_database(*arguments)],
+            )
+            print(f"{size} продуктов ({len(found)} рецептов):")
+            print(
+                f"  снимок: {timed(lambda: pantry_index.search(*arguments))}"
+            )
+            print(
+                f"  запрос к БД: {timed(lambda: search_database(*arguments))}"
+            )
+            print(f"  ответ API: {timed(lambda: client.get(url))}")
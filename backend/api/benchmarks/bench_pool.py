@@ -0,0 +1,106 @@
+"""Пул соединений foodgram.db против подключения на каждый запрос.
+
+Замеры на тестовой базе локального PostgreSQL: стоимость
+подключения с SELECT 1 и закрытием, работа 16 потоков через пул из
+4 соединений и отказ по timeout пула. Объём — BENCH_POOL_CONNECTIONS
+и BENCH_POOL_QUERIES.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+from foodgram.db.base import get_pool_stats
+
+from .utils import BenchmarkCase, scale
+
+THREADS = 16
+
+
+class PoolBenchmark(BenchmarkCase):
+    def add_alias(self, alias, pool=None):
+        """Алиас с настройками тестовой базы; pool — OPTIONS["pool"]."""
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict
+        options = {
+            name: value
+            for name, value in primary["OPTIONS"].items()
+            if name != "pool"
+        }
+        if pool is not None:
+            options["pool"] = pool
+        connections.settings[alias] = {
+            **primary,
+            "OPTIONS": options,
+            "CONN_MAX_AGE": 0,
+        }
+        self.addCleanup(self.remove_alias, alias)
+        return connections[alias]
+
+    def remove_alias(self, alias):
+        connections[alias].close()
+        connections[alias].close_pool()
+        del connections[alias]
+        del connections.settings[alias]
+
+    def query(self, alias, sql="SELECT 1"):
+        """Запрос «как в HTTP-запросе»: подключение, запрос, закрытие."""
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+        finally:
+            connection.close()
+
+    def test_connection_cost(self):
+        count = scale("POOL_CONNECTIONS", 1_000)
+        self.add_alias("plain")
+        self.add_alias("pooled", {"min_size": 2, "max_size": 4})
+        for alias in ("plain", "pooled"):
+            self.query(alias)
+            started = perf_counter()
+            for _ in range(count):
+                self.query(alias)
+            elapsed = (perf_counter() - started) / count * 1000
+            print(
+                f"{alias}: подключение + SELECT 1 + закрытие {elapsed:.2f} мс"
+            )
+        print(get_pool_stats("pooled"))
+
+    def test_threads_share_bounded_pool(self):
+        queries = scale("POOL_QUERIES", 200)
+        self.add_alias("shared", {"min_size": 4, "max_size": 4})
+
+        def work(_):
+            for _ in range(queries):
+                self.query("shared", "SELECT pg_sleep(0.001)")
+
+        started = perf_counter()
+        with ThreadPoolExecutor(THREADS) as executor:
+            list(executor.map(work, range(THREADS)))
+        elapsed = perf_counter() - started
+        stats = get_pool_stats("shared")
+        print(
+            f"{THREADS} потоков, пул из 4 соединений: "
+            f"{THREADS * queries / elapsed:.0f} запросов/с; {stats}"
+        )
+        self.assertLessEqual(stats["pool_size"], 4)
+
+    def test_pool_timeout(self):
+        holder = self.add_alias(
+            "tiny", {"min_size": 1, "max_size": 1, "timeout": 0.5}
+        )
+        holder.ensure_connection()
+
+        def wait():
+            started = perf_counter()
+            try:
+                self.query("tiny")
+            except OperationalError:
+                return perf_counter() - started
+            return None
+
+        with ThreadPoolExecutor(1) as executor:
+            waited = executor.submit(wait).result()
+        self.assertIsNotNone(waited)
+        print(f"Пул исчерпан: OperationalError через {waited:.2f} с")
@@ -0,0 +1,66 @@
+"""CPU на запрос GET /api/recipes/?limit=20: orjson и JSONRenderer DRF.
+
+Считается процессорное время этого процесса (time.process_time), без
+времени PostgreSQL. Число запросов — BENCH_RENDER_REQUESTS.
+"""
+
+from time import process_time
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.renderers import FastJSONRenderer
+from api.tests.utils import LOCAL_CACHES
+from api.views import RecipeViewSet
+
+from .utils import (
+    BenchmarkCase,
+    create_ingredients,
+    create_recipes,
+    create_tags,
+    create_users,
+    scale,
+)
+
+URL = "/api/recipes/?limit=20"
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class RendererBenchmark(BenchmarkCase):
+    def setUp(self):
+        create_recipes(
+            200,
+            create_users(20),
+            ingredients=create_ingredients(500),
+            tags=create_tags(10),
+        )
+        self.requests = scale("RENDER_REQUESTS", 500)
+
+    def cpu_per_request(self, renderer):
+        client = APIClient()
+        with mock.patch.object(RecipeViewSet, "renderer_classes", [renderer]):
+            client.get(URL)
+            started = process_time()
+            for _ in range(self.requests):
+                response = client.get(URL)
+            elapsed = process_time() - started
+        self.assertEqual(response.status_code, 200)
+        return elapsed / self.requests * 1000, response
+
+    def render_only(self, renderer, data):
+        started = process_time()
+        for _ in range(self.requests):
+            renderer.render(data)
+        return (process_time() - started) / self.requests * 1000
+
+    def test_recipe_list(self):
+        drf, response = self.cpu_per_request(JSONRenderer)
+        fast, _ = self.cpu_per_request(FastJSONRenderer)
+        print(f"{URL}: JSONRenderer {drf:.2f} мс CPU, orjson {fast:.2f} мс")
+        drf = self.render_only(JSONRenderer(), response.data)
+        fast = self.render_only(FastJSONRenderer(), response.data)
+        print(
+            f"Только рендер: JSONRenderer {drf:.3f} мс, orjson {fast:.3f} мс"
+        )
@@ -0,0 +1,126 @@
+"""?search= на BENCH_RECIPES рецептах (по умолчанию 1M).
+
+Названия собираются из двух словарей, поэтому слово из первого
+встречается в каждом SEARCH_FIRST_WORDS-м рецепте, а пара слов — в
+каждом SEARCH_FIRST_WORDS * SEARCH_SECOND_WORDS-м. Замеряется запрос
+страницы (limit=10) анонимом: полное время ответа, время всех
+SQL-запросов и отдельно COUNT(*) пагинации. Для опечаток нужен pg_trgm с
+GIN-индексом recipe_name_trgm_idx: без него похожие названия ищутся
+полным просмотром таблицы.
+"""
+
+from time import perf_counter
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.tests.utils import LOCAL_CACHES
+
+from .utils import (
+    BenchmarkCase,
+    create_recipes,
+    create_users,
+    execute,
+    percentile,
+    scale,
+)
+
+FIRST_WORDS = [
+    "Пирог",
+    "Суп",
+    "Салат",
+    "Рагу",
+    "Запеканка",
+    "Каша",
+    "Омлет",
+    "Плов",
+    "Борщ",
+    "Торт",
+]
+SECOND_WORDS = [
+    "вишнёвый",
+    "грибной",
+    "куриный",
+    "овощной",
+    "рыбный",
+    "сырный",
+    "томатный",
+    "тыквенный",
+]
+QUERIES = {
+    "частое слово": "пирог",
+    "пара слов": "пирог грибной",
+    "опечатка": "запеконка",
+    "нет совпадений": "мармелад",
+}
+SAMPLES = 20
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class SearchBenchmark(BenchmarkCase):
+    def setUp(self):
+        count = scale("RECIPES", 1_000_000)
+        first, last = create_recipes(count, create_users(100))
+        # Номер рецепта из середины: встречается в одном названии
+        self.rare = str((first + last) // 2)
+        execute(
+            """
+            UPDATE recipes_recipe SET name = (%s::text[])[1 + id %% %s]
+                || ' ' || (%s::text[])[1 + (id / %s) %% %s] || ' ' || id
+            WHERE id BETWEEN %s AND %s
+            """,
+            [
+                FIRST_WORDS,
+                len(FIRST_WORDS),
+                SECOND_WORDS,
+                len(FIRST_WORDS),
+                len(SECOND_WORDS),
+                first,
+                last,
+            ],
+        )
+        execute(
+            """
+            UPDATE recipes_recipe SET search_vector =
+                setweight(to_tsvector('russian', name), 'A')
+                || setweight(to_tsvector('russian', text), 'B')
+            WHERE id BETWEEN %s AND %s
+            """,
+            [first, last],
+        )
+        execute("VACUUM ANALYZE recipes_recipe")
+
+    def test_search(self):
+        client = APIClient()
+        queries = {**QUERIES, "редкое слово": self.rare}
+        for label, value in queries.items():
+            url = f"/api/recipes/?search={value}&limit=10"
+            client.get(url)
+            total, sql, count_sql = [], [], []
+            for _ in range(SAMPLES):
+                started = perf_counter()
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url)
+                total.append(perf_counter() - started)
+                self.assertEqual(response.status_code, 200)
+                sql.append(sum(float(query["time"]) for query in queries))
+                count_sql.append(
+                    sum(
+                        float(query["time"])
+                        for query in queries
+                        if "COUNT(*)" in query["sql"]
+                    )
+                )
+            timings = (
+                f"SQL p50 {percentile(sql, 0.5) * 1000:.1f} мс "
+                f"({len(queries)} запросов), из них COUNT(*) p50 "
+                f"{percentile(count_sql, 0.5) * 1000:.1f} мс"
+            )
+            print(
+                f"{label} ({value!r}, найдено {response.data['count']}): "
+                f"{timings}, ответ p50 "
+                f"{percentile(total, 0.5) * 1000:.1f} мс, "
+                f"p99 {percentile(total, 0.99) * 1000:.1f} мс"
+            )
@@ -0,0 +1,85 @@
+"""Выгрузка списка покупок для корзин из тысяч рецептов.
+
+У каждого из BENCH_CARTS пользователей (по умолчанию 3) корзина на
+BENCH_CART_RECIPES * номер рецептов (5k, 10k, 15k) с ингредиентами из
+BENCH_INGREDIENTS (по умолчанию 50k), поэтому в списке десятки тысяч
+строк. Для каждого формата замеряются время полной выгрузки и рост
+пикового RSS процесса; ответ читается по частям, как его отдаёт
+WSGI-сервер.
+"""
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.tests.utils import LOCAL_CACHES
+from recipes.models import ShoppingListItem
+from users.models import User
+
+from .utils import (
+    BenchmarkCase,
+    create_ingredients,
+    create_recipes,
+    create_users,
+    execute,
+    measure,
+    scale,
+)
+
+FORMATS = ("txt", "csv", "pdf")
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ShoppingListBenchmark(BenchmarkCase):
+    def setUp(self):
+        carts = scale("CARTS", 3)
+        step = scale("CART_RECIPES", 5_000)
+        self.users = create_users(carts)
+        recipes = create_recipes(
+            step * carts,
+            create_users(100, "author"),
+            ingredients=create_ingredients(scale("INGREDIENTS", 50_000)),
+        )
+        # Пользователь номер n кладёт в корзину первые step * n рецептов
+        execute(
+            """
+            INSERT INTO recipes_shoppingcart (user_id, recipe_id, created)
+            SELECT u, r, now()
+            FROM generate_series(%s, %s) AS u,
+                 generate_series(%s, %s) AS r
+            WHERE r < %s + (u - %s + 1) * %s
+            """,
+            [*self.users, *recipes, recipes[0], self.users[0], step],
+        )
+        execute("""
+            INSERT INTO recipes_shoppinglistitem (
+                user_id, ingredient_id, total_amount
+            )
+            SELECT cart.user_id, link.ingredient_id, SUM(link.amount)
+            FROM recipes_shoppingcart cart
+            JOIN recipes_recipeingredients link
+                ON link.recipe_id = cart.recipe_id
+            GROUP BY cart.user_id, link.ingredient_id
+            """)
+        execute("ANALYZE")
+
+    def test_download(self):
+        client = APIClient()
+        for user_id in range(self.users[0], self.users[1] + 1):
+            user = User.objects.get(pk=user_id)
+            client.force_authenticate(user)
+            size = user.shoppingcart.count()
+            items = ShoppingListItem.objects.filter(user=user).count()
+            for export in FORMATS:
+                url = f"/api/recipes/download_shopping_cart/?format={export}"
+                with measure(
+                    f"Корзина {size} рецептов, {items} строк, {export}"
+                ):
+                    with CaptureQueriesContext(connection) as queries:
+                        response = client.get(url)
+                        length = sum(
+                            len(chunk) for chunk in response.streaming_content
+                        )
+                self.assertEqual(response.status_code, 200)
+                print(f"  {length // 1024} КБ, {len(queries)} запросов")
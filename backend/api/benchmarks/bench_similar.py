@@ -0,0 +1,46 @@
+"""Расчёт похожих рецептов на BENCH_RECIPES рецептах (по умолчанию 1M).
+
+Замеряются время и рост пикового RSS полного расчёта (первый запуск
+без полного флага сам переходит на полный путь) и частичного после
+изменения BENCH_SIMILAR_DIRTY рецептов.
+"""
+
+from recipes.models import SimilarRecipes
+from recipes.similar import build
+
+from .utils import (
+    BenchmarkCase,
+    create_ingredients,
+    create_recipes,
+    create_tags,
+    create_users,
+    execute,
+    measure,
+    scale,
+)
+
+
+class SimilarRecipesBenchmark(BenchmarkCase):
+    def test_build(self):
+        count = scale("RECIPES", 1_000_000)
+        dirty = scale("SIMILAR_DIRTY", count // 1000)
+        first, _ = create_recipes(
+            count,
+            create_users(1_000),
+            ingredients=create_ingredients(scale("INGREDIENTS", 20_000)),
+            tags=create_tags(20),
+        )
+
+        with measure(f"Первый расчёт, {count} рецептов"):
+            self.assertEqual(build(), count)
+        self.assertEqual(SimilarRecipes.objects.count(), count)
+
+        execute(
+            "UPDATE recipes_recipe SET updated_at = now() "
+            "WHERE id < %s + %s",
+            [first, dirty],
+        )
+        with measure(f"Частичный расчёт, {dirty} изменённых"):
+            self.assertEqual(build(), dirty)
+        with measure("Частичный расчёт без изменений"):
+            self.assertEqual(build(), 0)
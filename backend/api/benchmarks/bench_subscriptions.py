@@ -0,0 +1,89 @@
+"""/api/users/subscriptions/ при подписке на плодовитых авторов.
+
+Читатель подписан на BENCH_AUTHORS авторов (по умолчанию 50), у каждого
+BENCH_AUTHOR_RECIPES рецептов (по умолчанию 2k). Замеряется страница
+подписок с разными recipes_limit: число рецептов в ответе, время
+SQL-запросов и полное время ответа.
+"""
+
+from time import perf_counter
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.tests.utils import LOCAL_CACHES
+from users.models import User
+
+from .utils import (
+    BenchmarkCase,
+    create_recipes,
+    create_users,
+    execute,
+    percentile,
+    scale,
+)
+
+LIMITS = (3, 10, None)
+SAMPLES = 20
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class SubscriptionsBenchmark(BenchmarkCase):
+    def setUp(self):
+        self.reader = create_users(1, "reader")[0]
+        authors = create_users(scale("AUTHORS", 50), "author")
+        create_recipes(
+            (authors[1] - authors[0] + 1) * scale("AUTHOR_RECIPES", 2_000),
+            authors,
+        )
+        execute(
+            """
+            INSERT INTO users_subscription (user_id, author_id)
+            SELECT %s, a FROM generate_series(%s, %s) AS a
+            """,
+            [self.reader, *authors],
+        )
+        execute("ANALYZE")
+
+    def test_subscriptions(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=self.reader))
+        for limit in LIMITS:
+            url = "/api/users/subscriptions/?limit=10"
+            if limit is not None:
+                url += f"&recipes_limit={limit}"
+            client.get(url)
+            samples, sql = [], []
+            for _ in range(SAMPLES):
+                started = perf_counter()
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url)
+                samples.append(perf_counter() - started)
+                self.assertEqual(response.status_code, 200)
+                sql.append(sum(float(query["time"]) for query in queries))
+            recipes = sum(
+                len(author["recipes"]) for author in response.data["results"]
+            )
+            print(
+                f"recipes_limit={limit}: {recipes} рецептов в ответе, "
+                f"{len(queries)} запросов, SQL p50 "
+                f"{percentile(sql, 0.5) * 1000:.1f} мс, ответ p50 "
+                f"{percentile(samples, 0.5) * 1000:.1f} мс, "
+                f"p99 {percentile(samples, 0.99) * 1000:.1f} мс"
+            )
+        # Прежний путь: все рецепты авторов страницы, срез в Python
+        authors = [author["id"] for author in response.data["results"]]
+        samples = []
+        for _ in range(SAMPLES):
+            started = perf_counter()
+            for author in User.objects.filter(pk__in=authors).prefetch_related(
+                "recipes"
+            ):
+                author.recipes.all()[:3]
+            samples.append(perf_counter() - started)
+        print(
+            "Загрузка всех рецептов авторов страницы (прежний путь): "
+            f"p50 {percentile(samples, 0.5) * 1000:.1f} мс"
+        )
@@ -0,0 +1,54 @@
+"""Цена аутентификации по токену: БД, общий кеш и LRU процесса.
+
+Общий кеш — CACHES["default"] окружения (в docker-compose это Redis);
+с кешем процесса (locmem) замер общего уровня не имеет смысла и
+пропускается. Число запросов — BENCH_AUTH_REQUESTS.
+"""
+
+from time import perf_counter
+
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+from api.authentication import (
+    CachedTokenAuthentication,
+    get_shared_cache,
+    token_cache,
+)
+from api.tests.utils import create_user
+
+from .utils import BenchmarkCase, percentile, scale
+
+
+class TokenCacheBenchmark(BenchmarkCase):
+    def setUp(self):
+        self.key = Token.objects.create(user=create_user("reader")).key
+        self.requests = scale("AUTH_REQUESTS", 5_000)
+        token_cache.clear()
+
+    def authenticate(self, label):
+        authentication = CachedTokenAuthentication()
+        samples = []
+        for _ in range(self.requests):
+            started = perf_counter()
+            authentication.authenticate_credentials(self.key)
+            samples.append(perf_counter() - started)
+        print(
+            f"{label}: p50 {percentile(samples, 0.5) * 1e6:.0f} мкс, "
+            f"p99 {percentile(samples, 0.99) * 1e6:.0f} мкс"
+        )
+
+    def test_tiers(self):
+        with override_settings(AUTH_TOKEN_CACHE_ALIAS=""):
+            self.authenticate("Без кеша (Token JOIN User)")
+        if get_shared_cache() is None:
+            self.skipTest("CACHES['default'] локален для процесса")
+        local_ttl, token_cache.local_ttl = token_cache.local_ttl, 0
+        try:
+            self.authenticate(
+                f"Общий кеш ({type(get_shared_cache()).__name__})"
+            )
+        finally:
+            token_cache.local_ttl = local_ttl
+        self.authenticate("LRU процесса")
+        print(token_cache.stats())
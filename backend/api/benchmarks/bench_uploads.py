@@ -0,0 +1,138 @@
+"""Память процесса при BENCH_UPLOADS (по умолчанию 20) одновременных
+загрузках рецептов с изображением в base64 около 10 МБ.
+
+Запросы выполняются потоками одного процесса, как в воркере gthread.
+Замеряются пик памяти Python-объектов (tracemalloc) и рост пикового RSS
+процесса для Base64ImageField и, если установлен drf-extra-fields, для
+прежнего поля, которое декодирует строку целиком. Пиковый RSS не
+убывает, поэтому прежнее поле замеряется вторым: его рост показывает
+превышение над новым. На загрузку остаются две копии строки: тело
+запроса и разобранный JSON. Варианты изображений не строятся.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import tracemalloc
+from base64 import b64encode
+from io import BytesIO
+from unittest import mock
+
+from django.db import connections
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from api.serializers import RecipeCreateUpdateSerializer
+from api.tests.utils import LOCAL_CACHES
+from recipes.models import Recipe
+from users.models import User
+
+from .utils import (
+    BenchmarkCase,
+    create_ingredients,
+    create_tags,
+    create_users,
+    peak_rss,
+    scale,
+)
+
+try:
+    from drf_extra_fields.fields import (
+        Base64ImageField as LegacyBase64ImageField,
+    )
+except ImportError:
+    LegacyBase64ImageField = None
+
+# Сторона квадрата из случайных пикселей: PNG почти не сжимается,
+# и строка base64 получается около 10 МБ
+IMAGE_SIDE = 1_600
+
+
+def image_data():
+    image = Image.frombytes(
+        "RGB", (IMAGE_SIDE, IMAGE_SIDE), os.urandom(IMAGE_SIDE**2 * 3)
+    )
+    buffer = BytesIO()
+    image.save(buffer, "PNG", compress_level=0)
+    return "data:image/png;base64," + b64encode(buffer.getvalue()).decode()
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class UploadMemoryBenchmark(BenchmarkCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.media_override = override_settings(MEDIA_ROOT=self.media.name)
+        self.media_override.enable()
+        self.users = create_users(scale("UPLOADS", 20))
+        tags = create_tags(1)
+        ingredients = create_ingredients(1)
+        image = image_data()
+        print(f"Строка base64: {len(image) / 2**20:.1f} МБ")
+        # Тело готовится заранее: клиент не должен добавлять свои копии
+        self.body = json.dumps(
+            {
+                "name": "Рецепт",
+                "text": "Описание",
+                "cooking_time": 10,
+                "image": image,
+                "tags": [tags[0]],
+                "ingredients": [{"id": ingredients[0], "amount": 10}],
+            }
+        ).encode()
+
+    def tearDown(self):
+        self.media_override.disable()
+        self.media.cleanup()
+        super().tearDown()
+
+    def upload(self, user_id, barrier, statuses):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=user_id))
+        barrier.wait()
+        try:
+            response = client.post(
+                "/api/recipes/", self.body, content_type="application/json"
+            )
+            statuses.append(response.status_code)
+        finally:
+            connections.close_all()
+
+    def run_uploads(self, label):
+        user_ids = range(self.users[0], self.users[1] + 1)
+        barrier = threading.Barrier(len(user_ids))
+        statuses = []
+        threads = [
+            threading.Thread(
+                target=self.upload, args=(user_id, barrier, statuses)
+            )
+            for user_id in user_ids
+        ]
+        rss = peak_rss()
+        tracemalloc.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.assertEqual(statuses, [201] * len(user_ids))
+        print(
+            f"{label}, {len(user_ids)} загрузок: пик памяти Python "
+            f"{python_peak / 2**20:.0f} МБ, рост пикового RSS "
+            f"{peak_rss() - rss:.0f} МБ"
+        )
+        Recipe.objects.all().delete()
+
+    @mock.patch("recipes.signals.enqueue")
+    def test_concurrent_uploads(self, enqueue):
+        self.run_uploads("Base64ImageField")
+        if LegacyBase64ImageField is None:
+            print("drf-extra-fields не установлен, прежнее поле пропущено")
+            return
+        with mock.patch.dict(
+            RecipeCreateUpdateSerializer._declared_fields,
+            image=LegacyBase64ImageField(),
+        ):
+            self.run_uploads("Прежнее поле drf-extra-fields")
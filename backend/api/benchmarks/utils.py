@@ -0,0 +1,208 @@
+"""Генерация больших объёмов данных и замеры для нагрузочных тестов.
+
+Данные вставляются SQL-запросами с generate_series: через ORM миллион
+рецептов создавался бы часами.
+"""
+
+import os
+import resource
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from api.tests.utils import RECIPE_IMAGE
+
+
+def scale(name, default):
+    """Объём данных: переменная окружения BENCH_<name> или default."""
+    return int(os.environ.get(f"BENCH_{name}", default))
+
+
+def peak_rss():
+    """Пиковый размер процесса в МБ."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@contextmanager
+def measure(label):
+    """Печатает время выполнения блока и рост пикового RSS процесса."""
+    rss = peak_rss()
+    started = perf_counter()
+    result = {}
+    yield result
+    result["seconds"] = perf_counter() - started
+    result["rss"] = peak_rss() - rss
+    print(
+        f"{label}: {result['seconds']:.2f} с, "
+        f"рост пикового RSS {result['rss']:.0f} МБ"
+    )
+
+
+def percentile(samples, share):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def execute(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def max_id(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+def create_users(count, prefix="bench"):
+    """count пользователей с профилями; возвращает (первый id, последний)."""
+    first = max_id("auth_user") + 1
+    execute(
+        """
+        INSERT INTO auth_user (
+            id, password, is_superuser, username, first_name, last_name,
+            email, is_staff, is_active, date_joined
+        )
+        SELECT i, '!', false, %s || i, 'Имя', 'Фамилия',
+               %s || i || '@example.com', false, true, now()
+        FROM generate_series(%s, %s) AS i
+        """,
+        [prefix, prefix, first, first + count - 1],
+    )
+    execute(
+        """
+        INSERT INTO users_profile (
+            user_id, recipes_count, subscribers_count, avatar_variants,
+            feed_merged
+        )
+        SELECT i, 0, 0, '{}', false FROM generate_series(%s, %s) AS i
+        """,
+        [first, first + count - 1],
+    )
+    execute(
+        "SELECT setval(pg_get_serial_sequence('auth_user', 'id'), %s)",
+        [first + count - 1],
+    )
+    return first, first + count - 1
+
+
+def create_tags(count):
+    first = max_id("recipes_tag") + 1
+    execute(
+        """
+        INSERT INTO recipes_tag (id, name, slug)
+        SELECT i, 'Тег ' || i, 'tag-' || i FROM generate_series(%s, %s) i
+        """,
+        [first, first + count - 1],
+    )
+    execute(
+        "SELECT setval(pg_get_serial_sequence('recipes_tag', 'id'), %s)",
+        [first + count - 1],
+    )
+    return first, first + count - 1
+
+
+def create_ingredients(count):
+    first = max_id("recipes_ingredient") + 1
+    execute(
+        """
+        INSERT INTO recipes_ingredient (id, name, measurement_unit)
+        SELECT i, 'ингредиент ' || i, 'г' FROM generate_series(%s, %s) i
+        """,
+        [first, first + count - 1],
+    )
+    execute(
+        "SELECT setval("
+        "pg_get_serial_sequence('recipes_ingredient', 'id'), %s)",
+        [first + count - 1],
+    )
+    return first, first + count - 1
+
+
+def create_recipes(
+    count,
+    authors,
+    ingredients=None,
+    tags=None,
+    per_recipe=8,
+    names="Рецепт",
+):
+    """count рецептов авторов authors=(первый id, последний).
+
+    У каждого рецепта per_recipe случайных ингредиентов из диапазона
+    ingredients и по два тега из tags. Рецепты публикуются раз в секунду
+    в порядке id. Возвращает (первый id, последний).
+    """
+    first = max_id("recipes_recipe") + 1
+    last = first + count - 1
+    execute(
+        """
+        INSERT INTO recipes_recipe (
+            id, name, text, cooking_time, image, image_variants, pub_date,
+            updated_at, author_id, favorites_count, shopping_carts_count
+        )
+        SELECT i, %s || ' ' || i, 'Описание', 1 + i %% 120, %s, '{}',
+               now() - (%s - i) * interval '1 second', now(),
+               %s + i %% %s, 0, 0
+        FROM generate_series(%s, %s) AS i
+        """,
+        [
+            names,
+            RECIPE_IMAGE,
+            last,
+            authors[0],
+            authors[1] - authors[0] + 1,
+            first,
+            last,
+        ],
+    )
+    execute(
+        "SELECT setval(pg_get_serial_sequence('recipes_recipe', 'id'), %s)",
+        [last],
+    )
+    if ingredients:
+        execute(
+            """
+            INSERT INTO recipes_recipeingredients (
+                recipe_id, ingredient_id, amount
+            )
+            SELECT DISTINCT i, %s + floor(random() * %s)::int, 10
+            FROM generate_series(%s, %s) AS i, generate_series(1, %s)
+            """,
+            [
+                ingredients[0],
+                ingredients[1] - ingredients[0] + 1,
+                first,
+                last,
+                per_recipe,
+            ],
+        )
+    if tags:
+        span = tags[1] - tags[0] + 1
+        execute(
+            """
+            INSERT INTO recipes_recipe_tags (recipe_id, tag_id)
+            SELECT i, %s + i %% %s FROM generate_series(%s, %s) AS i
+            UNION
+            SELECT i, %s + (i / %s) %% %s FROM generate_series(%s, %s) AS i
+            """,
+            [tags[0], span, first, last, tags[0], span, span, first, last],
+        )
+    execute("""
+        UPDATE users_profile p SET recipes_count = counted.total
+        FROM (
+            SELECT author_id, COUNT(*) AS total FROM recipes_recipe
+            GROUP BY author_id
+        ) counted
+        WHERE p.user_id = counted.author_id
+        """)
+    execute("ANALYZE")
+    return first, last
+
+
+class BenchmarkCase(TransactionTestCase):
+    """Замер на тестовой базе; данные удаляются после каждого замера."""
+
+    databases = {"default"}
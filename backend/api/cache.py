@@ -0,0 +1,161 @@
+"""Кеш ответов для анонимных запросов к рецептам."""
+
+from hashlib import md5
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import parse_etags, patch_vary_headers, quote_etag
+
+from foodgram.cache import is_process_local
+from foodgram.db.routers import use_primary
+
+from .constants import RESPONSE_CACHE_TIMEOUT
+
+GENERATION_KEY = "recipes_cache:generation"
+HITS_KEY = "recipes_cache:hits"
+MISSES_KEY = "recipes_cache:misses"
+CACHED_QUERY_PARAMS = (
+    "page",
+    "limit",
+    "tags",
+    "author",
+    "search",
+    "pagination",
+    "cursor",
+    "is_favorited",
+    "is_in_shopping_cart",
+)
+
+
+def get_cache():
+    """Бэкенд кеша ответов (алиас из settings.RESPONSE_CACHE_ALIAS)."""
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def bump_generation():
+    """Делает недействительными все закешированные ответы."""
+    get_cache().set(GENERATION_KEY, uuid4().hex, None)
+
+
+def get_generation():
+    cache = get_cache()
+    cache.add(GENERATION_KEY, uuid4().hex, None)
+    return cache.get(GENERATION_KEY)
+
+
+def _increment(key):
+    cache = get_cache()
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_cache_stats():
+    """Счётчики попаданий и промахов кеша ответов."""
+    cache = get_cache()
+    return {
+        "hits": cache.get(HITS_KEY, 0),
+        "misses": cache.get(MISSES_KEY, 0),
+    }
+
+
+class AnonymousResponseCacheMixin:
+    """Кеширует готовые ответы list/retrieve для анонимных пользователей.
+
+    Ключ строится из поколения кеша, действия, хоста и нормализованной
+    строки запроса; поколение сдвигают сигналы изменения рецептов и
+    связанных с ними данных. Ответы отдаются с ETag и поддерживают
+    If-None-Match. Поколение общее для воркеров только в общем кеше,
+    поэтому с кешем процесса (locmem) ответы не кешируются.
+    """
+
+    cached_actions = ("list", "retrieve")
+    cache_timeout = RESPONSE_CACHE_TIMEOUT
+    response_cache_key = None
+
+    def get_response_cache_key(self, request):
+        params = "&".join(
+            f"{name}={','.join(sorted(request.query_params.getlist(name)))}"
+            for name in CACHED_QUERY_PARAMS
+            if name in request.query_params
+        )
+        return ":".join(
+            (
+                "recipes_cache",
+                get_generation(),
+                self.action,
+                str(self.kwargs.get(self.lookup_field, "")),
+                request.accepted_renderer.format,
+                request.scheme,
+                request.get_host(),
+                md5(params.encode()).hexdigest(),
+            )
+        )
+
+    def use_response_cache(self, request):
+        # Поколение, сдвинутое записью в одном воркере, в locmem других
+        # воркеров не видно: они отдавали бы устаревшие ответы.
+        return (
+            not is_process_local(get_cache())
+            and self.action in self.cached_actions
+            and request.method == "GET"
+            and request.user.is_anonymous
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.response_cache_key = None
+        if self.use_response_cache(request):
+            self.response_cache_key = self.get_response_cache_key(request)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if self.response_cache_key is None:
+            return handler(request, *args, **kwargs)
+        entry = get_cache().get(self.response_cache_key)
+        if entry is None:
+            _increment(MISSES_KEY)
+            # Ответ попадёт в кеш: читаем основную БД, а не реплику.
+            with use_primary():
+                response = handler(request, *args, **kwargs)
+            response["X-Cache"] = "MISS"
+            return response
+        _increment(HITS_KEY)
+        return self.cached_entry_response(request, entry)
+
+    def cached_entry_response(self, request, entry):
+        etag, content_type, content = entry
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=content_type)
+        response["ETag"] = etag
+        response["X-Cache"] = "HIT"
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if self.response_cache_key is None:
+            return response
+        patch_vary_headers(response, ("Authorization",))
+        if response.status_code == 200 and response.get("X-Cache") == "MISS":
+            response.render()
+            etag = quote_etag(md5(response.content).hexdigest())
+            response["ETag"] = etag
+            get_cache().set(
+                self.response_cache_key,
+                (etag, response["Content-Type"], response.content),
+                self.cache_timeout,
+            )
+        return response
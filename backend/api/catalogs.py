@@ -0,0 +1,236 @@
+"""Справочники тегов и ингредиентов в памяти процесса.
+
+Ответы собираются заранее: JSON, его gzip-копия и сильный ETag.
+Справочник перечитывается, когда меняется его версия в таблице
+CatalogVersion (версии сдвигают сигналы сохранения и удаления Tag и
+Ingredient, в том числе из команд импорта). Процесс сверяет версию с БД
+не чаще раза в CATALOG_VERSION_CHECK_INTERVAL секунд.
+"""
+
+import gzip
+import json
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from hashlib import md5
+from threading import Lock
+from time import monotonic
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import (
+    parse_etags,
+    patch_cache_control,
+    patch_vary_headers,
+)
+
+from foodgram.db.routers import use_primary
+from recipes.models import CatalogVersion, Ingredient, Tag
+from .serializers import TagSerializer
+from .constants import (
+    CATALOG_COMPRESS_MIN_SIZE,
+    CATALOG_MAX_AGE,
+    CATALOG_VERSION_CHECK_INTERVAL,
+    INGREDIENT_SEARCH_LIMIT,
+)
+
+INGREDIENT_VERSION_KEY = "ingredients"
+TAG_VERSION_KEY = "tags"
+
+
+def encode_json(data):
+    """JSON в том же виде, что отдаёт JSONRenderer DRF."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class EncodedBody(NamedTuple):
+    """Готовое тело ответа: JSON, его gzip-копия (или None) и ETag."""
+
+    content: bytes
+    gzipped: Optional[bytes]
+    etag: str
+
+
+def encode_body(content, compress=True):
+    gzipped = None
+    if compress and len(content) >= CATALOG_COMPRESS_MIN_SIZE:
+        gzipped = gzip.compress(content, mtime=0)
+    return EncodedBody(content, gzipped, f'"{md5(content).hexdigest()}"')
+
+
+def join_items(items):
+    return b"[" + b",".join(items) + b"]"
+
+
+def catalog_response(request, body):
+    """Ответ с ETag и Cache-Control; 304, если у клиента та же версия."""
+    use_gzip = body.gzipped is not None and "gzip" in request.headers.get(
+        "Accept-Encoding", ""
+    )
+    etag = f'{body.etag[:-1]}-gzip"' if use_gzip else body.etag
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            body.gzipped if use_gzip else body.content,
+            content_type="application/json",
+        )
+        if use_gzip:
+            response["Content-Encoding"] = "gzip"
+    response["ETag"] = etag
+    patch_vary_headers(response, ("Accept-Encoding",))
+    patch_cache_control(response, public=True, max_age=CATALOG_MAX_AGE)
+    return response
+
+
+def bump_version(key):
+    """Помечает справочник устаревшим во всех процессах.
+
+    Версия сдвигается в той же транзакции, что и изменение справочника;
+    процессы увидят её после коммита.
+    """
+    updated = CatalogVersion.objects.filter(name=key).update(
+        version=F("version") + 1
+    )
+    if not updated:
+        CatalogVersion.objects.bulk_create(
+            [CatalogVersion(name=key, version=1)], ignore_conflicts=True
+        )
+    catalog = catalogs.get(key)
+    if catalog is not None:
+        transaction.on_commit(catalog.expire_version)
+
+
+def read_version(key):
+    """Текущая версия справочника в БД (0, если его ещё не меняли)."""
+    with use_primary():
+        version = (
+            CatalogVersion.objects.filter(name=key)
+            .values_list("version", flat=True)
+            .first()
+        )
+    return version or 0
+
+
+class Catalog(ABC):
+    """Справочник, загружаемый один раз на процесс и на версию."""
+
+    version_key = None
+
+    def __init__(self):
+        self._lock = Lock()
+        self._version = None
+        self._data = None
+        self._checked_at = None
+
+    @abstractmethod
+    def load(self):
+        """Загружает данные справочника из БД."""
+
+    def expire_version(self):
+        """Следующий запрос этого процесса сверит версию с БД."""
+        self._checked_at = None
+
+    def _version_fresh(self):
+        return (
+            self._checked_at is not None
+            and monotonic() - self._checked_at < CATALOG_VERSION_CHECK_INTERVAL
+        )
+
+    def _ensure_loaded(self):
+        if self._version_fresh():
+            return self._data
+        return self._check_version()
+
+    def _check_version(self):
+        checked_at = monotonic()
+        version = read_version(self.version_key)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    with use_primary():
+                        self._data = self.load()
+                    self._version = version
+        self._checked_at = checked_at
+        return self._data
+
+
+class IngredientIndex(Catalog):
+    """Отсортированный массив ингредиентов с поиском по префиксу."""
+
+    version_key = INGREDIENT_VERSION_KEY
+
+    def load(self):
+        rows = sorted(
+            Ingredient.objects.values_list("name", "measurement_unit", "id"),
+            key=lambda row: (row[0].lower(), row[2]),
+        )
+        keys = [name.lower() for name, _, _ in rows]
+        items = [
+            encode_json({"id": pk, "name": name, "measurement_unit": unit})
+            for name, unit, pk in rows
+        ]
+        return keys, items, encode_body(join_items(items))
+
+    def all(self):
+        """Весь справочник одним JSON-массивом."""
+        return self._ensure_loaded()[2]
+
+    def search(self, prefix, limit=None):
+        """JSON-массив ингредиентов, название которых начинается с prefix."""
+        return self._search(self._ensure_loaded(), prefix, limit)
+
+    def _search(self, data, prefix, limit):
+        keys, items, body = data
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return body
+        if limit is None:
+            limit = getattr(
+                settings, "INGREDIENT_SEARCH_LIMIT", INGREDIENT_SEARCH_LIMIT
+            )
+        found = []
+        position = bisect_left(keys, prefix)
+        while (
+            position < len(keys)
+            and len(found) < limit
+            and keys[position].startswith(prefix)
+        ):
+            found.append(items[position])
+            position += 1
+        return encode_body(join_items(found), compress=False)
+
+
+class TagCatalog(Catalog):
+    """Все теги и каждый тег по отдельности."""
+
+    version_key = TAG_VERSION_KEY
+
+    def load(self):
+        tags = {
+            tag["id"]: encode_json(tag)
+            for tag in TagSerializer(Tag.objects.all(), many=True).data
+        }
+        return (
+            encode_body(join_items(tags.values())),
+            {
+                pk: encode_body(content, compress=False)
+                for pk, content in tags.items()
+            },
+        )
+
+    def all(self):
+        return self._ensure_loaded()[0]
+
+    def get(self, pk):
+        """Тег по id или None."""
+        return self._ensure_loaded()[1].get(pk)
+
+
+ingredient_index = IngredientIndex()
+tag_catalog = TagCatalog()
+catalogs = {
+    catalog.version_key: catalog for catalog in (ingredient_index, tag_catalog)
+}
@@ -5,3 +5,23 @@ MAX_PAGE_SIZE = 20
 PAGE_SIZE_QUERY_PARAM = "limit"
 MIN_AMOUNT = 1
 MIN_COOKING_TIME = 1
+INGREDIENT_SEARCH_LIMIT = 50
+PAGINATION_QUERY_PARAM = "pagination"
+CURSOR_PAGINATION = "cursor"
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+PDF_FONT_NAME = "ShoppingListFont"
+PDF_FONT_SIZE = 12
+STREAM_CHUNK_SIZE = 64 * 1024
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40_000_000
+IMAGE_SPOOL_SIZE = 1024 * 1024
+BASE64_CHUNK_SIZE = 64 * 1024
+MAX_BULK_RECIPES = 100
+PANTRY_MAX_INGREDIENTS = 100
+PANTRY_DEFAULT_MAX_MISSING = 2
+CATALOG_MAX_AGE = 60
+CATALOG_COMPRESS_MIN_SIZE = 512
+CATALOG_VERSION_CHECK_INTERVAL = 5
+AUTH_TOKEN_CACHE_TTL = 60
+AUTH_TOKEN_LOCAL_CACHE_SIZE = 10_000
+AUTH_TOKEN_LOCAL_CACHE_TTL = 2
@@ -0,0 +1,122 @@
+"""Поля сериализаторов API."""
+
+import binascii
+import re
+from tempfile import SpooledTemporaryFile
+from uuid import uuid4
+
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image
+from rest_framework import serializers
+
+from .constants import (
+    BASE64_CHUNK_SIZE,
+    IMAGE_SPOOL_SIZE,
+    MAX_IMAGE_PIXELS,
+    MAX_IMAGE_SIZE,
+)
+
+WHITESPACE = re.compile(r"\s")
+
+# Сигнатуры в начале файла → расширение
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+CONTENT_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "gif": "image/gif",
+    "webp": "image/webp",
+}
+
+
+def detect_image_format(header):
+    """Формат изображения по первым байтам или None."""
+    for signature, extension in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+class Base64ImageField(serializers.ImageField):
+    """Изображение в base64 (в том числе data URI) с ограниченной памятью.
+
+    Формат определяется по первым байтам до декодирования всего файла,
+    размер проверяется по длине строки, а число пикселей — по заголовку
+    изображения. Данные декодируются частями во временный файл, который
+    остаётся в памяти только до IMAGE_SPOOL_SIZE.
+    """
+
+    default_error_messages = {
+        "invalid_base64": "Изображение должно быть строкой в base64.",
+        "invalid_format": "Неподдерживаемый формат изображения.",
+        "too_large": "Размер изображения превышает {max_size} байт.",
+        "too_many_pixels": "Изображение больше {max_pixels} пикселей.",
+        "invalid_image": "Загрузите корректное изображение.",
+    }
+
+    def __init__(self, *args, **kwargs):
+        self.allowed_formats = kwargs.pop(
+            "allowed_formats", tuple(CONTENT_TYPES)
+        )
+        self.max_size = kwargs.pop("max_size", MAX_IMAGE_SIZE)
+        self.max_pixels = kwargs.pop("max_pixels", MAX_IMAGE_PIXELS)
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail("invalid_base64")
+        # Начало данных после заголовка data URI: срез строки целиком
+        # был бы ещё одной копией на каждую загрузку.
+        prefix = data.find(";base64,")
+        offset = prefix + len(";base64,") if prefix >= 0 else 0
+        # Переносы строк могут быть где угодно: иначе границы частей
+        # разойдутся с группами по 4 символа.
+        if WHITESPACE.search(data, offset):
+            data, offset = "".join(data[offset:].split()), 0
+        if (len(data) - offset) // 4 * 3 > self.max_size:
+            self.fail("too_large", max_size=self.max_size)
+
+        header_end = offset + 16
+        image_format = detect_image_format(
+            self.decode(data[offset:header_end])
+        )
+        if image_format not in self.allowed_formats:
+            self.fail("invalid_format")
+
+        file = SpooledTemporaryFile(max_size=IMAGE_SPOOL_SIZE)
+        for start in range(offset, len(data), BASE64_CHUNK_SIZE):
+            end = start + BASE64_CHUNK_SIZE
+            file.write(self.decode(data[start:end]))
+        size = file.tell()
+        file.seek(0)
+        self.validate_image(file)
+        file.seek(0)
+        return UploadedFile(
+            file,
+            name=f"{uuid4()}.{image_format}",
+            content_type=CONTENT_TYPES[image_format],
+            size=size,
+        )
+
+    def decode(self, chunk):
+        try:
+            return binascii.a2b_base64(chunk)
+        except binascii.Error:
+            self.fail("invalid_base64")
+
+    def validate_image(self, file):
+        """Проверяет размеры по заголовку, затем целостность файла."""
+        try:
+            with Image.open(file) as image:
+                width, height = image.size
+                if width * height > self.max_pixels:
+                    self.fail("too_many_pixels", max_pixels=self.max_pixels)
+                image.verify()
+        except (OSError, SyntaxError, Image.DecompressionBombError):
+            self.fail("invalid_image")
@@ -0,0 +1,45 @@
+"""Миксины вьюсетов API."""
+
+from users.models import Subscription
+
+
+def get_subscribed_ids(user, author_ids):
+    """Возвращает множество id авторов, на которых подписан пользователь.
+
+    Проверяются только переданные авторы — одним запросом на страницу.
+    """
+    if user.is_anonymous:
+        return set()
+    author_ids = set(author_ids) - {user.id}
+    if not author_ids:
+        return set()
+    return set(
+        Subscription.objects.filter(
+            user=user, author_id__in=author_ids
+        ).values_list("author_id", flat=True)
+    )
+
+
+class SubscribedAuthorsMixin:
+    """Заранее вычисляет флаг is_subscribed для всех авторов на странице.
+
+    Перед созданием сериализатора собирает id авторов переданных объектов
+    и кладёт в контекст множество ``subscribed_ids``, которое читает
+    UserSerializer.get_is_subscribed.
+    """
+
+    def get_author_ids(self, objects):
+        """Id авторов для набора объектов (по умолчанию — пользователи)."""
+        return [obj.id for obj in objects]
+
+    def get_serializer(self, *args, **kwargs):
+        instance = args[0] if args else kwargs.get("instance")
+        if instance is not None:
+            objects = instance if kwargs.get("many") else [instance]
+            context = kwargs.setdefault(
+                "context", self.get_serializer_context()
+            )
+            context["subscribed_ids"] = get_subscribed_ids(
+                self.request.user, self.get_author_ids(objects)
+            )
+        return super().get_serializer(*args, **kwargs)
@@ -1,8 +1,14 @@
 """Кастомный пагинатор для API."""
 
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
-from .constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PAGE_SIZE_QUERY_PARAM
+from .constants import (
+    CURSOR_PAGINATION,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    PAGE_SIZE_QUERY_PARAM,
+    PAGINATION_QUERY_PARAM,
+)
 
 
 class PageNumberPagination(PageNumberPagination):
@@ -11,3 +17,43 @@ class PageNumberPagination(PageNumberPagination):
     page_size = DEFAULT_PAGE_SIZE
     page_size_query_param = PAGE_SIZE_QUERY_PARAM
     max_page_size = MAX_PAGE_SIZE
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Курсорная пагинация ленты по (pub_date, id) без COUNT(*)."""
+
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = PAGE_SIZE_QUERY_PARAM
+    max_page_size = MAX_PAGE_SIZE
+    ordering = ("-pub_date", "-id")
+
+
+class RecipePagination(PageNumberPagination):
+    """Пагинатор рецептов: page/limit по умолчанию, курсор по запросу.
+
+    Курсорный режим включается параметром ?pagination=cursor (или
+    наличием cursor); ссылки next/previous сохраняют этот параметр.
+    """
+
+    cursor_pagination_class = RecipeCursorPagination
+
+    def use_cursor(self, request):
+        params = request.query_params
+        return (
+            params.get(PAGINATION_QUERY_PARAM) == CURSOR_PAGINATION
+            or self.cursor_pagination_class.cursor_query_param in params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,156 @@
+"""Лёгкое чтение карточек рецептов без вложенных сериализаторов.
+
+Рецепты выбираются через values(), теги и ингредиенты — двумя
+запросами values_list на страницу, а JSON собирается обычными словарями
+в том же виде и порядке ключей, что и у RecipeSerializer.
+"""
+
+from django.core.files.storage import default_storage
+
+from recipes.models import RecipeIngredients, Tag
+from users.models import Subscription
+from .serializers import build_variant_urls
+
+RECIPE_COLUMNS = (
+    "id",
+    "name",
+    "text",
+    "cooking_time",
+    "image",
+    "image_variants",
+    "pub_date",
+    "author_id",
+    "author__username",
+    "author__first_name",
+    "author__last_name",
+    "author__email",
+    "author__profile__avatar",
+    "author__profile__avatar_variants",
+)
+FLAG_ANNOTATIONS = ("is_favorited", "is_in_shopping_cart")
+
+
+def recipe_card_values(queryset):
+    """Переводит queryset рецептов на выборку нужных столбцов."""
+    flags = [
+        name for name in FLAG_ANNOTATIONS if name in queryset.query.annotations
+    ]
+    return queryset.prefetch_related(None).values(*RECIPE_COLUMNS, *flags)
+
+
+def tag_rows(recipe_ids):
+    return Tag.objects.filter(recipes__in=recipe_ids).values_list(
+        "recipes", "id", "name", "slug"
+    )
+
+
+def ingredient_rows(recipe_ids):
+    return RecipeIngredients.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list(
+        "recipe_id",
+        "ingredient_id",
+        "ingredient__name",
+        "ingredient__measurement_unit",
+        "amount",
+    )
+
+
+class RecipeCardProjection:
+    """Замена RecipeSerializer для чтения: тот же JSON из строк values().
+
+    Принимает те же аргументы, что и сериализатор (instance, many,
+    context), и отдаёт результат в .data.
+    """
+
+    def __init__(self, instance=None, many=False, context=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @property
+    def data(self):
+        rows = self.get_rows()
+        recipe_ids = [row["id"] for row in rows]
+        return self.result(
+            self.build(
+                rows,
+                tag_rows(recipe_ids),
+                ingredient_rows(recipe_ids),
+                self.get_subscribed_ids(rows),
+            )
+        )
+
+    def get_rows(self):
+        return list(self.instance) if self.many else [self.instance]
+
+    def result(self, cards):
+        return cards if self.many else cards[0]
+
+    def build(self, rows, tag_values, ingredient_values, subscribed_ids):
+        tags = {}
+        for recipe_id, pk, name, slug in tag_values:
+            tags.setdefault(recipe_id, []).append(
+                {"id": pk, "name": name, "slug": slug}
+            )
+        ingredients = {}
+        for recipe_id, pk, name, unit, amount in ingredient_values:
+            ingredients.setdefault(recipe_id, []).append(
+                {
+                    "id": pk,
+                    "name": name,
+                    "measurement_unit": unit,
+                    "amount": amount,
+                }
+            )
+
+        request = self.context["request"]
+        return [
+            {
+                "id": row["id"],
+                "author": {
+                    "id": row["author_id"],
+                    "username": row["author__username"],
+                    "first_name": row["author__first_name"],
+                    "last_name": row["author__last_name"],
+                    "email": row["author__email"],
+                    "is_subscribed": row["author_id"] in subscribed_ids,
+                    "avatar": self.file_url(row["author__profile__avatar"]),
+                    "avatar_variants": build_variant_urls(
+                        request, row["author__profile__avatar_variants"] or {}
+                    ),
+                },
+                "tags": tags.get(row["id"], []),
+                "ingredients": ingredients.get(row["id"], []),
+                "is_favorited": bool(row.get("is_favorited")),
+                "is_in_shopping_cart": bool(row.get("is_in_shopping_cart")),
+                "image_variants": build_variant_urls(
+                    request, row["image_variants"]
+                ),
+                "name": row["name"],
+                "text": row["text"],
+                "cooking_time": row["cooking_time"],
+                "image": self.file_url(row["image"]),
+            }
+            for row in rows
+        ]
+
+    def get_subscribed_ids(self, rows):
+        user = self.context["request"].user
+        if user.is_anonymous:
+            return set()
+        subscribed_ids = self.context.get("subscribed_ids")
+        if subscribed_ids is None:
+            subscribed_ids = set(
+                Subscription.objects.filter(
+                    user=user, author_id__in={row["author_id"] for row in rows}
+                ).values_list("author_id", flat=True)
+            )
+        return subscribed_ids
+
+    def file_url(self, name):
+        if not name:
+            return None
+        return self.context["request"].build_absolute_uri(
+            default_storage.url(name)
+        )
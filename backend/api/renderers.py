@@ -0,0 +1,100 @@
+"""Рендереры API: быстрый JSON и выгрузка списка покупок."""
+
+import json
+from math import isfinite
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # без orjson работает обычный json
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+SCALAR_TYPES = frozenset((str, int, bool, type(None)))
+
+
+def has_non_finite(data):
+    """Есть ли в данных NaN или бесконечность (orjson пишет их как null).
+
+    Обход идёт почти на каждом ответе (null есть в любой странице со
+    ссылкой previous), поэтому частые скалярные типы отсеиваются первыми.
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if type(value) in SCALAR_TYPES:
+            continue
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, float) and not isfinite(value):
+            return True
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson; без orjson — стандартный рендерер DRF.
+
+    Всё, что orjson не умеет сам (datetime, Decimal, ленивые строки
+    перевода, UUID, QuerySet), передаётся в JSONEncoder DRF, поэтому
+    вывод совпадает с обычным. Отступы, ensure_ascii и некомпактный
+    вывод orjson не поддерживает — такие запросы рендерятся стандартно.
+    Стандартно рендерятся и данные, которые orjson записал бы иначе:
+    NaN и бесконечности (DRF отклоняет их, orjson пишет null) и то, что
+    orjson не сериализует вовсе (например, целые шире 64 бит).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(
+                data, default=JSONEncoder().default, option=ORJSON_OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if b"null" in content and has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как и JSONRenderer, экранируем разделители строк для JavaScript
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """Базовый рендерер: готовое тело отдаётся как есть, ошибки — JSON."""
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, (bytes, str)):
+            return data
+        return json.dumps(data, ensure_ascii=False)
+
+
+class PlainTextRenderer(ShoppingListRenderer):
+    media_type = "text/plain"
+    format = "txt"
+
+
+class CSVRenderer(ShoppingListRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class PDFRenderer(ShoppingListRenderer):
+    media_type = "application/pdf"
+    format = "pdf"
+    charset = None
@@ -1,10 +1,15 @@
 """Сериализаторы API: теги, ингредиенты, рецепты, пользователи."""
 
 from django.core.exceptions import ValidationError
-from drf_extra_fields.fields import Base64ImageField
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from django.core.validators import MinValueValidator
 from rest_framework import serializers
 
+from recipes import shopping_list
+from recipes.constants import IMAGE_VARIANT_FORMATS
+from recipes.search import update_search_vector
 from recipes.models import (
     Ingredient,
     Recipe,
@@ -12,11 +17,37 @@ from recipes.models import (
     RecipeIngredients,
     Favorite,
     ShoppingCart,
+    ShoppingListItem,
 )
-from .constants import MIN_AMOUNT, MIN_COOKING_TIME
+from .constants import (
+    DEFAULT_PAGE_SIZE,
+    MAX_BULK_RECIPES,
+    MAX_PAGE_SIZE,
+    MIN_AMOUNT,
+    MIN_COOKING_TIME,
+    PANTRY_DEFAULT_MAX_MISSING,
+    PANTRY_MAX_INGREDIENTS,
+)
+from .fields import Base64ImageField
 from users.models import User, Subscription, Profile
 
 
+def build_variant_urls(request, variants):
+    """Абсолютные ссылки на уменьшенные копии изображения по размерам."""
+    return {
+        label: {
+            key: (
+                request.build_absolute_uri(default_storage.url(value))
+                if key in IMAGE_VARIANT_FORMATS
+                else value
+            )
+            for key, value in variant.items()
+        }
+        for label, variant in variants.items()
+        if isinstance(variant, dict)
+    }
+
+
 class TagSerializer(serializers.ModelSerializer):
     """Сериализатор для тегов."""
 
@@ -51,10 +82,26 @@ class RecipeIngredientsSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "measurement_unit", "amount")
 
 
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    """Сериализатор позиции списка покупок."""
+
+    id = serializers.IntegerField(source="ingredient.id")
+    name = serializers.CharField(source="ingredient.name")
+    measurement_unit = serializers.CharField(
+        source="ingredient.measurement_unit"
+    )
+    amount = serializers.IntegerField(source="total_amount")
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ("id", "name", "measurement_unit", "amount")
+
+
 class CreateUpdateRecipeIngredientsSerializer(serializers.ModelSerializer):
     """Сериализатор добавки ингредиентов при создании/обновлении рецепта."""
 
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    # Ингредиенты проверяются одним запросом в RecipeCreateUpdateSerializer
+    id = serializers.IntegerField()
     amount = serializers.IntegerField(
         validators=[
             MinValueValidator(
@@ -73,6 +120,7 @@ class UserSerializer(serializers.ModelSerializer):
 
     is_subscribed = serializers.SerializerMethodField()
     avatar = serializers.SerializerMethodField()
+    avatar_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -84,12 +132,17 @@ class UserSerializer(serializers.ModelSerializer):
             "email",
             "is_subscribed",
             "avatar",
+            "avatar_variants",
         )
 
     def get_is_subscribed(self, obj):
         user = self.context["request"].user
         if user.is_anonymous:
             return False
+        # Вьюсеты заранее собирают подписки для всей страницы
+        subscribed_ids = self.context.get("subscribed_ids")
+        if subscribed_ids is not None:
+            return obj.id in subscribed_ids
         return Subscription.objects.filter(user=user, author=obj).exists()
 
     def get_avatar(self, obj):
@@ -98,6 +151,13 @@ class UserSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.profile.avatar.url)
         return None
 
+    def get_avatar_variants(self, obj):
+        if not hasattr(obj, "profile"):
+            return {}
+        return build_variant_urls(
+            self.context["request"], obj.profile.avatar_variants
+        )
+
 
 class UserCreateSerializer(serializers.ModelSerializer):
     """Сериализатор для регистрации пользователя."""
@@ -124,10 +184,11 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
     """Краткий сериализатор рецепта для подписок."""
 
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = ("id", "name", "image", "image_variants", "cooking_time")
 
     def get_image(self, obj):
         request = self.context["request"]
@@ -135,6 +196,34 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url)
         return None
 
+    def get_image_variants(self, obj):
+        return build_variant_urls(self.context["request"], obj.image_variants)
+
+
+class PantryRecipeSerializer(ShortRecipeSerializer):
+    """Краткий рецепт с числом недостающих ингредиентов."""
+
+    missing_count = serializers.IntegerField(read_only=True)
+
+    class Meta(ShortRecipeSerializer.Meta):
+        fields = ShortRecipeSerializer.Meta.fields + ("missing_count",)
+
+
+class PantryQuerySerializer(serializers.Serializer):
+    """Параметры поиска рецептов по имеющимся ингредиентам."""
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=PANTRY_MAX_INGREDIENTS,
+    )
+    max_missing = serializers.IntegerField(
+        min_value=0, default=PANTRY_DEFAULT_MAX_MISSING
+    )
+    limit = serializers.IntegerField(
+        min_value=1, max_value=MAX_PAGE_SIZE, default=DEFAULT_PAGE_SIZE
+    )
+
 
 class RecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для чтения рецепта."""
@@ -148,10 +237,20 @@ class RecipeSerializer(serializers.ModelSerializer):
     is_in_shopping_cart = serializers.BooleanField(
         read_only=True, default=False
     )
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        exclude = ("pub_date",)
+        exclude = (
+            "pub_date",
+            "updated_at",
+            "favorites_count",
+            "shopping_carts_count",
+            "search_vector",
+        )
+
+    def get_image_variants(self, obj):
+        return build_variant_urls(self.context["request"], obj.image_variants)
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
@@ -163,9 +262,7 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
     """Сериализатор для создания и редактирования рецепта."""
 
     author = UserSerializer(read_only=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
     ingredients = CreateUpdateRecipeIngredientsSerializer(many=True)
     image = Base64ImageField()
     cooking_time = serializers.IntegerField(
@@ -178,7 +275,13 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        exclude = ("pub_date",)
+        exclude = (
+            "pub_date",
+            "updated_at",
+            "favorites_count",
+            "shopping_carts_count",
+            "search_vector",
+        )
 
     def validate(self, data):
         tags = data.get("tags")
@@ -191,12 +294,35 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
 
         if not ingredients:
             raise ValidationError("Добавьте хотя бы один ингредиент.")
-        ingredient_ids = [item["id"].id for item in ingredients]
+        ingredient_ids = [item["id"] for item in ingredients]
         if len(ingredient_ids) != len(set(ingredient_ids)):
             raise ValidationError("Ингредиенты не должны повторяться.")
 
+        found_tags = Tag.objects.in_bulk(tags)
+        found_ingredients = Ingredient.objects.in_bulk(ingredient_ids)
+        errors = {}
+        missing_tags = [pk for pk in tags if pk not in found_tags]
+        if missing_tags:
+            errors["tags"] = self.missing_message("Теги", missing_tags)
+        missing_ingredients = [
+            pk for pk in ingredient_ids if pk not in found_ingredients
+        ]
+        if missing_ingredients:
+            errors["ingredients"] = self.missing_message(
+                "Ингредиенты", missing_ingredients
+            )
+        if errors:
+            raise ValidationError(errors)
+
+        data["tags"] = [found_tags[pk] for pk in tags]
+        for item in ingredients:
+            item["id"] = found_ingredients[item["id"]]
         return data
 
+    @staticmethod
+    def missing_message(name, ids):
+        return f"{name} не найдены: {', '.join(map(str, ids))}."
+
     def validate_cooking_time(self, value):
         """Явная валидация cooking_time — лучше, чем в create."""
         if not isinstance(value, int) or value < MIN_COOKING_TIME:
@@ -205,9 +331,7 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
             )
         return value
 
-    def _create_ingredients_and_tags(
-        self, recipe, ingredients_data, tags_data
-    ):
+    def _create_ingredients(self, recipe, ingredients_data):
         RecipeIngredients.objects.bulk_create(
             [
                 RecipeIngredients(
@@ -216,56 +340,124 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
                 for item in ingredients_data
             ]
         )
-        recipe.tags.set(tags_data)
 
+    def _update_tags(self, recipe, tags_data):
+        """Добавляет и удаляет только изменившиеся теги."""
+        current = set(recipe.tags.values_list("id", flat=True))
+        submitted = {tag.id for tag in tags_data}
+        if current - submitted:
+            recipe.tags.remove(*(current - submitted))
+        if submitted - current:
+            recipe.tags.add(*(submitted - current))
+
+    def _update_ingredients(self, recipe, ingredients_data):
+        """Применяет к составу рецепта только разницу с сохранённым.
+
+        Возвращает {ingredient_id: изменение количества} для списков
+        покупок и признак того, что изменился сам набор ингредиентов.
+        """
+        stored = {
+            link.ingredient_id: link
+            for link in recipe.ingredients_in_recipe.all()
+        }
+        submitted = {item["id"].id: item for item in ingredients_data}
+        deltas = {}
+        to_create = []
+        to_update = []
+        for ingredient_id, item in submitted.items():
+            link = stored.get(ingredient_id)
+            if link is None:
+                to_create.append(item)
+                deltas[ingredient_id] = item["amount"]
+            elif link.amount != item["amount"]:
+                deltas[ingredient_id] = item["amount"] - link.amount
+                link.amount = item["amount"]
+                to_update.append(link)
+        to_delete = [
+            link
+            for ingredient_id, link in stored.items()
+            if ingredient_id not in submitted
+        ]
+        for link in to_delete:
+            deltas[link.ingredient_id] = -link.amount
+
+        if to_delete:
+            RecipeIngredients.objects.filter(
+                pk__in=[link.pk for link in to_delete]
+            ).delete()
+        if to_update:
+            RecipeIngredients.objects.bulk_update(to_update, ["amount"])
+        if to_create:
+            self._create_ingredients(recipe, to_create)
+        return deltas, bool(to_create or to_delete)
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop("ingredients")
         tags_data = validated_data.pop("tags")
         author = self.context["request"].user
         recipe = Recipe.objects.create(author=author, **validated_data)
-        self._create_ingredients_and_tags(recipe, ingredients_data, tags_data)
+        self._create_ingredients(recipe, ingredients_data)
+        recipe.tags.set(tags_data)
+        update_search_vector([recipe.pk])
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop("ingredients", None)
         tags_data = validated_data.pop("tags", None)
+        text_changed = any(
+            field in validated_data
+            and validated_data[field] != getattr(instance, field)
+            for field in ("name", "text")
+        )
 
-        # Обновляем базовые поля
         instance = super().update(instance, validated_data)
 
-        # Обновляем теги и ингредиенты — даже если None
         if tags_data is not None:
-            instance.tags.set(tags_data)
+            self._update_tags(instance, tags_data)
 
+        ingredients_changed = False
         if ingredients_data is not None:
-            instance.ingredients_in_recipe.all().delete()
-            self._create_ingredients_and_tags(
-                instance, ingredients_data, tags_data
+            deltas, ingredients_changed = self._update_ingredients(
+                instance, ingredients_data
             )
+            if deltas:
+                shopping_list.apply_deltas(instance.pk, deltas)
 
+        # Вектор зависит от названия, описания и набора ингредиентов,
+        # но не от их количества
+        if text_changed or ingredients_changed:
+            update_search_vector([instance.pk])
         return instance
 
     def to_representation(self, instance):
+        prefetch_related_objects(
+            [instance], "ingredients_in_recipe__ingredient", "tags"
+        )
         return RecipeSerializer(instance, context=self.context).data
 
 
 class UserRecipeRelationSerializer(serializers.ModelSerializer):
-    """Базовый сериализатор для избранного и списка покупок."""
+    """Базовый сериализатор для избранного и списка покупок.
+
+    Связь создаётся во вьюсете одним INSERT ... ON CONFLICT,
+    сериализатор только отображает её.
+    """
 
     class Meta:
         model = None  # будет переопределено в наследниках
         fields = ("user", "recipe")
 
-    def validate(self, data):
-        model = self.Meta.model
-        user = data["user"]
-        recipe = data["recipe"]
 
-        if model.objects.filter(user=user, recipe=recipe).exists():
-            raise ValidationError(
-                f"Этот рецепт уже в {model._meta.verbose_name}."
-            )
-        return data
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список id рецептов для массового добавления и удаления."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_RECIPES,
+    )
 
 
 class FavoriteSerializer(UserRecipeRelationSerializer):
@@ -286,7 +478,9 @@ class SubscriptionSerializer(UserSerializer):
     """Сериализатор для отображения подписок."""
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(read_only=True)
+    recipes_count = serializers.IntegerField(
+        source="profile.recipes_count", read_only=True
+    )
 
     class Meta:
         model = User
@@ -300,37 +494,18 @@ class SubscriptionSerializer(UserSerializer):
             "recipes",
             "recipes_count",
             "avatar",
+            "avatar_variants",
         )
 
     def get_recipes(self, obj):
-        request = self.context["request"]
+        # Лимит проверен во вьюсете; при предвыборке срез уже сделан в БД
         recipes = obj.recipes.all()
-
-        # Обработка recipes_limit
-        recipes_limit = request.query_params.get("recipes_limit")
-        if recipes_limit:
-            try:
-                limit = int(recipes_limit)
-                if limit < 0:
-                    raise ValidationError(
-                        "recipes_limit не может быть отрицательным."
-                    )
-                recipes = recipes[:limit]
-            except (ValueError, TypeError):
-                raise ValidationError(
-                    "recipes_limit должен быть целым числом."
-                )
-
-        if recipes:
-            return ShortRecipeSerializer(
-                recipes, many=True, context={"request": request}
-            ).data
-        return []
-
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        data["recipes_count"] = instance.recipes.count()  # всегда актуально
-        return data
+        limit = self.context.get("recipes_limit")
+        if limit is not None:
+            recipes = recipes[:limit]
+        return ShortRecipeSerializer(
+            recipes, many=True, context={"request": self.context["request"]}
+        ).data
 
 
 class SubscribeSerializer(serializers.ModelSerializer):
@@ -348,6 +523,7 @@ class SubscribeSerializer(serializers.ModelSerializer):
             raise ValidationError("Вы уже подписаны на этого пользователя.")
         return value
 
+    @transaction.atomic
     def create(self, validated_data):
         return Subscription.objects.create(
             user=self.context["request"].user, **validated_data
@@ -355,7 +531,8 @@ class SubscribeSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         return SubscriptionSerializer(
-            instance.author, context={"request": self.context["request"]}
+            instance.author,
+            context={**self.context, "subscribed_ids": {instance.author_id}},
         ).data
 
 
@@ -363,7 +540,9 @@ class AvatarSerializer(serializers.ModelSerializer):
     """Сериализатор для аватара пользователя."""
 
     avatar = Base64ImageField(
-        required=True, help_text="Изображение в формате base64"
+        required=True,
+        help_text="Изображение в формате base64",
+        allowed_formats=("png", "jpg"),
     )
 
     class Meta:
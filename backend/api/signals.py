@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe, RecipeIngredients, Tag
+from recipes.images import image_variants_ready
+from recipes.signals import ingredients_bulk_loaded
+from users.models import Profile
+from .authentication import token_cache
+from .cache import bump_generation
+from .catalogs import INGREDIENT_VERSION_KEY, TAG_VERSION_KEY, bump_version
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(ingredients_bulk_loaded)
+def invalidate_ingredient_index(sender, **kwargs):
+    """Сбрасывает индекс ингредиентов при изменении справочника."""
+    bump_version(INGREDIENT_VERSION_KEY)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_catalog(sender, **kwargs):
+    """Сбрасывает справочник тегов при изменении тега."""
+    bump_version(TAG_VERSION_KEY)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredients)
+@receiver(post_delete, sender=RecipeIngredients)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(image_variants_ready)
+def invalidate_response_cache(sender, **kwargs):
+    """Сбрасывает кеш ответов после фиксации транзакции."""
+    transaction.on_commit(bump_generation)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_response_cache_for_user(sender, **kwargs):
+    """Автор виден в карточке рецепта; вход в систему кеш не сбрасывает."""
+    if kwargs.get("update_fields") == frozenset(("last_login",)):
+        return
+    transaction.on_commit(bump_generation)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """Выход из системы и удаление пользователя удаляют его токен."""
+    # После delete() у токена pk (он же key) уже None
+    key = instance.key
+    transaction.on_commit(lambda: token_cache.invalidate([key]))
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Смена пароля, деактивация и любые правки пользователя."""
+    if kwargs.get("update_fields") == frozenset(("last_login",)):
+        return
+    transaction.on_commit(lambda: token_cache.invalidate_user(instance.pk))
@@ -0,0 +1,83 @@
+from tempfile import TemporaryDirectory
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import TokenCache, token_cache
+from .utils import create_user
+
+SHARED_CACHE = "django.core.cache.backends.filebased.FileBasedCache"
+
+
+class TokenCacheTests(TestCase):
+    """Кеш токенов с общим (файловым) кешем вместо Redis."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        location = cls.enterClassContext(TemporaryDirectory())
+        cls.enterClassContext(
+            override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": SHARED_CACHE,
+                        "LOCATION": location,
+                    }
+                }
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = create_user("reader")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_local_and_shared_hits(self):
+        hits = token_cache.stats()["hits"]
+        self.assertEqual(self.client.get("/api/users/me/").status_code, 200)
+        self.assertEqual(self.client.get("/api/users/me/").status_code, 200)
+        self.assertEqual(token_cache.stats()["hits"], hits + 1)
+        # Другой процесс: локальный уровень пуст, запись есть в общем кеше
+        worker = TokenCache()
+        self.assertIsNotNone(worker.get(self.token.key)[0])
+        self.assertEqual(worker.stats()["shared_hits"], 1)
+
+    def test_invalidation_between_miss_and_set(self):
+        """Промах, начавшийся до выхода, не возвращает токен в кеш."""
+        worker = TokenCache()
+        snapshot, generation = worker.get(self.token.key)
+        self.assertIsNone(snapshot)
+        token_cache.invalidate([self.token.key])
+        worker.set(self.token.key, generation, ("user", "token"))
+        self.assertIsNone(TokenCache().get(self.token.key)[0])
+
+    def test_logout_revokes_token(self):
+        self.assertEqual(self.client.get("/api/users/me/").status_code, 200)
+        key = self.token.key
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        self.assertIsNone(TokenCache().get(key)[0])
+        self.assertEqual(self.client.get("/api/users/me/").status_code, 401)
+
+    def test_unsafe_requests_do_not_fill_cache(self):
+        self.client.patch("/api/users/me/avatar/", {}, format="json")
+        self.assertIsNone(TokenCache().get(self.token.key)[0])
+
+
+class StatsViewTests(TestCase):
+    def test_admin_only(self):
+        client = APIClient()
+        client.force_authenticate(create_user("reader"))
+        self.assertEqual(client.get("/api/stats/").status_code, 403)
+        admin = create_user("admin")
+        admin.is_staff = True
+        client.force_authenticate(admin)
+        response = client.get("/api/stats/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("hit_rate", response.data["token_cache"])
+        self.assertIn("default", response.data["db_pools"])
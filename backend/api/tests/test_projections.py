@@ -0,0 +1,92 @@
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.pagination import RecipeCursorPagination
+from api.serializers import RecipeSerializer
+from api.views import RecipeViewSet
+from recipes.feed import feed_recipes
+from .utils import LOCAL_CACHES, create_catalog
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class RecipeCardProjectionTests(TestCase):
+    """RecipeCardProjection отдаёт те же байты, что и RecipeSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader, cls.recipes = create_catalog()
+
+    def serializer_json(self, path, user=None, pk=None, action="list"):
+        request = Request(APIRequestFactory().get(path))
+        if user is not None:
+            request.user = user
+        view = RecipeViewSet(
+            request=request, action=action, format_kwarg=None, kwargs={}
+        )
+        # Тот же queryset с флагами, но модели вместо строк values()
+        view.projection_actions = ()
+        self.assertIs(view.get_serializer_class(), RecipeSerializer)
+        queryset = view.get_queryset()
+        if action == "feed":
+            queryset = feed_recipes(user, queryset).order_by(
+                *RecipeCursorPagination.ordering
+            )
+        if pk is None:
+            instance, many = queryset, True
+        else:
+            instance, many = queryset.get(pk=pk), False
+        serializer = view.get_serializer(instance, many=many)
+        return JSONRenderer().render(serializer.data)
+
+    def projection_json(self, path, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        response = client.get(path)
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        return JSONRenderer().render(data.get("results", data))
+
+    def assert_parity(self, user=None):
+        path = "/api/recipes/?limit=10"
+        self.assertEqual(
+            self.projection_json(path, user), self.serializer_json(path, user)
+        )
+        for recipe in self.recipes:
+            path = f"/api/recipes/{recipe.pk}/"
+            self.assertEqual(
+                self.projection_json(path, user),
+                self.serializer_json(path, user, pk=recipe.pk),
+            )
+
+    def test_anonymous(self):
+        self.assert_parity()
+
+    def test_authenticated(self):
+        self.assert_parity(self.reader)
+
+    def test_feed(self):
+        path = "/api/recipes/feed/"
+        feed = self.projection_json(path, self.reader)
+        self.assertIn(f'"id":{self.recipes[0].pk}'.encode(), feed)
+        self.assertEqual(
+            feed, self.serializer_json(path, self.reader, action="feed")
+        )
+
+    def test_flags_are_set(self):
+        """Данные покрывают все флаги, иначе сравнение ничего не доказывает."""
+        client = APIClient()
+        client.force_authenticate(self.reader)
+        cards = {
+            card["id"]: card
+            for card in client.get("/api/recipes/").data["results"]
+        }
+        first, second, _ = self.recipes
+        self.assertTrue(cards[first.pk]["is_favorited"])
+        self.assertTrue(cards[first.pk]["author"]["is_subscribed"])
+        self.assertTrue(cards[first.pk]["author"]["avatar_variants"])
+        self.assertTrue(cards[first.pk]["image_variants"])
+        self.assertTrue(cards[second.pk]["is_in_shopping_cart"])
+        self.assertFalse(cards[second.pk]["author"]["is_subscribed"])
@@ -0,0 +1,83 @@
+import base64
+import io
+
+from django.test import TestCase
+from PIL import Image
+
+from api.serializers import RecipeCreateUpdateSerializer
+from recipes.models import Ingredient, Tag
+
+
+def image_data():
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), "red").save(buffer, "PNG")
+    return (
+        "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+    )
+
+
+class RecipeWriteValidationTests(TestCase):
+    """Id тегов и ингредиентов проверяются одним запросом на каждый вид."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f"Тег {index}", slug=f"tag{index}") for index in range(3)
+        )
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ингредиент {index}", measurement_unit="г")
+            for index in range(30)
+        )
+
+    def payload(self, tag_ids, ingredient_ids):
+        return {
+            "name": "Рецепт",
+            "text": "Описание",
+            "cooking_time": 10,
+            "image": image_data(),
+            "tags": tag_ids,
+            "ingredients": [{"id": pk, "amount": 10} for pk in ingredient_ids],
+        }
+
+    def validate(self, tag_ids, ingredient_ids):
+        serializer = RecipeCreateUpdateSerializer(
+            data=self.payload(tag_ids, ingredient_ids)
+        )
+        serializer.is_valid()
+        return serializer
+
+    def test_queries_do_not_grow_with_ingredients(self):
+        for tags, ingredients in (
+            (self.tags[:1], self.ingredients[:1]),
+            (self.tags, self.ingredients),
+        ):
+            with self.subTest(ingredients=len(ingredients)):
+                with self.assertNumQueries(2):
+                    serializer = self.validate(
+                        [tag.pk for tag in tags],
+                        [ingredient.pk for ingredient in ingredients],
+                    )
+                self.assertEqual(serializer.errors, {})
+                self.assertEqual(serializer.validated_data["tags"], list(tags))
+                self.assertEqual(
+                    [
+                        item["id"]
+                        for item in serializer.validated_data["ingredients"]
+                    ],
+                    list(ingredients),
+                )
+
+    def test_reports_all_missing_ids(self):
+        missing_tag = self.tags[-1].pk + 100
+        missing_ingredients = [
+            self.ingredients[-1].pk + 100,
+            self.ingredients[-1].pk + 200,
+        ]
+        with self.assertNumQueries(2):
+            serializer = self.validate(
+                [self.tags[0].pk, missing_tag],
+                [self.ingredients[0].pk, *missing_ingredients],
+            )
+        self.assertIn(str(missing_tag), str(serializer.errors["tags"]))
+        for pk in missing_ingredients:
+            self.assertIn(str(pk), str(serializer.errors["ingredients"]))
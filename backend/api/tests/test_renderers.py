@@ -0,0 +1,36 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Вывод совпадает с JSONRenderer DRF байт в байт."""
+
+    def assertSameOutput(self, data):
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_matches_drf(self):
+        self.assertSameOutput(
+            {
+                "name": "Пирог с вишней",
+                "created": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+                "amount": Decimal("1.50"),
+                "image": None,
+                "scores": [0.5, 1.0],
+            }
+        )
+
+    def test_wide_integers(self):
+        self.assertSameOutput({"id": 2**70, "ids": [-(2**64)]})
+
+    def test_non_finite_floats_are_rejected(self):
+        for value in (float("nan"), float("inf"), -float("inf")):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render({"results": [{"score": value}]})
@@ -0,0 +1,174 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from foodgram.db import routers
+from .utils import LOCAL_CACHES, RECIPE_IMAGE, create_recipe, create_user
+
+REPLICA = "replica"
+
+
+@override_settings(
+    DATABASE_REPLICAS=[REPLICA],
+    DB_REPLICA_PIN_SECONDS=60,
+)
+class PrimaryReplicaRouterTests(TransactionTestCase):
+    """Чтения на реплику, записи и закреплённые пользователи — на основную.
+
+    Реплика — второй алиас с TEST MIRROR на основную БД: это отдельное
+    соединение с той же базой, поэтому по запросам в каждом соединении
+    видно, куда ушло чтение. Данные в TransactionTestCase закоммичены и
+    видны через оба соединения. Алиас добавляется на время тестов, как
+    его настроил бы раннер для зеркала: реплики в DATABASES по умолчанию
+    нет.
+
+    Метки закрепления видны между воркерами только в общем кеше, поэтому
+    кеш по умолчанию — файловый; кеш ответов, чтобы чтения анонимных
+    запросов не уходили в основную БД при промахе, — локальный и потому
+    отключён.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Уменьшенные копии фото строятся после коммита и читают файл
+        media = cls.enterClassContext(TemporaryDirectory())
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media))
+        image = Path(media, RECIPE_IMAGE)
+        image.parent.mkdir(parents=True)
+        Image.new("RGB", (40, 30), "red").save(image)
+        cls.enterClassContext(
+            override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": (
+                            "django.core.cache.backends.filebased."
+                            "FileBasedCache"
+                        ),
+                        "LOCATION": str(Path(media, "cache")),
+                    },
+                    "responses": LOCAL_CACHES["default"],
+                },
+                RESPONSE_CACHE_ALIAS="responses",
+            )
+        )
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict
+        connections.settings[REPLICA] = {
+            **primary,
+            "TEST": {**primary["TEST"], "MIRROR": DEFAULT_DB_ALIAS},
+        }
+        connections[REPLICA].creation.set_as_test_mirror(primary)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        super().tearDownClass()
+
+    def setUp(self):
+        routers._down_until.clear()
+        cache.clear()
+        self.author = create_user("author")
+        self.reader = create_user("reader")
+        self.recipe = create_recipe(self.author)
+
+    def client_for(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+    def recipe_queries(self, client, replica_down=False):
+        """Запросы к рецептам в основной БД и в реплике за GET списка."""
+        replica_connection = connections[REPLICA]
+        with CaptureQueriesContext(
+            connections[DEFAULT_DB_ALIAS]
+        ) as primary, CaptureQueriesContext(replica_connection) as replica:
+            if replica_down:
+                with mock.patch.object(
+                    replica_connection,
+                    "ensure_connection",
+                    side_effect=OperationalError,
+                ):
+                    response = client.get("/api/recipes/")
+            else:
+                response = client.get("/api/recipes/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [card["id"] for card in response.data["results"]],
+            [self.recipe.pk],
+        )
+        return tuple(
+            [query for query in queries if "recipes_recipe" in query["sql"]]
+            for queries in (primary, replica)
+        )
+
+    def test_anonymous_reads_go_to_replica(self):
+        primary, replica = self.recipe_queries(self.client_for())
+        self.assertEqual(primary, [])
+        self.assertNotEqual(replica, [])
+
+    def test_unsafe_request_uses_primary(self):
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client_for(self.reader).post(
+                f"/api/recipes/{self.recipe.pk}/favorite/"
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(replica), 0)
+
+    def test_user_is_pinned_after_committed_write(self):
+        client = self.client_for(self.reader)
+        client.post(f"/api/recipes/{self.recipe.pk}/favorite/")
+        primary, replica = self.recipe_queries(client)
+        self.assertNotEqual(primary, [])
+        self.assertEqual(replica, [])
+        # Закрепляется только тот, кто писал
+        primary, replica = self.recipe_queries(self.client_for(self.author))
+        self.assertEqual(primary, [])
+        self.assertNotEqual(replica, [])
+
+    def test_rejected_write_does_not_pin(self):
+        client = self.client_for(self.reader)
+        response = client.post("/api/recipes/0/favorite/")
+        self.assertEqual(response.status_code, 400)
+        primary, replica = self.recipe_queries(client)
+        self.assertEqual(primary, [])
+        self.assertNotEqual(replica, [])
+
+    def test_write_in_safe_request_does_not_pin(self):
+        """GET /users/me/avatar/ вызывает get_or_create профиля."""
+        client = self.client_for(self.reader)
+        self.assertEqual(client.get("/api/users/me/avatar/").status_code, 200)
+        primary, replica = self.recipe_queries(client)
+        self.assertEqual(primary, [])
+        self.assertNotEqual(replica, [])
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        primary, replica = self.recipe_queries(
+            self.client_for(), replica_down=True
+        )
+        self.assertNotEqual(primary, [])
+        self.assertEqual(replica, [])
+        self.assertIn(REPLICA, routers._down_until)
+        # Пока реплика исключена, к ней не подключаемся
+        primary, replica = self.recipe_queries(self.client_for())
+        self.assertNotEqual(primary, [])
+        self.assertEqual(replica, [])
+
+    @override_settings(CACHES=LOCAL_CACHES, RESPONSE_CACHE_ALIAS="default")
+    def test_process_local_cache_keeps_authenticated_on_primary(self):
+        """Метку в кеше процесса другие воркеры не увидят."""
+        primary, replica = self.recipe_queries(self.client_for(self.reader))
+        self.assertNotEqual(primary, [])
+        self.assertEqual(replica, [])
+        primary, replica = self.recipe_queries(self.client_for())
+        self.assertEqual(primary, [])
+        self.assertNotEqual(replica, [])
@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from recipes.models import Ingredient
+from recipes.search import update_search_vector
+from .utils import LOCAL_CACHES, create_recipe, create_user
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class RecipeSearchTests(TestCase):
+    """?search= ищет по названию, описанию и ингредиентам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user("author")
+        cherry = Ingredient.objects.create(name="вишня", measurement_unit="г")
+        cls.pie = create_recipe(
+            author,
+            ingredients=[(cherry, 200)],
+            name="Пирог",
+            text="Сладкая выпечка",
+        )
+        cls.salad = create_recipe(author, name="Салат", text="Овощи")
+        cls.soup = create_recipe(
+            author, name="Борщ", text="Подавать с салатом"
+        )
+        update_search_vector([cls.pie.pk, cls.salad.pk, cls.soup.pk])
+
+    def search(self, value):
+        response = self.client.get("/api/recipes/", {"search": value})
+        self.assertEqual(response.status_code, 200)
+        return [card["id"] for card in response.data["results"]]
+
+    def test_matches_name_text_and_ingredients(self):
+        self.assertEqual(self.search("пирог"), [self.pie.pk])
+        self.assertEqual(self.search("выпечку"), [self.pie.pk])
+        self.assertEqual(self.search("вишня"), [self.pie.pk])
+
+    def test_name_match_ranks_first(self):
+        self.assertEqual(self.search("салат"), [self.salad.pk, self.soup.pk])
+
+    def test_blank_search_is_ignored(self):
+        self.assertEqual(len(self.search("  ")), 3)
+
+    def test_only_newest_matches_are_ranked(self):
+        with mock.patch("recipes.filters.SEARCH_MAX_RESULTS", 1):
+            self.assertEqual(self.search("салат"), [self.soup.pk])
+
+    def test_queries(self):
+        """Граница, совпадения, COUNT(*), страница, теги, ингредиенты."""
+        with self.assertNumQueries(6):
+            self.search("салат")
+
+    def test_typo_in_name(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT similarity('борщ', 'борш')")
+            if not cursor.fetchone()[0]:
+                self.skipTest("pg_trgm без триграммного сходства")
+        self.assertEqual(self.search("Борш"), [self.soup.pk])
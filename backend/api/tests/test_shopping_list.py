@@ -0,0 +1,24 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.shopping_list import shopping_list_csv, shopping_list_txt
+
+ITEMS = [
+    {"name": f"ингредиент {index}", "amount": index, "measurement_unit": "г"}
+    for index in range(100)
+]
+
+
+class ChunkedExportTests(SimpleTestCase):
+    """Склейка в куски не меняет текст выгрузки."""
+
+    @mock.patch("api.shopping_list.STREAM_CHUNK_SIZE", 256)
+    def test_same_output(self):
+        for export in (shopping_list_txt, shopping_list_csv):
+            with self.subTest(export=export.__name__):
+                chunks = list(export(iter(ITEMS)))
+                lines = list(export.__wrapped__(iter(ITEMS)))
+                self.assertEqual("".join(chunks), "".join(lines))
+                self.assertLess(len(chunks), len(lines) // 10)
+                self.assertTrue(all(len(chunk) < 512 for chunk in chunks))
@@ -0,0 +1,159 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from users.models import Subscription
+from .utils import LOCAL_CACHES, create_recipe, create_user
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class SubscribedFlagQueriesTests(TestCase):
+    """is_subscribed для страницы считается одним запросом."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user("reader")
+        cls.authors = [create_user(f"author{index}") for index in range(6)]
+        for author in cls.authors:
+            create_recipe(author)
+        Subscription.objects.bulk_create(
+            Subscription(user=cls.reader, author=author)
+            for author in cls.authors[::2]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def get(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def query_count(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            self.get(path)
+        return len(queries)
+
+    def test_recipe_list_queries_do_not_grow_with_page(self):
+        self.assertEqual(
+            self.query_count("/api/recipes/?limit=2"),
+            self.query_count("/api/recipes/?limit=6"),
+        )
+        # COUNT, страница, подписки, теги, ингредиенты
+        with self.assertNumQueries(5):
+            self.get("/api/recipes/?limit=6")
+
+    def test_subscriptions_queries_do_not_grow_with_page(self):
+        self.assertEqual(
+            self.query_count("/api/users/subscriptions/?limit=1"),
+            self.query_count("/api/users/subscriptions/?limit=3"),
+        )
+        # COUNT, страница авторов, их рецепты, подписки
+        with self.assertNumQueries(4):
+            self.get("/api/users/subscriptions/?limit=3")
+
+    def test_recipe_list_flags(self):
+        subscribed = {author.pk for author in self.authors[::2]}
+        for card in self.get("/api/recipes/?limit=6")["results"]:
+            self.assertEqual(
+                card["author"]["is_subscribed"],
+                card["author"]["id"] in subscribed,
+            )
+
+    def test_subscriptions_flags(self):
+        results = self.get("/api/users/subscriptions/")["results"]
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(author["is_subscribed"] for author in results))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class SubscriptionRecipesLimitTests(TestCase):
+    """recipes_limit оставляет новейшие рецепты каждого автора."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user("reader")
+        cls.newest = {}
+        now = timezone.now()
+        for index in range(2):
+            author = create_user(f"author{index}")
+            recipes = [create_recipe(author) for _ in range(4)]
+            # В транзакции теста now() не меняется: даты задаются явно
+            for age, recipe in enumerate(reversed(recipes)):
+                Recipe.objects.filter(pk=recipe.pk).update(
+                    pub_date=now - timedelta(days=age)
+                )
+            cls.newest[author.pk] = [recipe.pk for recipe in recipes[::-1]]
+            Subscription.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def recipes(self, limit):
+        response = self.client.get(
+            f"/api/users/subscriptions/?recipes_limit={limit}"
+        )
+        self.assertEqual(response.status_code, 200)
+        return {
+            author["id"]: [recipe["id"] for recipe in author["recipes"]]
+            for author in response.data["results"]
+        }
+
+    def test_newest_recipes(self):
+        self.assertEqual(
+            self.recipes(2),
+            {pk: recipes[:2] for pk, recipes in self.newest.items()},
+        )
+
+    def test_limit_above_count(self):
+        self.assertEqual(self.recipes(10), self.newest)
+
+    def test_zero_limit(self):
+        self.assertEqual(self.recipes(0), {pk: [] for pk in self.newest})
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class SubscribeQueriesTests(TestCase):
+    """Подписка и /users/me/ не запрашивают флаг по каждому объекту."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user("reader")
+        cls.few = create_user("few")
+        cls.many = create_user("many")
+        create_recipe(cls.few)
+        for _ in range(5):
+            create_recipe(cls.many)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def subscribe(self, author):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f"/api/users/{author.pk}/subscribe/")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.data["is_subscribed"])
+        return len(queries)
+
+    def test_subscribe_queries_do_not_grow_with_recipes(self):
+        self.assertEqual(self.subscribe(self.few), self.subscribe(self.many))
+
+    def test_subscribe_queries(self):
+        with self.assertNumQueries(11):
+            self.subscribe(self.many)
+
+    def test_me_queries(self):
+        # Пользователь и профиль уже загружены аутентификацией, а флаг
+        # подписки на себя известен без запроса
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/users/me/")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["is_subscribed"])
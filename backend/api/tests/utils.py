@@ -0,0 +1,98 @@
+"""Общие данные для тестов API."""
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredients,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Profile, Subscription, User
+
+# Кеш процесса: кеш ответов и кеш токенов с ним отключены, и тесты не
+# зависят от CACHE_BACKEND окружения.
+LOCAL_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+RECIPE_IMAGE = "recipes/images/recipe.png"
+
+
+def image_variants(name):
+    return {
+        "card": {
+            "width": 400,
+            "height": 300,
+            "webp": f"{name}-card.webp",
+            "jpeg": f"{name}-card.jpg",
+        }
+    }
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password="Pw12345!x",
+        first_name="Имя",
+        last_name="Фамилия",
+    )
+
+
+def create_recipe(author, tags=(), ingredients=(), **kwargs):
+    """Рецепт с тегами и ингредиентами [(ingredient, amount), ...]."""
+    recipe = Recipe.objects.create(
+        author=author,
+        name=kwargs.pop("name", f"Рецепт {author.username}"),
+        text=kwargs.pop("text", "Описание"),
+        cooking_time=10,
+        image=RECIPE_IMAGE,
+        **kwargs,
+    )
+    recipe.tags.set(tags)
+    RecipeIngredients.objects.bulk_create(
+        RecipeIngredients(recipe=recipe, ingredient=ingredient, amount=amount)
+        for ingredient, amount in ingredients
+    )
+    return recipe
+
+
+def create_catalog():
+    """Набор данных для карточек рецептов: все поля и флаги заполнены.
+
+    Возвращает (reader, recipes): reader подписан на первого автора, один
+    рецепт у него в избранном, другой — в списке покупок.
+    """
+    tags = [
+        Tag.objects.create(name="Завтрак", slug="breakfast"),
+        Tag.objects.create(name="Ужин", slug="dinner"),
+    ]
+    ingredients = [
+        Ingredient.objects.create(name="Яйцо", measurement_unit="шт"),
+        Ingredient.objects.create(name="Мука", measurement_unit="г"),
+        Ingredient.objects.create(name="Молоко", measurement_unit="мл"),
+    ]
+    reader = create_user("reader")
+    authors = [create_user("author0"), create_user("author1")]
+    Profile.objects.filter(user=authors[0]).update(
+        avatar="users/avatars/author0.png",
+        avatar_variants=image_variants("users/avatars/author0"),
+    )
+    recipes = [
+        create_recipe(
+            authors[0],
+            tags=tags,
+            ingredients=[(ingredients[1], 200), (ingredients[0], 2)],
+            image_variants=image_variants("recipes/images/pancakes"),
+        ),
+        create_recipe(
+            authors[1],
+            tags=tags[1:],
+            ingredients=[(ingredients[2], 500)],
+        ),
+        create_recipe(authors[1], name="Без тегов и ингредиентов"),
+    ]
+    Subscription.objects.create(user=reader, author=authors[0])
+    Favorite.objects.create(user=reader, recipe=recipes[0])
+    ShoppingCart.objects.create(user=reader, recipe=recipes[1])
+    return reader, recipes
@@ -4,6 +4,7 @@ from rest_framework.routers import DefaultRouter
 from api.views import (
     IngredientViewSet,
     RecipeViewSet,
+    StatsView,
     TagViewSet,
     UserViewSet,
 )
@@ -16,6 +17,7 @@ router.register(r"users", UserViewSet, basename="users")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("stats/", StatsView.as_view(), name="stats"),
     path("api/auth/", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
 ]
@@ -1,19 +1,48 @@
 """Вьюсеты API: рецепты, теги, ингредиенты, пользователи."""
 
+import os
+
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet as DjoserUserViewSet
-from django.db.models import Count, F, Prefetch, Sum, Q
-from django.http import HttpResponse
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import (
+    Count,
+    F,
+    Func,
+    IntegerField,
+    OuterRef,
+    Prefetch,
+    Q,
+)
+from django.http import HttpResponse, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import exceptions, filters, status, viewsets
+from rest_framework import exceptions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.parsers import JSONParser, FormParser
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.parsers import FormParser
+from rest_framework.permissions import (
+    AllowAny,
+    IsAdminUser,
+    IsAuthenticated,
+)
 from rest_framework.response import Response
-
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from .authentication import token_cache
+from .cache import AnonymousResponseCacheMixin, get_cache_stats
+from .catalogs import catalog_response, ingredient_index, tag_catalog
+from .parsers import FastJSONParser
+from .projections import RecipeCardProjection, recipe_card_values
+from .renderers import CSVRenderer, PDFRenderer, PlainTextRenderer
+from .shopping_list import SHOPPING_LIST_EXPORTERS
+from .mixins import SubscribedAuthorsMixin
 from .serializers import (
     IngredientSerializer,
     RecipeCreateUpdateSerializer,
+    PantryQuerySerializer,
+    PantryRecipeSerializer,
+    RecipeIdsSerializer,
     RecipeSerializer,
     TagSerializer,
     SubscribeSerializer,
@@ -21,27 +50,49 @@ from .serializers import (
     AvatarSerializer,
     FavoriteSerializer,
     ShoppingCartSerializer,
+    ShoppingListItemSerializer,
+    ShortRecipeSerializer,
 )
+from recipes.feed import feed_recipes
 from recipes.filters import RecipeFilter
-from .pagination import PageNumberPagination
+from .pagination import (
+    PageNumberPagination,
+    RecipeCursorPagination,
+    RecipePagination,
+)
 from recipes.models import (
     Favorite,
     Ingredient,
     Recipe,
-    RecipeIngredients,
     ShoppingCart,
     Tag,
 )
+from recipes.pantry import pantry_index
 from recipes.permissions import IsAuthorOrAdminPermission
+from recipes.relations import add_relations, remove_relations
+from recipes.similar import similar_recipes
+from foodgram.db.base import get_pool_stats
 from users.models import User, Subscription, Profile
 
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
-    """Получение тегов."""
+    """Получение тегов из справочника в памяти процесса."""
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
+    # Справочник публичный: без проверки токена запрос не ходит в БД
+    authentication_classes = ()
+
+    def list(self, request, *args, **kwargs):
+        return catalog_response(request, tag_catalog.all())
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.kwargs[self.lookup_field]
+        body = tag_catalog.get(int(pk)) if pk.isdigit() else None
+        if body is None:
+            raise exceptions.NotFound()
+        return catalog_response(request, body)
 
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
@@ -49,39 +100,59 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ("^name",)
     permission_classes = (AllowAny,)
+    authentication_classes = ()
 
+    def list(self, request, *args, **kwargs):
+        """Поиск по началу названия через индекс в памяти процесса."""
+        name = request.query_params.get(api_settings.SEARCH_PARAM, "")
+        return catalog_response(request, ingredient_index.search(name))
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+class RecipeViewSet(
+    AnonymousResponseCacheMixin, SubscribedAuthorsMixin, viewsets.ModelViewSet
+):
     """Вьюсет для управления рецептами: создание, редактирование, фильтр."""
 
     queryset = Recipe.objects.all()
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
-    pagination_class = PageNumberPagination
+    pagination_class = RecipePagination
+    feed_pagination_class = RecipeCursorPagination
+    # Действия, которые отдают карточки через RecipeCardProjection
+    projection_actions = ("list", "retrieve", "feed")
 
     def get_serializer_class(self):
         if self.action in ("create", "partial_update", "update"):
             return RecipeCreateUpdateSerializer
+        if self.action in self.projection_actions:
+            return RecipeCardProjection
         return RecipeSerializer
 
     def get_permissions(self):
-        if self.action in ("retrieve", "list", "download_shopping_cart"):
+        if self.action in ("retrieve", "list", "similar", "pantry"):
             return (AllowAny(),)
-        if self.action in ("create", "favorite", "shopping_cart"):
+        if self.action in (
+            "create",
+            "favorite",
+            "shopping_cart",
+            "bulk_favorite",
+            "bulk_shopping_cart",
+            "feed",
+            "shopping_list",
+            "download_shopping_cart",
+        ):
             return (IsAuthenticated(),)
         return (IsAuthorOrAdminPermission(),)
 
     def get_queryset(self):
         queryset = (
-            Recipe.objects.select_related("author")
+            Recipe.objects.select_related("author", "author__profile")
             .prefetch_related(
                 "ingredients_in_recipe__ingredient",
                 "tags",
             )
-            .order_by("-pub_date")
+            .order_by("-pub_date", "-id")
         )
 
         user = self.request.user
@@ -97,25 +168,69 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 ),
             )
 
+        if self.action in self.projection_actions:
+            queryset = recipe_card_values(queryset)
         return queryset
 
+    def get_author_ids(self, objects):
+        # Проекция отдаёт строки values(), остальные действия — модели
+        return [
+            (
+                recipe["author_id"]
+                if isinstance(recipe, dict)
+                else recipe.author_id
+            )
+            for recipe in objects
+        ]
+
     def _create_relation(self, request, recipe_id, model, serializer_class):
-        """Создаёт связь (избранное / корзина) по ID рецепта."""
-        data = {"user": request.user.id, "recipe": recipe_id}
-        serializer = serializer_class(data=data, context={"request": request})
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        """Создаёт связь (избранное / корзина) одним INSERT по ID рецепта."""
+        recipe_id = self._parse_recipe_id(recipe_id)
+        if not add_relations(model, request.user.id, [recipe_id]):
+            # Ничего не вставлено: рецепта нет или связь уже есть
+            if not Recipe.objects.filter(pk=recipe_id).exists():
+                raise exceptions.ValidationError(
+                    {"recipe": ["Рецепт не найден."]}
+                )
+            raise exceptions.ValidationError(
+                {
+                    api_settings.NON_FIELD_ERRORS_KEY: [
+                        f"Этот рецепт уже в {model._meta.verbose_name}."
+                    ]
+                }
+            )
+        serializer = serializer_class(
+            model(user_id=request.user.id, recipe_id=recipe_id)
+        )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def _delete_relation(self, user, model, recipe_id):
         """Удаляет связь по ID. Возвращает 204 или 400, если связи не было."""
-        deleted, _ = model.objects.filter(
-            user=user, recipe_id=recipe_id
-        ).delete()
-        if not deleted:
+        recipe_id = self._parse_recipe_id(recipe_id)
+        if not remove_relations(model, user.id, [recipe_id]):
             raise exceptions.ValidationError("Рецепт не найден в списке.")
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def _bulk_relations(self, request, model):
+        """Добавляет (POST) или удаляет (DELETE) сразу несколько рецептов."""
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data["recipes"]
+        if request.method == "POST":
+            added = add_relations(model, request.user.id, recipe_ids)
+            return Response({"added": added}, status=status.HTTP_201_CREATED)
+        removed = remove_relations(model, request.user.id, recipe_ids)
+        return Response({"removed": removed})
+
+    @staticmethod
+    def _parse_recipe_id(recipe_id):
+        try:
+            return int(recipe_id)
+        except (TypeError, ValueError):
+            raise exceptions.ValidationError(
+                {"recipe": ["ID рецепта должен быть целым числом."]}
+            )
+
     @action(
         detail=True, methods=["post"], permission_classes=(IsAuthenticated,)
     )
@@ -128,6 +243,16 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Удалить рецепт из избранного."""
         return self._delete_relation(request.user, Favorite, pk)
 
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        url_path="favorite",
+        permission_classes=(IsAuthenticated,),
+    )
+    def bulk_favorite(self, request):
+        """Добавить или удалить несколько рецептов в избранном."""
+        return self._bulk_relations(request, Favorite)
+
     @action(
         detail=True, methods=["post"], permission_classes=(IsAuthenticated,)
     )
@@ -142,49 +267,127 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Удалить рецепт из списка покупок."""
         return self._delete_relation(request.user, ShoppingCart, pk)
 
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        url_path="shopping_cart",
+        permission_classes=(IsAuthenticated,),
+    )
+    def bulk_shopping_cart(self, request):
+        """Добавить или удалить несколько рецептов в списке покупок."""
+        return self._bulk_relations(request, ShoppingCart)
+
+    @action(detail=True, methods=["get"])
+    def similar(self, request, pk=None):
+        """Похожие рецепты по ингредиентам и тегам (расчёт по расписанию)."""
+        recipe_ids = similar_recipes(self._parse_recipe_id(pk))
+        if recipe_ids is None:
+            raise exceptions.NotFound("Рецепт не найден.")
+        recipes = Recipe.objects.in_bulk(recipe_ids)
+        serializer = ShortRecipeSerializer(
+            [recipes[pk] for pk in recipe_ids if pk in recipes],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get"])
+    def pantry(self, request):
+        """Рецепты из имеющихся продуктов: ?ingredients=1,2&max_missing=1."""
+        params = request.query_params
+        query = PantryQuerySerializer(
+            data={
+                "ingredients": [
+                    value
+                    for values in params.getlist("ingredients")
+                    for value in values.split(",")
+                    if value
+                ],
+                **{
+                    name: params[name]
+                    for name in ("max_missing", "limit")
+                    if name in params
+                },
+            }
+        )
+        query.is_valid(raise_exception=True)
+        data = query.validated_data
+        found = pantry_index.search(
+            data["ingredients"], data["max_missing"], data["limit"]
+        )
+        recipes = Recipe.objects.in_bulk([pk for pk, _ in found])
+        page = []
+        for pk, missing_count in found:
+            if pk in recipes:
+                recipes[pk].missing_count = missing_count
+                page.append(recipes[pk])
+        serializer = PantryRecipeSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=(IsAuthenticated,),
+    )
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь."""
+        queryset = feed_recipes(request.user, self.get_queryset())
+        paginator = self.feed_pagination_class()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=(IsAuthenticated,),
+    )
+    def shopping_list(self, request):
+        """Список покупок в JSON: суммы ингредиентов по корзине."""
+        items = request.user.shopping_list_items.select_related(
+            "ingredient"
+        ).order_by("ingredient__name")
+        return Response(ShoppingListItemSerializer(items, many=True).data)
+
     @action(
         detail=False,
         methods=["get"],
         permission_classes=[IsAuthenticated],
         url_path="download_shopping_cart",
+        renderer_classes=(PlainTextRenderer, CSVRenderer, PDFRenderer),
     )
     def download_shopping_cart(self, request):
-        """Скачать список покупок в формате .txt."""
-        recipe_ids = request.user.shoppingcart.values_list(
-            "recipe_id", flat=True
-        )
-        if not recipe_ids:
+        """Скачать список покупок (?format=txt|csv|pdf, по умолчанию txt)."""
+        if not request.user.shoppingcart.exists():
             return HttpResponse(
                 "Ваш список покупок пуст. Добавьте рецепты.",
                 content_type="text/plain; charset=utf-8",
                 status=400,
             )
 
-        ingredients = (
-            RecipeIngredients.objects.filter(recipe__in=recipe_ids)
-            .values(
-                name=F("ingredient__name"),
-                measurement_unit=F("ingredient__measurement_unit"),
-            )
-            .annotate(amount=Sum("amount"))
-            .order_by("name")
-        )
-
-        text = "Список покупок:\n\n"
-        text += "\n".join(
-            f"{item['name']} — {item['amount']} {item['measurement_unit']}"
-            for item in ingredients
+        ingredients = request.user.shopping_list_items.values(
+            name=F("ingredient__name"),
+            measurement_unit=F("ingredient__measurement_unit"),
+            amount=F("total_amount"),
+        ).order_by("name")
+
+        renderer = request.accepted_renderer
+        export = SHOPPING_LIST_EXPORTERS[renderer.format]
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        response = StreamingHttpResponse(
+            export(ingredients.iterator()), content_type=content_type
         )
-        text += "\n\nСпасибо, что используете Foodgram"
-
-        response = HttpResponse(text, content_type="text/plain; charset=utf-8")
         response["Content-Disposition"] = (
-            'attachment; filename="shopping-list.txt"'
+            f'attachment; filename="shopping-list.{renderer.format}"'
         )
         return response
 
 
-class UserViewSet(DjoserUserViewSet):
+class UserViewSet(SubscribedAuthorsMixin, DjoserUserViewSet):
     """
     Кастомный UserViewSet с функционалом подписок и аватара.
     Наследует регистрацию, /me/, авторизацию от Djoser.
@@ -199,6 +402,33 @@ class UserViewSet(DjoserUserViewSet):
             return (IsAuthenticated(),)
         return super().get_permissions()
 
+    def get_recipes_limit(self):
+        """Разбирает recipes_limit один раз на запрос."""
+        recipes_limit = self.request.query_params.get("recipes_limit")
+        if not recipes_limit:
+            return None
+        try:
+            limit = int(recipes_limit)
+        except ValueError:
+            raise exceptions.ValidationError(
+                {"recipes_limit": "recipes_limit должен быть целым числом."}
+            )
+        if limit < 0:
+            raise exceptions.ValidationError(
+                {
+                    "recipes_limit": (
+                        "recipes_limit не может быть отрицательным."
+                    )
+                }
+            )
+        return limit
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ("subscriptions", "subscribe"):
+            context["recipes_limit"] = self.get_recipes_limit()
+        return context
+
     def retrieve(self, request, *args, **kwargs):
         """Получение пользователя по ID."""
         instance = self.get_object()
@@ -214,18 +444,31 @@ class UserViewSet(DjoserUserViewSet):
     def subscriptions(self, request):
         user = request.user
         authors_ids = user.subscriptions.values_list("author_id", flat=True)
+        recipes = Recipe.objects.only(
+            "id", "name", "image", "image_variants", "cooking_time", "author"
+        )
+        limit = self.get_recipes_limit()
+        if limit == 0:
+            recipes = recipes.none()
+        elif limit is not None:
+            # Top-N рецептов каждого автора: по limit строк из индекса
+            # (author, -pub_date) на автора вместо всех его рецептов
+            latest = ArraySubquery(
+                Recipe.objects.filter(author=OuterRef("author_id"))
+                .order_by("-pub_date")
+                .values("pk")[:limit]
+            )
+            recipes = recipes.filter(
+                pk__in=user.subscriptions.annotate(
+                    recipe_id=Func(
+                        latest, function="unnest", output_field=IntegerField()
+                    )
+                ).values("recipe_id")
+            )
         queryset = (
             User.objects.filter(id__in=authors_ids)
-            .annotate(recipes_count=Count("recipes"))
-            .prefetch_related(
-                Prefetch(
-                    "recipes",
-                    queryset=Recipe.objects.only(
-                        "id", "name", "image", "cooking_time"
-                    ),
-                ),
-                "profile",
-            )
+            .select_related("profile")
+            .prefetch_related(Prefetch("recipes", queryset=recipes))
         )
 
         page = self.paginate_queryset(queryset)
@@ -244,7 +487,7 @@ class UserViewSet(DjoserUserViewSet):
     def subscribe(self, request, id=None):
         """Подписаться на автора."""
         serializer = SubscribeSerializer(
-            data={"author": id}, context={"request": request}
+            data={"author": id}, context=self.get_serializer_context()
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
@@ -266,7 +509,7 @@ class UserViewSet(DjoserUserViewSet):
         detail=False,
         methods=["get", "put", "delete"],
         permission_classes=(IsAuthenticated,),
-        parser_classes=[JSONParser, FormParser],
+        parser_classes=[FastJSONParser, FormParser],
         url_path="me/avatar",
     )
     def avatar(self, request):
@@ -319,3 +562,26 @@ class UserViewSet(DjoserUserViewSet):
             return Response({"avatar": avatar_url}, status=status.HTTP_200_OK)
         else:
             return Response({"avatar": None}, status=status.HTTP_200_OK)
+
+
+class StatsView(APIView):
+    """Счётчики кешей и пулов соединений для администраторов.
+
+    Кеш токенов и пулы соединений у каждого процесса свои: ответ
+    относится к воркеру с указанным pid.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(
+            {
+                "pid": os.getpid(),
+                "response_cache": get_cache_stats(),
+                "token_cache": token_cache.stats(),
+                "db_pools": {
+                    alias: get_pool_stats(alias)
+                    for alias in settings.DATABASES
+                },
+            }
+        )
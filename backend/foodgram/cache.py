@@ -0,0 +1,11 @@
+"""Общие проверки бэкендов кеша."""
+
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def is_process_local(cache):
+    """Кеш не виден другим процессам (locmem, dummy)."""
+    return isinstance(cache, PROCESS_LOCAL_CACHES)
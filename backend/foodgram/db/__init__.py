@@ -0,0 +1 @@
+"""Бэкенд PostgreSQL с пулом соединений psycopg 3."""
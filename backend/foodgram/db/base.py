@@ -0,0 +1,137 @@
+"""PostgreSQL с пулом соединений psycopg_pool внутри процесса.
+
+Django 4.2 не умеет брать соединения из пула (это появилось в 5.1),
+поэтому бэкенд повторяет его интерфейс: параметры пула задаются в
+OPTIONS["pool"] (min_size, max_size, timeout и другие аргументы
+ConnectionPool), соединение берётся из пула при подключении и
+возвращается туда при закрытии, то есть в конце каждого запроса.
+Пул создаётся лениво, по одному на алиас БД и процесс, — после fork
+воркера gunicorn. При CONN_HEALTH_CHECKS пул проверяет соединение
+перед выдачей. Без OPTIONS["pool"] бэкенд работает как обычный.
+"""
+
+from threading import Lock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    ConnectionPool = None
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    _connection_pools = {}
+    _pools_lock = Lock()
+
+    @property
+    def pool(self):
+        """Пул соединений алиаса или None, если пул не настроен."""
+        pool_options = self.settings_dict["OPTIONS"].get("pool")
+        if self.alias == NO_DB_ALIAS or not pool_options:
+            return None
+        pool = self._connection_pools.get(self.alias)
+        if pool is not None:
+            return pool
+        if not base.is_psycopg3 or ConnectionPool is None:
+            raise ImproperlyConfigured(
+                "Для пула соединений нужны пакеты psycopg 3 и psycopg_pool."
+            )
+        if self.settings_dict["CONN_MAX_AGE"] != 0:
+            raise ImproperlyConfigured(
+                "Пул соединений несовместим с постоянными соединениями: "
+                "задайте CONN_MAX_AGE = 0."
+            )
+        if pool_options is True:
+            pool_options = {}
+        with self._pools_lock:
+            pool = self._connection_pools.get(self.alias)
+            if pool is None:
+                pool = ConnectionPool(
+                    kwargs=self.get_connection_params(),
+                    name=self.alias,
+                    open=True,
+                    check=(
+                        ConnectionPool.check_connection
+                        if self.settings_dict["CONN_HEALTH_CHECKS"]
+                        else None
+                    ),
+                    **pool_options,
+                )
+                self._connection_pools[self.alias] = pool
+        return pool
+
+    def close_pool(self):
+        """Закрывает пул алиаса; следующее подключение создаст новый."""
+        with self._pools_lock:
+            pool = self._connection_pools.pop(self.alias, None)
+        if pool is not None:
+            pool.close()
+
+    def get_connection_params(self):
+        settings_dict = self.settings_dict
+        options = settings_dict["OPTIONS"]
+        if "pool" not in options:
+            return super().get_connection_params()
+        self.settings_dict = {
+            **settings_dict,
+            "OPTIONS": {
+                name: value
+                for name, value in options.items()
+                if name != "pool"
+            },
+        }
+        try:
+            return super().get_connection_params()
+        finally:
+            self.settings_dict = settings_dict
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        options = self.settings_dict["OPTIONS"]
+        isolation_level = options.get("isolation_level")
+        try:
+            self.isolation_level = base.IsolationLevel(
+                base.IsolationLevel.READ_COMMITTED
+                if isolation_level is None
+                else isolation_level
+            )
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {isolation_level} "
+                f"specified. Use one of the psycopg.IsolationLevel values."
+            )
+        connection = pool.getconn()
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        connection.cursor_factory = (
+            base.ServerBindingCursor
+            if options.get("server_side_binding") is True
+            else base.Cursor
+        )
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if self.connection is None or pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
+        # Соединение вернулось в пул и может уйти другому потоку.
+        self.connection = None
+
+
+def get_pool_stats(alias=DEFAULT_DB_ALIAS):
+    """Состояние пула алиаса: размер, свободные соединения, ожидания.
+
+    Счётчики процесса (requests_num, requests_waiting, requests_wait_ms,
+    requests_errors, connections_num, ...) описаны в документации
+    psycopg_pool. Пустой словарь, если пул не настроен или ещё не создан.
+    """
+    pool = DatabaseWrapper._connection_pools.get(alias)
+    return pool.get_stats() if pool is not None else {}
@@ -0,0 +1,40 @@
+"""Middleware маршрутизации чтений между основной БД и репликами."""
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.decorators import sync_and_async_middleware
+
+from .routers import apin_user, finish_request, pin_user, start_request
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """Открывает состояние роутера на время запроса.
+
+    После запроса с записью закрепляет пользователя за основной БД.
+    Должен стоять после AuthenticationMiddleware.
+    """
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            token = start_request(request)
+            try:
+                response = await get_response(request)
+            finally:
+                user_id = finish_request(token)
+            if user_id is not None:
+                await apin_user(user_id)
+            return response
+
+    else:
+
+        def middleware(request):
+            token = start_request(request)
+            try:
+                response = get_response(request)
+            finally:
+                user_id = finish_request(token)
+            if user_id is not None:
+                pin_user(user_id)
+            return response
+
+    return middleware
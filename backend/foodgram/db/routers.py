@@ -0,0 +1,205 @@
+"""Чтение с реплик PostgreSQL с «чтением своих записей».
+
+Реплики перечислены в settings.DATABASE_REPLICAS. На реплику уходят
+только чтения внутри запроса с безопасным методом (GET, HEAD, OPTIONS);
+остальные запросы, транзакции, фоновые задачи и команды работают с
+основной БД.
+
+Если запрос пользователя с небезопасным методом закоммитил запись,
+его чтения закрепляются за основной БД на DB_REPLICA_PIN_SECONDS
+секунд (служебные записи в GET, например get_or_create профиля, не
+закрепляют): метка лежит в кеше по id пользователя, и пока её видно,
+флаги is_favorited/is_subscribed и прочие свежие данные читаются
+оттуда же, куда записаны. Метку в кеше процесса (locmem, dummy) не
+видят другие воркеры, поэтому с таким кешем по умолчанию чтения
+аутентифицированных пользователей всегда идут в основную БД, а на
+реплики уходят только анонимные.
+
+Реплика выбирается один раз на запрос. Недоступная реплика (не
+удалось подключиться или не прошла проверка соединения) исключается на
+DB_REPLICA_RETRY_SECONDS секунд; если недоступны все — чтение идёт в
+основную БД. Ошибка уже выполняющегося на реплике запроса не
+повторяется.
+
+Данные, которые потом живут в кешах (справочники, кеш ответов, кеш
+токенов), читаются в блоке use_primary(), чтобы в кеш не попала
+отставшая копия.
+"""
+
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    DatabaseError,
+    connections,
+    transaction,
+)
+from django.utils.functional import SimpleLazyObject, empty
+
+from foodgram.cache import is_process_local
+
+PIN_KEY_PREFIX = "db_primary_pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_request_state = ContextVar("replica_request_state", default=None)
+_force_primary = ContextVar("replica_force_primary", default=False)
+_down_until = {}
+
+
+class RequestState:
+    """Решения о маршрутизации в пределах одного HTTP-запроса."""
+
+    __slots__ = ("request", "primary", "wrote", "pinned", "replica")
+
+    def __init__(self, request):
+        self.request = request
+        self.primary = request.method not in SAFE_METHODS
+        self.wrote = False
+        self.pinned = None
+        self.replica = None
+
+    def mark_wrote(self):
+        self.wrote = True
+
+
+def pin_key(user_id):
+    return f"{PIN_KEY_PREFIX}:{user_id}"
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", ())
+
+
+@contextmanager
+def use_primary():
+    """Все чтения внутри блока идут в основную БД."""
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+
+def start_request(request):
+    """Начинает маршрутизацию запроса; возвращает токен для finish."""
+    return _request_state.set(RequestState(request))
+
+
+def finish_request(token):
+    """Завершает запрос; отдаёт id пользователя, если его надо закрепить."""
+    state = _request_state.get()
+    _request_state.reset(token)
+    if not state.wrote:
+        return None
+    user = resolved_user(state.request)
+    if user is None or not user.is_authenticated:
+        return None
+    return user.pk
+
+
+def pin_user(user_id):
+    cache.set(pin_key(user_id), 1, settings.DB_REPLICA_PIN_SECONDS)
+
+
+async def apin_user(user_id):
+    await cache.aset(pin_key(user_id), 1, settings.DB_REPLICA_PIN_SECONDS)
+
+
+def resolved_user(request):
+    """request.user, если он уже известен, иначе None.
+
+    Ленивый пользователь AuthenticationMiddleware не вычисляется: это
+    запрос к сессии, который сам прошёл бы через роутер.
+    """
+    user = getattr(request, "user", None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return None
+    return user
+
+
+def in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def is_available(alias):
+    """Подключается к реплике; при ошибке исключает её на время."""
+    if _down_until.get(alias, 0) > monotonic():
+        return False
+    connection = connections[alias]
+    try:
+        connection.close_if_health_check_failed()
+        connection.ensure_connection()
+    except DatabaseError:
+        _down_until[alias] = monotonic() + settings.DB_REPLICA_RETRY_SECONDS
+        return False
+    return True
+
+
+class PrimaryReplicaRouter:
+    """Чтения — на реплику, записи и всё в транзакциях — в основную БД."""
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or not get_replicas():
+            return None
+        if (
+            state.primary
+            or _force_primary.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+            or self.is_pinned(state)
+        ):
+            return DEFAULT_DB_ALIAS
+        if state.replica is None:
+            if in_event_loop():
+                # Асинхронный ORM спрашивает роутер и при сборке queryset;
+                # сам запрос выполнится в потоке и будет маршрутизирован
+                # там, а в цикле событий к БД и кешу не ходим.
+                return DEFAULT_DB_ALIAS
+            replicas = [
+                alias for alias in get_replicas() if is_available(alias)
+            ]
+            state.replica = (
+                random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+            )
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if (
+            state is not None
+            and state.primary
+            and not state.wrote
+            and not in_event_loop()
+        ):
+            # Роутер спрашивают и при чтениях для записи (get_or_create),
+            # поэтому закрепляем только после коммита, а откат — нет.
+            transaction.on_commit(state.mark_wrote, using=DEFAULT_DB_ALIAS)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def is_pinned(self, state):
+        if state.pinned is None:
+            user = resolved_user(state.request)
+            if user is None or in_event_loop():
+                # Пока пользователь не определён, читаем основную БД.
+                return True
+            state.pinned = user.is_authenticated and (
+                is_process_local(caches[DEFAULT_CACHE_ALIAS])
+                or bool(cache.get(pin_key(user.pk)))
+            )
+        return state.pinned
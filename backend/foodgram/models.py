@@ -0,0 +1,33 @@
+"""Общие абстрактные модели приложений."""
+
+from django.db import models
+
+
+class CountersModel(models.Model):
+    """Модель с денормализованными счётчиками.
+
+    Счётчики и производные от них поля (counter_fields) меняются только
+    атомарными обновлениями из сигналов. Обычное сохранение существующей
+    строки их не пишет: значения в памяти могли устареть, и полная запись
+    строки затёрла бы чужие изменения.
+    """
+
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if (
+            not args
+            and not self._state.adding
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
@@ -31,6 +31,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "corsheaders",
@@ -49,6 +50,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "foodgram.db.middleware.replica_routing_middleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -81,17 +83,88 @@ WSGI_APPLICATION = "foodgram.wsgi.application"
 #     }
 # }
 
+# Пул соединений внутри процесса (foodgram.db) или постоянные соединения:
+# с пулом соединение возвращается в пул в конце запроса, без него — живёт
+# DB_CONN_MAX_AGE секунд. Перед повторным использованием соединение
+# проверяется, если DB_CONN_HEALTH_CHECKS.
+DB_POOL = os.getenv("DB_POOL", "false").lower() == "true"
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "foodgram.db",
         "NAME": os.getenv("POSTGRES_DB", "postgres_db"),
         "USER": os.getenv("POSTGRES_USER", "postgres"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "postgres"),
         "HOST": os.getenv("DB_HOST", "db"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        "CONN_MAX_AGE": (
+            0 if DB_POOL else int(os.getenv("DB_CONN_MAX_AGE", "60"))
+        ),
+        "CONN_HEALTH_CHECKS": (
+            os.getenv("DB_CONN_HEALTH_CHECKS", "true").lower() == "true"
+        ),
+        "OPTIONS": {},
     }
 }
 
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    }
+
+# Реплики для чтения (foodgram.db.routers): DB_REPLICA_HOSTS — список
+# host[:port] через запятую, остальные параметры берутся у default.
+# После записи чтения пользователя идут в основную БД
+# DB_REPLICA_PIN_SECONDS секунд; недоступная реплика пропускается
+# DB_REPLICA_RETRY_SECONDS секунд.
+DB_REPLICA_CONNECT_TIMEOUT = int(os.getenv("DB_REPLICA_CONNECT_TIMEOUT", "2"))
+DATABASE_REPLICAS = []
+for number, address in enumerate(
+    filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), start=1
+):
+    host, _, port = address.strip().partition(":")
+    options = {
+        **DATABASES["default"]["OPTIONS"],
+        "connect_timeout": DB_REPLICA_CONNECT_TIMEOUT,
+    }
+    if DB_POOL:
+        # Недоступная реплика не должна держать запрос DB_POOL_TIMEOUT.
+        options["pool"] = {
+            **options["pool"],
+            "timeout": DB_REPLICA_CONNECT_TIMEOUT,
+        }
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "NAME": os.getenv("DB_REPLICA_NAME") or DATABASES["default"]["NAME"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "OPTIONS": options,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["foodgram.db.routers.PrimaryReplicaRouter"]
+DB_REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", "10"))
+DB_REPLICA_RETRY_SECONDS = int(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+
+# В продакшене нужен общий для процессов кеш (CACHE_BACKEND=RedisCache):
+# кеш ответов с локальным кешем процесса (locmem) отключается сам.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+RESPONSE_CACHE_ALIAS = "default"
+# Кеш токенов (алиас из CACHES); с локальным кешем процесса отключается
+AUTH_TOKEN_CACHE_ALIAS = os.getenv("AUTH_TOKEN_CACHE_ALIAS") or "default"
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": (
@@ -125,16 +198,35 @@ STATIC_ROOT = "/app/static"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = "/app/media"
 
+# "thread" — пул потоков в процессе, "sync" — сразу (тесты, команды)
+IMAGE_PROCESSING = os.getenv("IMAGE_PROCESSING", "thread")
+IMAGE_PROCESSING_WORKERS = int(os.getenv("IMAGE_PROCESSING_WORKERS", "2"))
+
+# Снимки индекса «из чего приготовить» (общие для воркеров через mmap)
+PANTRY_INDEX_DIR = os.getenv(
+    "PANTRY_INDEX_DIR", str(BASE_DIR / "pantry_index")
+)
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    "SHOPPING_LIST_PDF_FONT",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
     ],
     "SEARCH_PARAM": "name",
+    # orjson, если установлен; иначе стандартный json
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        "api.parsers.FastJSONParser",
         "rest_framework.parsers.FormParser",
         "rest_framework.parsers.MultiPartParser",
     ],
@@ -1,7 +1,15 @@
 from django.contrib import admin
-from django.db import models
 
-from .models import Recipe, Tag, Ingredient, ShoppingCart, Favorite
+from .models import (
+    Recipe,
+    Tag,
+    Ingredient,
+    ShoppingCart,
+    Favorite,
+    ShoppingListItem,
+)
+from .search import update_search_vector
+from . import shopping_list
 
 
 class RecipeIngredientInline(admin.TabularInline):
@@ -20,25 +28,23 @@ class RecipeAdmin(admin.ModelAdmin):
         "name",
         "pub_date",
         "author",
-        "favorites_count_display",
+        "favorites_count",
+        "shopping_carts_count",
     )
     list_display_links = ("id", "name")
     search_fields = ("name", "author__username", "author__email")
     list_filter = ("pub_date", "author", "tags")
     date_hierarchy = "pub_date"
     inlines = (RecipeIngredientInline,)
-    readonly_fields = ("favorites_count_display",)
+    readonly_fields = ("favorites_count", "shopping_carts_count")
 
-    @admin.display(description="В избранном", ordering="favorites_count")
-    def favorites_count_display(self, obj):
-        return obj.favorites_count
-
-    def get_queryset(self, request):
-        return (
-            super()
-            .get_queryset(request)
-            .annotate(favorites_count=models.Count("favorite", distinct=True))
-        )
+    def save_related(self, request, form, formsets, change):
+        recipe = form.instance
+        if change:
+            shopping_list.subtract_recipe(recipe.pk)
+        super().save_related(request, form, formsets, change)
+        shopping_list.add_recipe(recipe.pk)
+        update_search_vector([recipe.pk])
 
 
 @admin.register(Tag)
@@ -83,3 +89,11 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     list_filter = ("user", "recipe")
     date_hierarchy = "created"
     ordering = ("-created",)
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ("user", "ingredient", "total_amount")
+    list_select_related = ("user", "ingredient")
+    search_fields = ("user__username", "ingredient__name")
+    readonly_fields = ("user", "ingredient", "total_amount")
@@ -4,3 +4,24 @@ NAME_MAX_LENGTH = 200
 MEASUREMENT_UNIT_MAX_LENGTH = 10
 SLUG_MAX_LENGTH = 50
 MIN_COOKING_TIME = 1
+SEARCH_CONFIG = "russian"
+# Сколько самых новых совпадений поиска ранжируется и показывается
+SEARCH_MAX_RESULTS = 200
+# Среди скольких самых новых рецептов совпадения ищутся обходом по дате
+SEARCH_RECENT_ROWS = 20_000
+RECIPE_IMAGE_SIZES = {"small": 320, "medium": 640, "large": 1280}
+AVATAR_IMAGE_SIZES = {"small": 64, "medium": 160}
+IMAGE_VARIANT_FORMATS = ("webp", "jpeg")
+IMAGE_VARIANT_QUALITY = 80
+FEED_FANOUT_LIMIT = 10_000
+# Гистерезис: fan-out возобновляется, когда подписчиков стало меньше
+FEED_FANOUT_RESUME_LIMIT = 9_000
+FEED_BACKFILL_SIZE = 100
+# Подписчиков или записей лент за один запрос при смене режима автора
+FEED_SYNC_BATCH_SIZE = 1_000
+SIMILAR_RECIPES_COUNT = 10
+SIMILAR_TAG_WEIGHT = 0.5
+SIMILAR_MAX_FEATURE_RECIPES = 10_000
+SIMILAR_BLOCK_SIZE = 256
+# Больше изменённых после снимка рецептов — поиск запросом к БД
+PANTRY_MAX_CHANGED = 2_000
@@ -0,0 +1,44 @@
+"""Денормализованные счётчики рецептов и профилей."""
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import Profile, Subscription
+from .models import Favorite, Recipe, ShoppingCart
+
+# (модель со счётчиком, поле счётчика, ключ владельца,
+#  считаемая модель, поле связи с владельцем)
+COUNTERS = (
+    (Recipe, "favorites_count", "pk", Favorite, "recipe"),
+    (Recipe, "shopping_carts_count", "pk", ShoppingCart, "recipe"),
+    (Profile, "recipes_count", "user", Recipe, "author"),
+    (Profile, "subscribers_count", "user", Subscription, "author"),
+)
+
+RELATION_COUNTERS = {
+    Favorite: "favorites_count",
+    ShoppingCart: "shopping_carts_count",
+}
+
+
+def change_counter(model, field, delta, **lookup):
+    """Атомарно сдвигает счётчик на delta, не опуская его ниже нуля."""
+    model.objects.filter(**lookup).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def actual_count(owner_key, related_model, related_field):
+    """Подзапрос с фактическим числом связанных строк для владельца."""
+    return Coalesce(
+        Subquery(
+            related_model.objects.filter(
+                **{related_field: OuterRef(owner_key)}
+            )
+            .order_by()
+            .values(related_field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
@@ -0,0 +1,237 @@
+"""Лента подписок: гибридная модель fan-out.
+
+Рецепты обычных авторов раскладываются по лентам подписчиков при
+публикации (FeedEntry). Рецепты авторов с флагом Profile.feed_merged в
+ленты не пишутся и подмешиваются при чтении по подписке. Флаг ставится,
+когда подписчиков становится не меньше FEED_FANOUT_LIMIT, и снимается,
+когда их меньше FEED_FANOUT_RESUME_LIMIT.
+
+При подписке флаг только ставится одним UPDATE: оставшиеся записи автора
+чтению не мешают. Чистка лент и возврат к fan-out с дозаполнением лент
+подписчиков — массовые операции, их выполняет sync_fanout_mode из
+команды recount_counters пачками по FEED_SYNC_BATCH_SIZE.
+"""
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+
+from users.models import Profile, Subscription
+from .constants import (
+    FEED_BACKFILL_SIZE,
+    FEED_FANOUT_LIMIT,
+    FEED_FANOUT_RESUME_LIMIT,
+    FEED_SYNC_BATCH_SIZE,
+)
+from .models import FeedEntry, Recipe
+
+FEED = FeedEntry._meta.db_table
+RECIPES = Recipe._meta.db_table
+SUBSCRIPTIONS = Subscription._meta.db_table
+
+FAN_OUT_SQL = f"""
+INSERT INTO {FEED} (user_id, recipe_id, author_id)
+SELECT sub.user_id, %s, sub.author_id
+FROM {SUBSCRIPTIONS} AS sub
+WHERE sub.author_id = %s
+ON CONFLICT (user_id, recipe_id) DO NOTHING
+"""
+
+BACKFILL_SQL = f"""
+INSERT INTO {FEED} (user_id, recipe_id, author_id)
+SELECT %s, recipe.id, recipe.author_id
+FROM {RECIPES} AS recipe
+WHERE recipe.author_id = %s
+ORDER BY recipe.pub_date DESC, recipe.id DESC
+LIMIT %s
+ON CONFLICT (user_id, recipe_id) DO NOTHING
+"""
+
+# Последние рецепты автора (с id больше заданного) подписчикам из
+# диапазона id подписок (без верхней границы, если она NULL)
+BACKFILL_SUBSCRIBERS_SQL = f"""
+INSERT INTO {FEED} (user_id, recipe_id, author_id)
+SELECT sub.user_id, recipe.id, recipe.author_id
+FROM {SUBSCRIPTIONS} AS sub
+CROSS JOIN (
+    SELECT id, author_id
+    FROM {RECIPES}
+    WHERE author_id = %s AND id > %s
+    ORDER BY pub_date DESC, id DESC
+    LIMIT %s
+) AS recipe
+WHERE sub.author_id = %s AND sub.id > %s
+    AND (%s::bigint IS NULL OR sub.id <= %s)
+ON CONFLICT (user_id, recipe_id) DO NOTHING
+"""
+
+
+def is_fanned_out(author_id):
+    """Пишутся ли рецепты автора в ленты подписчиков.
+
+    Автор, которого start_merging вот-вот переведёт на подмешивание
+    (подписчиков уже не меньше FEED_FANOUT_LIMIT), тоже не считается.
+    """
+    return not Profile.objects.filter(
+        Q(feed_merged=True) | Q(subscribers_count__gte=FEED_FANOUT_LIMIT),
+        user_id=author_id,
+    ).exists()
+
+
+@transaction.atomic
+def fan_out(recipe):
+    """Добавляет новый рецепт в ленты подписчиков автора."""
+    # Блокировка профиля не даёт смене режима пройти между проверкой
+    # флага и вставкой: иначе рецепт не попал бы ни в одну ленту.
+    merged = (
+        Profile.objects.select_for_update(no_key=True)
+        .filter(user_id=recipe.author_id)
+        .values_list("feed_merged", flat=True)
+        .first()
+    )
+    if not merged:
+        with connection.cursor() as cursor:
+            cursor.execute(FAN_OUT_SQL, [recipe.pk, recipe.author_id])
+
+
+def backfill(user_id, author_id):
+    """Заполняет ленту последними рецептами автора после подписки."""
+    if is_fanned_out(author_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                BACKFILL_SQL, [user_id, author_id, FEED_BACKFILL_SIZE]
+            )
+
+
+def start_merging(author_id):
+    """Переводит автора на подмешивание, если подписчиков стало много.
+
+    Вызывается при подписке: только ставит флаг, записи автора из лент
+    удалит sync_fanout_mode. Возвращает, поставлен ли флаг.
+    """
+    return (
+        Profile.objects.filter(
+            user_id=author_id,
+            feed_merged=False,
+            subscribers_count__gte=FEED_FANOUT_LIMIT,
+        ).update(feed_merged=True)
+        > 0
+    )
+
+
+def _backfill_subscribers(author_id, after_recipe, after, until=None):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            BACKFILL_SUBSCRIBERS_SQL,
+            [author_id, after_recipe, FEED_BACKFILL_SIZE, author_id]
+            + [after, until, until],
+        )
+
+
+def _resume_fanout(author_id):
+    """Дозаполняет ленты подписчиков и возвращает автора к fan-out.
+
+    Пока флаг стоит, рецепты автора подмешиваются при чтении, поэтому
+    ленты дозаполняются пачками подписчиков без блокировки. Под
+    блокировкой профиля остаётся дописать рецепты, опубликованные за это
+    время, и подписчиков, подписавшихся за это время.
+    """
+    last_recipe = (
+        Recipe.objects.filter(author_id=author_id)
+        .order_by("-pk")
+        .values_list("pk", flat=True)
+        .first()
+        or 0
+    )
+    subscriptions = list(
+        Subscription.objects.filter(author_id=author_id)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    after = 0
+    for start in range(0, len(subscriptions), FEED_SYNC_BATCH_SIZE):
+        until = subscriptions[start:][:FEED_SYNC_BATCH_SIZE][-1]
+        _backfill_subscribers(author_id, 0, after, until)
+        after = until
+    with transaction.atomic():
+        profile = (
+            Profile.objects.select_for_update(no_key=True)
+            .filter(user_id=author_id)
+            .values("pk", "feed_merged", "subscribers_count")
+            .first()
+        )
+        if (
+            profile is None
+            or not profile["feed_merged"]
+            or profile["subscribers_count"] >= FEED_FANOUT_RESUME_LIMIT
+        ):
+            # Записи, если автор остался на подмешивании, удалит
+            # следующий запуск
+            return
+        _backfill_subscribers(author_id, last_recipe, 0, after)
+        _backfill_subscribers(author_id, 0, after)
+        Profile.objects.filter(pk=profile["pk"]).update(feed_merged=False)
+
+
+def _remove_merged_entries(author_id):
+    """Удаляет записи автора на подмешивании из лент пачками."""
+    entries = FeedEntry.objects.filter(author_id=author_id)
+    while True:
+        batch = list(
+            entries.values_list("pk", flat=True)[:FEED_SYNC_BATCH_SIZE]
+        )
+        if not batch:
+            return
+        FeedEntry.objects.filter(pk__in=batch).delete()
+
+
+def sync_fanout_mode(author_id):
+    """Приводит ленты автора в соответствие числу подписчиков.
+
+    Выполняется вне транзакции: каждая пачка фиксируется отдельно.
+    """
+    profile = (
+        Profile.objects.filter(user_id=author_id)
+        .values("feed_merged", "subscribers_count")
+        .first()
+    )
+    if profile is None:
+        return
+    merged = profile["feed_merged"]
+    if merged and profile["subscribers_count"] < FEED_FANOUT_RESUME_LIMIT:
+        _resume_fanout(author_id)
+    elif merged or start_merging(author_id):
+        _remove_merged_entries(author_id)
+
+
+def mismatched_authors():
+    """Авторы, чьи ленты не соответствуют числу подписчиков.
+
+    Это авторы, режим которых пора сменить, и авторы на подмешивании, чьи
+    записи ещё не удалены из лент.
+    """
+    return Profile.objects.filter(
+        Q(feed_merged=True, subscribers_count__lt=FEED_FANOUT_RESUME_LIMIT)
+        | Q(feed_merged=False, subscribers_count__gte=FEED_FANOUT_LIMIT)
+        | Q(
+            Exists(FeedEntry.objects.filter(author_id=OuterRef("user_id"))),
+            feed_merged=True,
+        )
+    ).values_list("user_id", flat=True)
+
+
+def remove_author(user_id, author_id):
+    """Убирает рецепты автора из ленты после отписки."""
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def feed_recipes(user, queryset=None):
+    """Рецепты ленты: записи FeedEntry плюс авторы без fan-out."""
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    merged_authors = Subscription.objects.filter(
+        user=user, author__profile__feed_merged=True
+    ).values("author")
+    return queryset.filter(
+        Q(pk__in=FeedEntry.objects.filter(user=user).values("recipe"))
+        | Q(author__in=merged_authors)
+    )
@@ -1,4 +1,19 @@
+import heapq
+from itertools import chain
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db.models import F, Q
 from django_filters import rest_framework as filters
+
+from .constants import (
+    SEARCH_CONFIG,
+    SEARCH_MAX_RESULTS,
+    SEARCH_RECENT_ROWS,
+)
 from .models import Recipe, Tag
 
 
@@ -16,11 +31,75 @@ class RecipeFilter(filters.FilterSet):
         to_field_name="slug",
         queryset=Tag.objects.all(),
     )
+    search = filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Recipe
         fields = ("author", "tags")
 
+    def filter_search(self, queryset, name, value):
+        """Поиск по названию, описанию и ингредиентам с учётом опечаток.
+
+        Ранжируются SEARCH_MAX_RESULTS самых новых совпадений: иначе для
+        частого слова ts_rank и COUNT(*) пагинации считались бы по сотням
+        тысяч строк. Похожие по триграммам названия ищутся, только если
+        полнотекстовый поиск ничего не нашёл.
+        """
+        value = value.strip()
+        if not value:
+            return queryset
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type="websearch"
+        )
+        candidates = self.newest_matches(queryset, Q(search_vector=query))
+        if not candidates:
+            # Оператор % (порог pg_trgm.similarity_threshold, 0.3 по
+            # умолчанию) использует GIN-индекс по названию, а условие
+            # similarity(...) >= порог — нет.
+            candidates = self.newest_matches(
+                queryset, Q(name__trigram_similar=value)
+            )
+        return (
+            queryset.filter(pk__in=candidates)
+            .annotate(
+                rank=SearchRank(F("search_vector"), query),
+                similarity=TrigramSimilarity("name", value),
+            )
+            .order_by("-rank", "-similarity", "-pub_date")
+        )
+
+    def newest_matches(self, queryset, match):
+        """Id не больше SEARCH_MAX_RESULTS самых новых совпадений.
+
+        Сначала совпадения ищутся обходом индекса по дате среди
+        SEARCH_RECENT_ROWS самых новых рецептов: для частых слов этого
+        хватает. Иначе слово редкое, и остальные совпадения берутся
+        целиком по GIN-индексу: обход по дате прошёл бы всю таблицу.
+        """
+        ordering = ("-pub_date", "-pk")
+        matches = queryset.filter(match)
+        last_recent = SEARCH_RECENT_ROWS - 1
+        oldest_recent = (
+            Recipe.objects.order_by(*ordering)
+            .values_list("pub_date", flat=True)[last_recent:]
+            .first()
+        )
+        recent = (
+            Q() if oldest_recent is None else Q(pub_date__gte=oldest_recent)
+        )
+        found = list(
+            matches.filter(recent)
+            .order_by(*ordering)
+            .values_list("pub_date", "pk")[:SEARCH_MAX_RESULTS]
+        )
+        if oldest_recent is not None and len(found) < SEARCH_MAX_RESULTS:
+            older = matches.filter(pub_date__lt=oldest_recent).order_by()
+            found = heapq.nlargest(
+                SEARCH_MAX_RESULTS,
+                chain(found, older.values_list("pub_date", "pk")),
+            )
+        return [pk for _, pk in found]
+
     def filter_is_favorited(self, queryset, name, value):
         if self.request.user.is_anonymous:
             return queryset.none()
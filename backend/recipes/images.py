@@ -0,0 +1,100 @@
+"""Фоновая обработка загруженных изображений: размеры и форматы.
+
+Для каждого изображения sorl.thumbnail строит набор уменьшенных копий
+в WebP и JPEG (без EXIF, с учётом ориентации), а их имена и размеры
+записываются в JSON-поле модели. Задачи выполняются после фиксации
+транзакции в пуле потоков процесса; при IMAGE_PROCESSING = "sync" —
+сразу, что удобно в тестах и командах.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal
+from sorl.thumbnail import get_thumbnail
+
+from .constants import IMAGE_VARIANT_FORMATS, IMAGE_VARIANT_QUALITY
+
+logger = logging.getLogger(__name__)
+
+# Отправляется, когда варианты изображения записаны в модель
+image_variants_ready = Signal()
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_PROCESSING_WORKERS,
+            thread_name_prefix="image-processing",
+        )
+    return _executor
+
+
+def needs_processing(image, variants):
+    """Варианты устарели: загружено новое изображение или его удалили."""
+    return (image.name or "") != variants.get("source", "")
+
+
+def build_variants(image, sizes):
+    """Строит копии изображения и возвращает их описание для JSON-поля."""
+    variants = {"source": image.name or ""}
+    if not image:
+        return variants
+    variants["width"], variants["height"] = image.width, image.height
+    for label, width in sizes.items():
+        variant = {}
+        for image_format in IMAGE_VARIANT_FORMATS:
+            thumbnail = get_thumbnail(
+                image,
+                str(width),
+                format=image_format.upper(),
+                quality=IMAGE_VARIANT_QUALITY,
+                upscale=False,
+            )
+            variant[image_format] = thumbnail.name
+            variant["width"], variant["height"] = (
+                thumbnail.width,
+                thumbnail.height,
+            )
+        variants[label] = variant
+    return variants
+
+
+def process_image(model, pk, image_field, variants_field, sizes):
+    """Обрабатывает изображение одного объекта, если оно ещё актуально."""
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    image = getattr(instance, image_field)
+    if not needs_processing(image, getattr(instance, variants_field)):
+        return
+    variants = build_variants(image, sizes)
+    # Изображение могли заменить, пока строились копии
+    updated = model.objects.filter(
+        pk=pk, **{image_field: image.name}
+    ).update(**{variants_field: variants})
+    if updated:
+        image_variants_ready.send(sender=model, pk=pk)
+
+
+def _run(*args):
+    try:
+        process_image(*args)
+    except Exception:
+        logger.exception("Не удалось обработать изображение %s", args[:2])
+    finally:
+        close_old_connections()
+
+
+def enqueue(model, pk, image_field, variants_field, sizes):
+    """Ставит обработку в очередь после фиксации текущей транзакции."""
+    args = (model, pk, image_field, variants_field, sizes)
+    if settings.IMAGE_PROCESSING == "sync":
+        transaction.on_commit(lambda: process_image(*args))
+    else:
+        transaction.on_commit(lambda: get_executor().submit(_run, *args))
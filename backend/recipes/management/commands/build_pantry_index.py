@@ -0,0 +1,22 @@
+from time import monotonic
+
+from django.core.management.base import BaseCommand
+
+from recipes.pantry import build_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Перестроение индекса поиска рецептов по имеющимся продуктам; "
+        "запускать периодически, чтобы дочитываемая из БД часть "
+        "оставалась небольшой"
+    )
+
+    def handle(self, *args, **options):
+        started = monotonic()
+        name = build_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Снимок {name} построен за {monotonic() - started:.1f} с."
+            )
+        )
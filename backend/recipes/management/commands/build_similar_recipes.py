@@ -0,0 +1,29 @@
+from time import monotonic
+
+from django.core.management.base import BaseCommand
+
+from recipes.similar import build
+
+
+class Command(BaseCommand):
+    help = (
+        "Расчёт похожих рецептов по ингредиентам и тегам: по умолчанию "
+        "только новые и изменённые с прошлого расчёта"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Пересчитать похожие рецепты для всех рецептов",
+        )
+
+    def handle(self, *args, **options):
+        started = monotonic()
+        updated = build(full=options["full"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Похожие рецепты пересчитаны для {updated} рецептов "
+                f"за {monotonic() - started:.1f} с."
+            )
+        )
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import ShoppingListItem
+from recipes.shopping_list import live_totals, stored_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверка материализованных списков покупок (ShoppingListItem) "
+        "с суммами по корзинам"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Перестроить списки покупок по актуальным данным",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            live = live_totals()
+            stored = stored_totals()
+            broken = {
+                key
+                for key in live.keys() | stored.keys()
+                if live.get(key) != stored.get(key)
+            }
+            for user_id, ingredient_id in sorted(broken):
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"Пользователь {user_id}, ингредиент "
+                        f"{ingredient_id}: в списке "
+                        f"{stored.get((user_id, ingredient_id))}, по "
+                        f"корзине {live.get((user_id, ingredient_id))}"
+                    )
+                )
+
+            if broken and options["fix"]:
+                ShoppingListItem.objects.all().delete()
+                ShoppingListItem.objects.bulk_create(
+                    ShoppingListItem(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        total_amount=total,
+                    )
+                    for (user_id, ingredient_id), total in live.items()
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Списки покупок перестроены, позиций: {len(live)}"
+                    )
+                )
+                return
+
+        if broken:
+            raise CommandError(f"Найдено расхождений: {len(broken)}")
+        self.stdout.write(self.style.SUCCESS("Списки покупок в порядке."))
@@ -1,66 +1,183 @@
 import csv
+import json
+import re
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
-from django.core.management.base import BaseCommand
 from recipes.models import Ingredient
+from recipes.signals import ingredients_bulk_loaded
+
+DEFAULT_BATCH_SIZE = 5000
+HEADER = ("name", "measurement_unit")
+JSON_CHUNK_SIZE = 64 * 1024
+SEPARATORS = re.compile(r"[\s,]*")
+
+# Пачка передаётся двумя массивами: без моделей и без запроса с
+# десятком тысяч параметров, который ORM собирал бы для bulk_create
+INSERT_SQL = """
+INSERT INTO {table} (name, measurement_unit)
+SELECT * FROM unnest(%s::text[], %s::text[])
+ON CONFLICT (name, measurement_unit) DO NOTHING
+"""
+
+
+def iter_csv(file):
+    """Строки CSV вида «название,единица»; заголовок пропускается."""
+    for row_number, row in enumerate(csv.reader(file), start=1):
+        if not row or tuple(row) == HEADER:
+            continue
+        yield row_number, row
+
+
+def iter_json(file):
+    """Элементы JSON-массива, читаемые по частям без загрузки всего файла."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(JSON_CHUNK_SIZE).lstrip()
+    if not buffer.startswith("["):
+        raise CommandError("Ожидается JSON-массив ингредиентов.")
+    position = 1
+    item_number = 0
+    end_of_file = False
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if buffer.startswith("]", position):
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if end_of_file:
+                raise CommandError(
+                    f"Некорректный JSON после элемента {item_number}."
+                )
+            chunk = file.read(JSON_CHUNK_SIZE)
+            end_of_file = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        item_number += 1
+        if isinstance(item, dict):
+            item = [item.get("name"), item.get("measurement_unit")]
+        yield item_number, item
+
+
+READERS = {"csv": iter_csv, "json": iter_json}
 
 
 class Command(BaseCommand):
-    help = "Импорт данных из csv в модель Ingredient"
+    help = (
+        "Импорт ингредиентов из csv или json: пакетная запись, "
+        "повторный запуск не создаёт дублей"
+    )
 
     def add_arguments(self, parser):
         parser.add_argument("--path", type=str, help="Путь к файлу")
+        parser.add_argument(
+            "--format",
+            choices=READERS,
+            help="Формат файла (по умолчанию — по расширению)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Сколько строк записывать за один запрос",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только разобрать файл и посчитать новые ингредиенты",
+        )
 
     def handle(self, *args, **options):
-        print("Заполнение модели Ingredient из csv запущено.")
-
-        # Указываем кодировку UTF-8 при открытии файла
-        file_path = options["path"]
+        file_path = Path(options["path"] or "")
+        file_format = options["format"] or file_path.suffix.lstrip(".")
+        if file_format not in READERS:
+            raise CommandError(
+                f"Неизвестный формат «{file_format}», укажите --format."
+            )
+        self.stdout.write(
+            f"Заполнение модели Ingredient из {file_format} запущено."
+        )
         try:
-            with open(file_path, "r", encoding="utf-8") as csv_file:
-                reader = csv.reader(csv_file)
-
-                # Пропускаем заголовок, если он есть
-                next(reader, None)
-
-                for row_number, row in enumerate(reader, start=1):
-                    try:
-                        # Проверяем, что строка не пустая
-                        if not row:
-                            continue
-
-                        obj, created = Ingredient.objects.get_or_create(
-                            name=row[0].strip(),
-                            measurement_unit=row[1].strip(),
-                        )
-
-                        if not created:
-                            self.stdout.write(
-                                self.style.WARNING(
-                                    f"Ингредиент {obj} уже существует"
-                                    "в базе данных."
-                                )
-                            )
-
-                    except IndexError:
-                        self.stdout.write(
-                            self.style.ERROR(
-                                f"Ошибка в строке {row_number}: "
-                                "Некорректное количество столбцов"
-                            )
-                        )
-                    except Exception as error:
-                        self.stdout.write(
-                            self.style.ERROR(
-                                f"Ошибка в строке {row_number}: {error}"
-                            )
-                        )
-
+            with open(file_path, "r", encoding="utf-8") as file:
+                with transaction.atomic():
+                    created = self.load(
+                        READERS[file_format](file),
+                        options["batch_size"],
+                        options["dry_run"],
+                    )
         except FileNotFoundError:
+            raise CommandError(f"Файл не найден по пути: {file_path}")
+
+        if options["dry_run"]:
             self.stdout.write(
-                self.style.ERROR(f"Файл не найден по пути: {file_path}")
+                self.style.SUCCESS(
+                    f"Пробный запуск: будет добавлено {created} ингредиентов."
+                )
             )
             return
-
+        if created:
+            ingredients_bulk_loaded.send(sender=Ingredient)
         self.stdout.write(
-            self.style.SUCCESS("Заполнение модели Ingredient завершено.")
+            self.style.SUCCESS(
+                f"Заполнение модели Ingredient завершено, "
+                f"добавлено {created}."
+            )
         )
+
+    def load(self, rows, batch_size, dry_run):
+        """Дедуплицирует строки в памяти и пишет новые пачками."""
+        name_length = Ingredient._meta.get_field("name").max_length
+        unit_length = Ingredient._meta.get_field(
+            "measurement_unit"
+        ).max_length
+        seen = set(Ingredient.objects.values_list("name", "measurement_unit"))
+        new_ingredients = self.parse(rows, seen, name_length, unit_length)
+        sql = INSERT_SQL.format(table=Ingredient._meta.db_table)
+        processed = created = 0
+        while batch := list(islice(new_ingredients, batch_size)):
+            if not dry_run:
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, list(map(list, zip(*batch))))
+                    # Дубликаты, добавленные параллельно, пропускаются
+                    # ON CONFLICT и не попадают в rowcount
+                    created += cursor.rowcount
+            processed += len(batch)
+            self.stdout.write(f"Обработано новых ингредиентов: {processed}")
+        return processed if dry_run else created
+
+    def parse(self, rows, seen, name_length, unit_length):
+        for row_number, row in rows:
+            if (
+                not isinstance(row, (list, tuple))
+                or len(row) != 2
+                or not all(isinstance(value, str) for value in row)
+            ):
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"Ошибка в строке {row_number}: "
+                        "Некорректное количество столбцов"
+                    )
+                )
+                continue
+            name, unit = row[0].strip(), row[1].strip()
+            if (
+                not name
+                or not unit
+                or len(name) > name_length
+                or len(unit) > unit_length
+            ):
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"Ошибка в строке {row_number}: "
+                        "пустое или слишком длинное значение"
+                    )
+                )
+                continue
+            if (name, unit) in seen:
+                continue
+            seen.add((name, unit))
+            yield name, unit
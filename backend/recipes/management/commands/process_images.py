@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from recipes.constants import AVATAR_IMAGE_SIZES, RECIPE_IMAGE_SIZES
+from recipes.images import needs_processing, process_image
+from recipes.models import Recipe
+from users.models import Profile
+
+TARGETS = (
+    (Recipe, "image", "image_variants", RECIPE_IMAGE_SIZES),
+    (Profile, "avatar", "avatar_variants", AVATAR_IMAGE_SIZES),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Построение уменьшенных копий фото рецептов и аватаров, "
+        "которые не успела обработать фоновая очередь"
+    )
+
+    def handle(self, *args, **options):
+        for model, image_field, variants_field, sizes in TARGETS:
+            processed = 0
+            for instance in model.objects.only(
+                "pk", image_field, variants_field
+            ).iterator():
+                if needs_processing(
+                    getattr(instance, image_field),
+                    getattr(instance, variants_field),
+                ):
+                    process_image(
+                        model, instance.pk, image_field, variants_field, sizes
+                    )
+                    processed += 1
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: обработано {processed}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS("Обработка изображений завершена.")
+        )
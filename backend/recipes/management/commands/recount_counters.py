@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from recipes.counters import COUNTERS, actual_count
+from recipes.feed import mismatched_authors, sync_fanout_mode
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчёт денормализованных счётчиков рецептов и профилей "
+        "(избранное, списки покупок, рецепты и подписчики авторов) и "
+        "режимов ленты подписок авторов"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только проверить счётчики, ничего не изменяя",
+        )
+
+    def handle(self, *args, **options):
+        mismatched = 0
+        with transaction.atomic():
+            for model, field, owner_key, related, related_field in COUNTERS:
+                actual = actual_count(owner_key, related, related_field)
+                label = f"{model._meta.verbose_name_plural}.{field}"
+                if options["check"]:
+                    broken = (
+                        model.objects.annotate(actual=actual)
+                        .exclude(**{field: F("actual")})
+                        .count()
+                    )
+                    mismatched += broken
+                    style = (
+                        self.style.WARNING if broken else self.style.SUCCESS
+                    )
+                    self.stdout.write(style(f"{label}: расхождений {broken}"))
+                else:
+                    updated = model.objects.update(**{field: actual})
+                    self.stdout.write(f"{label}: пересчитано {updated}")
+        if not options["check"]:
+            # Смена режима ленты при подписке и отписке ограничивается
+            # флагом; ленты чистятся и дозаполняются здесь, пачками.
+            authors = list(mismatched_authors())
+            for author_id in authors:
+                sync_fanout_mode(author_id)
+            self.stdout.write(
+                f"Ленты авторов: синхронизировано {len(authors)}"
+            )
+
+        if mismatched:
+            raise CommandError(f"Найдено расхождений: {mismatched}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Счётчики в порядке."
+                if options["check"]
+                else "Пересчёт счётчиков завершён."
+            )
+        )
@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-18 06:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    for field, model_name in (
+        ('favorites_count', 'Favorite'),
+        ('shopping_carts_count', 'ShoppingCart'),
+    ):
+        related = apps.get_model('recipes', model_name)
+        Recipe.objects.update(
+            **{
+                field: Coalesce(
+                    Subquery(
+                        related.objects.filter(recipe=OuterRef('pk'))
+                        .order_by()
+                        .values('recipe')
+                        .annotate(total=Count('pk'))
+                        .values('total')
+                    ),
+                    0,
+                )
+            }
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            'recipes',
+            '0002_alter_ingredient_options_alter_recipe_options_and_more',
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='В избранном'
+            ),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='shopping_carts_count',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='В списках покупок'
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
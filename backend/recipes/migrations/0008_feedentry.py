@@ -0,0 +1,91 @@
+# Generated by Django 4.2 on 2026-10-18 06:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Последние 100 рецептов каждого автора с числом подписчиков
+# меньше 10 000 (FEED_BACKFILL_SIZE и FEED_FANOUT_LIMIT)
+FILL_FEED = """
+INSERT INTO recipes_feedentry (user_id, recipe_id, author_id)
+SELECT sub.user_id, recipe.id, recipe.author_id
+FROM users_subscription AS sub
+JOIN users_profile AS profile ON profile.user_id = sub.author_id
+JOIN (
+    SELECT id, author_id, ROW_NUMBER() OVER (
+        PARTITION BY author_id ORDER BY pub_date DESC, id DESC
+    ) AS position
+    FROM recipes_recipe
+) AS recipe ON recipe.author_id = sub.author_id
+WHERE profile.subscribers_count < 10000 AND recipe.position <= 100;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0007_recipe_image_variants'),
+        ('users', '0003_profile_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'author',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='Автор',
+                    ),
+                ),
+                (
+                    'recipe',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='feed_entries',
+                        to='recipes.recipe',
+                        verbose_name='Рецепт',
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='feed_entries',
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='Подписчик',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'запись ленты',
+                'verbose_name_plural': 'Записи лент',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(
+                fields=['user', 'author'], name='feed_entry_user_author_idx'
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'recipe'), name='unique_feed_entry'
+            ),
+        ),
+        migrations.RunSQL(FILL_FEED, migrations.RunSQL.noop),
+    ]
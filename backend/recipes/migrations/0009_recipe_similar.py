@@ -0,0 +1,71 @@
+# Generated by Django 4.2 on 2026-10-18 06:28
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_feedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarRecipes',
+            fields=[
+                (
+                    'recipe',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='similar',
+                        serialize=False,
+                        to='recipes.recipe',
+                        verbose_name='Рецепт',
+                    ),
+                ),
+                (
+                    'recipe_ids',
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.IntegerField(),
+                        default=list,
+                        size=None,
+                        verbose_name='Похожие рецепты',
+                    ),
+                ),
+                (
+                    'scores',
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.FloatField(),
+                        default=list,
+                        size=None,
+                        verbose_name='Сходство',
+                    ),
+                ),
+                (
+                    'built_at',
+                    models.DateTimeField(verbose_name='Дата расчёта'),
+                ),
+            ],
+            options={
+                'verbose_name': 'похожие рецепты',
+                'verbose_name_plural': 'Похожие рецепты',
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(
+                auto_now=True, verbose_name='Дата изменения'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='similarrecipes',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['recipe_ids'], name='similar_recipe_ids_idx'
+            ),
+        ),
+    ]
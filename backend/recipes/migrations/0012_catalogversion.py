@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-18 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_alter_favorite_user_alter_shoppingcart_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                (
+                    'name',
+                    models.CharField(
+                        max_length=50,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='Справочник',
+                    ),
+                ),
+                (
+                    'version',
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name='Версия'
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'версия справочника',
+                'verbose_name_plural': 'Версии справочников',
+            },
+        ),
+    ]
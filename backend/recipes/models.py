@@ -1,9 +1,13 @@
 """Модели: теги, ингредиенты, рецепты, связи."""
 
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 
+from foodgram.models import CountersModel
 from .constants import (
     NAME_MAX_LENGTH,
     MEASUREMENT_UNIT_MAX_LENGTH,
@@ -66,7 +70,7 @@ class Ingredient(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class Recipe(CountersModel):
     """Основная модель рецепта."""
 
     name = models.CharField(
@@ -86,10 +90,20 @@ class Recipe(models.Model):
         upload_to="recipes/images/",
         verbose_name="Фото блюда",
     )
+    image_variants = models.JSONField(
+        default=dict,
+        editable=False,
+        verbose_name="Уменьшенные копии фото",
+    )
     pub_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Дата публикации",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name="Дата изменения",
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -107,12 +121,44 @@ class Recipe(models.Model):
         related_name="recipes",
         verbose_name="Ингредиенты",
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="В избранном",
+    )
+    shopping_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="В списках покупок",
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name="Поисковый вектор",
+    )
+
+    counter_fields = ("favorites_count", "shopping_carts_count")
 
     class Meta:
         verbose_name = "рецепт"
         verbose_name_plural = "Рецепты"
         ordering = ["-pub_date"]
         default_related_name = "recipes"
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="recipe_pub_date_id_idx"
+            ),
+            models.Index(
+                fields=["author", "-pub_date"],
+                name="recipe_author_pub_date_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="recipe_search_idx"),
+            GinIndex(
+                fields=["name"],
+                name="recipe_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -195,3 +241,121 @@ class ShoppingCart(UserRecipeRelation):
     class Meta(UserRecipeRelation.Meta):
         verbose_name = "список покупок"
         verbose_name_plural = "Список покупок"
+
+
+class ShoppingListItem(models.Model):
+    """Сумма ингредиента по всем рецептам в списке покупок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="shopping_list_items",
+        verbose_name="Пользователь",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name="shopping_list_items",
+        verbose_name="Ингредиент",
+    )
+    total_amount = models.PositiveIntegerField(verbose_name="Количество")
+
+    class Meta:
+        verbose_name = "позиция списка покупок"
+        verbose_name_plural = "Позиции списков покупок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"],
+                name="unique_shopping_list_item",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.ingredient} — {self.total_amount} ({self.user})"
+
+
+class FeedEntry(models.Model):
+    """Рецепт в ленте подписок пользователя (заполняется при публикации)."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Подписчик",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Рецепт",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Автор",
+    )
+
+    class Meta:
+        verbose_name = "запись ленты"
+        verbose_name_plural = "Записи лент"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"], name="unique_feed_entry"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "author"], name="feed_entry_user_author_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe} в ленте {self.user}"
+
+
+class CatalogVersion(models.Model):
+    """Версия справочника (тегов, ингредиентов), общая для всех процессов."""
+
+    name = models.CharField(
+        max_length=SLUG_MAX_LENGTH,
+        primary_key=True,
+        verbose_name="Справочник",
+    )
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Версия")
+
+    class Meta:
+        verbose_name = "версия справочника"
+        verbose_name_plural = "Версии справочников"
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
+
+
+class SimilarRecipes(models.Model):
+    """Заранее посчитанные похожие рецепты (по убыванию сходства)."""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="similar",
+        verbose_name="Рецепт",
+    )
+    recipe_ids = ArrayField(
+        models.IntegerField(), default=list, verbose_name="Похожие рецепты"
+    )
+    scores = ArrayField(
+        models.FloatField(), default=list, verbose_name="Сходство"
+    )
+    built_at = models.DateTimeField(verbose_name="Дата расчёта")
+
+    class Meta:
+        verbose_name = "похожие рецепты"
+        verbose_name_plural = "Похожие рецепты"
+        indexes = [
+            GinIndex(fields=["recipe_ids"], name="similar_recipe_ids_idx"),
+        ]
+
+    def __str__(self):
+        return f"Похожие на {self.recipe_id}"
@@ -0,0 +1,220 @@
+"""Поиск рецептов по имеющимся продуктам («готовим из того, что есть»).
+
+Инвертированный индекс «ингредиент → строки рецептов» хранится снимком
+из .npy-файлов в PANTRY_INDEX_DIR и открывается через mmap, поэтому
+воркеры одного сервера делят одни и те же страницы памяти. Имя текущего
+снимка лежит в файле current рядом со снимками и заменяется атомарно,
+поэтому новый снимок видят все процессы. Рецепты, изменённые после
+снимка, дочитываются из БД при запросе и перекрывают свои строки в
+индексе; удалённые отсеиваются при выборке объектов. Снимок
+перестраивается только командой build_pantry_index: пока снимка нет или
+изменённых рецептов больше PANTRY_MAX_CHANGED, поиск идёт одним
+запросом к БД.
+"""
+
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from uuid import uuid4
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .constants import PANTRY_MAX_CHANGED
+from .models import Recipe, RecipeIngredients
+
+CURRENT_FILE = "current"
+ARRAYS = ("recipe_ids", "sizes", "ingredient_ids", "offsets", "rows")
+KEEP_SNAPSHOTS = 2
+PAIR = np.dtype((np.int64, 2))
+
+
+def get_index_dir():
+    return Path(settings.PANTRY_INDEX_DIR)
+
+
+def get_current_name():
+    """Имя текущего снимка или None, если снимка ещё нет."""
+    index_dir = get_index_dir()
+    try:
+        name = (index_dir / CURRENT_FILE).read_text().strip()
+    except FileNotFoundError:
+        return None
+    return name if name and (index_dir / name).is_dir() else None
+
+
+def build_snapshot():
+    """Строит новый снимок индекса и делает его текущим. Возвращает имя."""
+    built_at = timezone.now()
+    recipe_ids = np.fromiter(
+        Recipe.objects.order_by("pk")
+        .values_list("pk", flat=True)
+        .iterator(chunk_size=10_000),
+        dtype=np.int64,
+    )
+    pairs = np.fromiter(
+        RecipeIngredients.objects.order_by()
+        .values_list("recipe_id", "ingredient_id")
+        .iterator(chunk_size=10_000),
+        dtype=PAIR,
+    ).reshape(-1, 2)
+    # Рецепты, созданные между запросами, попадут в дочитываемую часть
+    pairs = pairs[np.isin(pairs[:, 0], recipe_ids)]
+    rows = np.searchsorted(recipe_ids, pairs[:, 0]).astype(np.int32)
+    order = np.lexsort((rows, pairs[:, 1]))
+    ingredient_ids, counts = np.unique(pairs[order, 1], return_counts=True)
+    arrays = {
+        "recipe_ids": recipe_ids,
+        "sizes": np.bincount(rows, minlength=len(recipe_ids)).astype(np.int32),
+        "ingredient_ids": ingredient_ids,
+        "offsets": np.concatenate(([0], np.cumsum(counts))),
+        "rows": rows[order],
+    }
+
+    name = f"{built_at:%Y%m%d%H%M%S}-{uuid4().hex[:8]}"
+    index_dir = get_index_dir()
+    index_dir.mkdir(parents=True, exist_ok=True)
+    temporary = index_dir / f".{name}"
+    temporary.mkdir()
+    for key, array in arrays.items():
+        np.save(temporary / f"{key}.npy", array)
+    (temporary / "built_at").write_text(built_at.isoformat())
+    temporary.rename(index_dir / name)
+    pointer = index_dir / f".{CURRENT_FILE}-{name}"
+    pointer.write_text(name)
+    os.replace(pointer, index_dir / CURRENT_FILE)
+
+    # Старые снимки можно удалять: открытые через mmap файлы остаются
+    # доступны процессам, которые их ещё читают
+    snapshots = sorted(
+        path
+        for path in index_dir.iterdir()
+        if path.is_dir() and not path.name.startswith(".")
+    )
+    for path in snapshots[:-KEEP_SNAPSHOTS]:
+        shutil.rmtree(path, ignore_errors=True)
+    return name
+
+
+class Snapshot:
+    """Массивы снимка, открытые только для чтения через mmap."""
+
+    def __init__(self, name):
+        path = get_index_dir() / name
+        for key in ARRAYS:
+            setattr(self, key, np.load(path / f"{key}.npy", mmap_mode="r"))
+        self.built_at = datetime.fromisoformat((path / "built_at").read_text())
+
+    def coverage(self, pantry):
+        """Для каждой строки — сколько ингредиентов рецепта есть в pantry."""
+        if not len(self.ingredient_ids):
+            return np.zeros(len(self.recipe_ids), dtype=np.int64)
+        positions = np.searchsorted(self.ingredient_ids, pantry)
+        positions = np.minimum(positions, len(self.ingredient_ids) - 1)
+        positions = positions[self.ingredient_ids[positions] == pantry]
+        starts, ends = self.offsets[positions], self.offsets[positions + 1]
+        postings = [self.rows[start:end] for start, end in zip(starts, ends)]
+        if not postings:
+            return np.zeros(len(self.recipe_ids), dtype=np.int64)
+        return np.bincount(
+            np.concatenate(postings), minlength=len(self.recipe_ids)
+        )
+
+
+def search_database(ingredient_ids, max_missing, limit):
+    """Тот же поиск одним агрегирующим запросом, без снимка."""
+    return list(
+        RecipeIngredients.objects.values("recipe_id")
+        .annotate(
+            size=Count("pk"),
+            covered=Count("pk", filter=Q(ingredient_id__in=ingredient_ids)),
+        )
+        .filter(covered__gt=0, size__lte=F("covered") + max_missing)
+        .annotate(missing=F("size") - F("covered"))
+        .order_by("missing", "-covered", "-recipe_id")
+        .values_list("recipe_id", "missing")[:limit]
+    )
+
+
+class PantryIndex:
+    """Снимок индекса на процесс; перечитывается при смене файла current."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._name = None
+        self._snapshot = None
+
+    def _ensure_loaded(self):
+        """Текущий снимок или None; в запросе снимок не строится."""
+        name = get_current_name()
+        if name is None:
+            return None
+        if name != self._name:
+            with self._lock:
+                if name != self._name:
+                    self._snapshot, self._name = Snapshot(name), name
+        return self._snapshot
+
+    def search(self, ingredient_ids, max_missing, limit):
+        """Рецепты, которым не хватает не больше max_missing ингредиентов.
+
+        Возвращает [(id рецепта, недостающих ингредиентов)] по возрастанию
+        числа недостающих, затем по числу найденных и новизне.
+        """
+        pantry = np.unique(np.asarray(ingredient_ids, dtype=np.int64))
+        snapshot = self._ensure_loaded()
+        if snapshot is None:
+            return search_database(pantry.tolist(), max_missing, limit)
+        changed = set(
+            Recipe.objects.filter(
+                updated_at__gt=snapshot.built_at
+            ).values_list("pk", flat=True)[: PANTRY_MAX_CHANGED + 1]
+        )
+        if len(changed) > PANTRY_MAX_CHANGED:
+            # Снимок сильно устарел: дочитывать изменения дороже запроса
+            return search_database(pantry.tolist(), max_missing, limit)
+        covered = snapshot.coverage(pantry)
+        missing = snapshot.sizes - covered
+        candidates = (covered > 0) & (missing <= max_missing)
+        if changed:
+            candidates &= ~np.isin(snapshot.recipe_ids, list(changed))
+        rows = np.flatnonzero(candidates)
+        recipe_ids = snapshot.recipe_ids[rows]
+        order = np.lexsort((-recipe_ids, -covered[rows], missing[rows]))
+        rows = rows[order[:limit]]
+        found = list(
+            zip(
+                snapshot.recipe_ids[rows].tolist(),
+                missing[rows].tolist(),
+                covered[rows].tolist(),
+            )
+        )
+        found.extend(
+            item
+            for item in self._changed_coverage(changed, set(pantry.tolist()))
+            if item[1] <= max_missing
+        )
+        found.sort(key=lambda item: (item[1], -item[2], -item[0]))
+        return [(recipe_id, count) for recipe_id, count, _ in found[:limit]]
+
+    def _changed_coverage(self, recipe_ids, pantry):
+        """(id, недостающих, найденных) по изменённым после снимка."""
+        sizes = {}
+        covered = {}
+        for recipe_id, ingredient_id in RecipeIngredients.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list("recipe_id", "ingredient_id"):
+            sizes[recipe_id] = sizes.get(recipe_id, 0) + 1
+            if ingredient_id in pantry:
+                covered[recipe_id] = covered.get(recipe_id, 0) + 1
+        return [
+            (recipe_id, sizes[recipe_id] - count, count)
+            for recipe_id, count in covered.items()
+        ]
+
+
+pantry_index = PantryIndex()
@@ -0,0 +1,60 @@
+"""Избранное и корзина: вставка и удаление одним запросом.
+
+Запросы идут в обход сигналов моделей, поэтому счётчики рецептов и
+списки покупок обновляются здесь же, в той же транзакции.
+"""
+
+from django.db import connection, transaction
+
+from .counters import RELATION_COUNTERS, change_counter
+from .models import Recipe, ShoppingCart
+from . import shopping_list
+
+INSERT_SQL = """
+INSERT INTO {table} (user_id, recipe_id, created)
+SELECT %s, recipe.id, NOW()
+FROM {recipes} AS recipe
+WHERE recipe.id = ANY(%s)
+ON CONFLICT (user_id, recipe_id) DO NOTHING
+RETURNING recipe_id
+"""
+
+DELETE_SQL = """
+DELETE FROM {table}
+WHERE user_id = %s AND recipe_id = ANY(%s)
+RETURNING recipe_id
+"""
+
+
+def _execute(sql, model, user_id, recipe_ids):
+    query = sql.format(
+        table=model._meta.db_table, recipes=Recipe._meta.db_table
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(query, [user_id, list(recipe_ids)])
+        return [recipe_id for recipe_id, in cursor.fetchall()]
+
+
+@transaction.atomic
+def add_relations(model, user_id, recipe_ids):
+    """Добавляет рецепты в избранное/корзину, пропуская уже добавленные.
+
+    Несуществующие рецепты игнорируются. Возвращает id добавленных.
+    """
+    added = _execute(INSERT_SQL, model, user_id, recipe_ids)
+    if added:
+        change_counter(Recipe, RELATION_COUNTERS[model], 1, pk__in=added)
+        if model is ShoppingCart:
+            shopping_list.add_user_recipes(user_id, added)
+    return added
+
+
+@transaction.atomic
+def remove_relations(model, user_id, recipe_ids):
+    """Удаляет рецепты из избранного/корзины. Возвращает id удалённых."""
+    removed = _execute(DELETE_SQL, model, user_id, recipe_ids)
+    if removed:
+        change_counter(Recipe, RELATION_COUNTERS[model], -1, pk__in=removed)
+        if model is ShoppingCart:
+            shopping_list.subtract_user_recipes(user_id, removed)
+    return removed
@@ -0,0 +1,31 @@
+"""Полнотекстовый поиск рецептов (PostgreSQL tsvector + pg_trgm)."""
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db.models import OuterRef, Subquery
+
+from .constants import SEARCH_CONFIG
+from .models import Recipe, RecipeIngredients
+
+
+def update_search_vector(recipes):
+    """Пересчитывает поисковый вектор для рецептов (id или queryset).
+
+    Вес A — название, B — описание, C — названия ингредиентов.
+    """
+    ingredient_names = (
+        RecipeIngredients.objects.filter(recipe=OuterRef("pk"))
+        .order_by()
+        .values("recipe")
+        .annotate(names=StringAgg("ingredient__name", delimiter=" "))
+        .values("names")
+    )
+    Recipe.objects.filter(pk__in=recipes).update(
+        search_vector=(
+            SearchVector("name", weight="A", config=SEARCH_CONFIG)
+            + SearchVector("text", weight="B", config=SEARCH_CONFIG)
+            + SearchVector(
+                Subquery(ingredient_names), weight="C", config=SEARCH_CONFIG
+            )
+        )
+    )
@@ -0,0 +1,185 @@
+"""Поддержка материализованного списка покупок (ShoppingListItem)."""
+
+from django.db import connection
+from django.db.models import F, Sum
+
+from .models import RecipeIngredients, ShoppingCart, ShoppingListItem
+
+ITEMS = ShoppingListItem._meta.db_table
+LINKS = RecipeIngredients._meta.db_table
+CARTS = ShoppingCart._meta.db_table
+
+ADD_RECIPE_SQL = f"""
+INSERT INTO {ITEMS} (user_id, ingredient_id, total_amount)
+SELECT cart.user_id, link.ingredient_id, link.amount
+FROM {LINKS} AS link
+JOIN {CARTS} AS cart ON cart.recipe_id = link.recipe_id
+WHERE link.recipe_id = %s {{user_filter}}
+ON CONFLICT (user_id, ingredient_id) DO UPDATE
+SET total_amount = {ITEMS}.total_amount + EXCLUDED.total_amount
+"""
+
+SUBTRACT_RECIPE_SQL = f"""
+UPDATE {ITEMS} AS item
+SET total_amount = GREATEST(item.total_amount - link.amount, 0)
+FROM {LINKS} AS link
+JOIN {CARTS} AS cart ON cart.recipe_id = link.recipe_id
+WHERE link.recipe_id = %s {{user_filter}}
+    AND item.user_id = cart.user_id
+    AND item.ingredient_id = link.ingredient_id
+"""
+
+DELETE_EMPTY_SQL = f"""
+DELETE FROM {ITEMS}
+WHERE total_amount = 0
+    AND ingredient_id IN (
+        SELECT ingredient_id FROM {LINKS} WHERE recipe_id = %s
+    )
+"""
+
+ADD_DELTAS_SQL = f"""
+INSERT INTO {ITEMS} (user_id, ingredient_id, total_amount)
+SELECT cart.user_id, delta.ingredient_id, delta.amount
+FROM {CARTS} AS cart,
+    unnest(%s::integer[], %s::integer[]) AS delta(ingredient_id, amount)
+WHERE cart.recipe_id = %s
+ON CONFLICT (user_id, ingredient_id) DO UPDATE
+SET total_amount = {ITEMS}.total_amount + EXCLUDED.total_amount
+"""
+
+SUBTRACT_DELTAS_SQL = f"""
+UPDATE {ITEMS} AS item
+SET total_amount = GREATEST(item.total_amount - delta.amount, 0)
+FROM {CARTS} AS cart,
+    unnest(%s::integer[], %s::integer[]) AS delta(ingredient_id, amount)
+WHERE cart.recipe_id = %s
+    AND item.user_id = cart.user_id
+    AND item.ingredient_id = delta.ingredient_id
+"""
+
+DELETE_EMPTY_INGREDIENTS_SQL = f"""
+DELETE FROM {ITEMS}
+WHERE total_amount = 0 AND ingredient_id = ANY(%s::integer[])
+"""
+
+ADD_USER_RECIPES_SQL = f"""
+INSERT INTO {ITEMS} (user_id, ingredient_id, total_amount)
+SELECT %s, link.ingredient_id, SUM(link.amount)
+FROM {LINKS} AS link
+WHERE link.recipe_id = ANY(%s)
+GROUP BY link.ingredient_id
+ON CONFLICT (user_id, ingredient_id) DO UPDATE
+SET total_amount = {ITEMS}.total_amount + EXCLUDED.total_amount
+"""
+
+SUBTRACT_USER_RECIPES_SQL = f"""
+UPDATE {ITEMS} AS item
+SET total_amount = GREATEST(item.total_amount - delta.amount, 0)
+FROM (
+    SELECT ingredient_id, SUM(amount) AS amount
+    FROM {LINKS}
+    WHERE recipe_id = ANY(%s)
+    GROUP BY ingredient_id
+) AS delta
+WHERE item.user_id = %s AND item.ingredient_id = delta.ingredient_id
+"""
+
+DELETE_EMPTY_USER_SQL = f"""
+DELETE FROM {ITEMS} WHERE user_id = %s AND total_amount = 0
+"""
+
+
+def _execute(sql, recipe_id, user_id):
+    params = [recipe_id]
+    user_filter = ""
+    if user_id is not None:
+        user_filter = "AND cart.user_id = %s"
+        params.append(user_id)
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(user_filter=user_filter), params)
+
+
+def add_recipe(recipe_id, user_id=None):
+    """Прибавляет ингредиенты рецепта к спискам покупок.
+
+    Без user_id — всем пользователям, у которых рецепт в корзине.
+    """
+    _execute(ADD_RECIPE_SQL, recipe_id, user_id)
+
+
+def subtract_recipe(recipe_id, user_id=None):
+    """Вычитает ингредиенты рецепта из списков покупок."""
+    _execute(SUBTRACT_RECIPE_SQL, recipe_id, user_id)
+    with connection.cursor() as cursor:
+        cursor.execute(DELETE_EMPTY_SQL, [recipe_id])
+
+
+def apply_deltas(recipe_id, deltas):
+    """Применяет изменения состава рецепта к спискам покупок.
+
+    deltas — {ingredient_id: изменение количества}; затрагиваются только
+    строки этих ингредиентов у пользователей с рецептом в корзине.
+    """
+    added = {pk: delta for pk, delta in deltas.items() if delta > 0}
+    removed = {pk: -delta for pk, delta in deltas.items() if delta < 0}
+    with connection.cursor() as cursor:
+        if added:
+            cursor.execute(
+                ADD_DELTAS_SQL,
+                [list(added), list(added.values()), recipe_id],
+            )
+        if removed:
+            cursor.execute(
+                SUBTRACT_DELTAS_SQL,
+                [list(removed), list(removed.values()), recipe_id],
+            )
+            cursor.execute(DELETE_EMPTY_INGREDIENTS_SQL, [list(removed)])
+
+
+def add_user_recipes(user_id, recipe_ids):
+    """Прибавляет к списку пользователя сразу несколько рецептов.
+
+    Не зависит от строк корзины: вызывается для массовых операций,
+    которые меняют корзину в обход сигналов.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(ADD_USER_RECIPES_SQL, [user_id, list(recipe_ids)])
+
+
+def subtract_user_recipes(user_id, recipe_ids):
+    """Вычитает из списка пользователя сразу несколько рецептов."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            SUBTRACT_USER_RECIPES_SQL, [list(recipe_ids), user_id]
+        )
+        cursor.execute(DELETE_EMPTY_USER_SQL, [user_id])
+
+
+def live_totals(user=None):
+    """Агрегат по корзинам в виде {(user_id, ingredient_id): сумма}."""
+    links = RecipeIngredients.objects.filter(
+        recipe__shoppingcart__isnull=False
+    )
+    if user is not None:
+        links = links.filter(recipe__shoppingcart__user=user)
+    return {
+        (row["user_id"], row["ingredient_id"]): row["total"]
+        for row in links.values(
+            "ingredient_id", user_id=F("recipe__shoppingcart__user")
+        )
+        .annotate(total=Sum("amount"))
+        .order_by()
+    }
+
+
+def stored_totals(user=None):
+    """Содержимое ShoppingListItem в том же виде, что и live_totals."""
+    items = ShoppingListItem.objects.all()
+    if user is not None:
+        items = items.filter(user=user)
+    return {
+        (user_id, ingredient_id): total
+        for user_id, ingredient_id, total in items.values_list(
+            "user_id", "ingredient_id", "total_amount"
+        )
+    }
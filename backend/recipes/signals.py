@@ -0,0 +1,99 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from users.models import Profile, Subscription
+from .counters import RELATION_COUNTERS, change_counter
+from .models import Favorite, Ingredient, Recipe, ShoppingCart
+from .constants import RECIPE_IMAGE_SIZES
+from .images import enqueue, needs_processing
+from .search import update_search_vector
+from . import feed, shopping_list
+
+# Отправляется после массовой загрузки ингредиентов (bulk_create
+# не вызывает post_save)
+ingredients_bulk_loaded = Signal()
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def increment_relation_counter(sender, instance, created, **kwargs):
+    """Увеличивает счётчик рецепта при добавлении в избранное/корзину."""
+    if created:
+        change_counter(
+            Recipe, RELATION_COUNTERS[sender], 1, pk=instance.recipe_id
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def decrement_relation_counter(sender, instance, **kwargs):
+    """Уменьшает счётчик рецепта при удалении из избранного/корзины."""
+    change_counter(
+        Recipe, RELATION_COUNTERS[sender], -1, pk=instance.recipe_id
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    """Увеличивает число рецептов автора."""
+    if created:
+        change_counter(
+            Profile, "recipes_count", 1, user_id=instance.author_id
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    """Уменьшает число рецептов автора."""
+    change_counter(Profile, "recipes_count", -1, user_id=instance.author_id)
+
+
+@receiver(post_save, sender=Ingredient)
+def refresh_recipes_search_vector(sender, instance, created, **kwargs):
+    """Переиндексирует рецепты при переименовании ингредиента."""
+    if not created:
+        update_search_vector(
+            Recipe.objects.filter(ingredients=instance).values("pk")
+        )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    """Прибавляет ингредиенты рецепта к списку покупок пользователя."""
+    if created:
+        shopping_list.add_recipe(instance.recipe_id, instance.user_id)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def subtract_from_shopping_list(sender, instance, **kwargs):
+    """Вычитает ингредиенты рецепта, пока они ещё не удалены каскадом."""
+    shopping_list.subtract_recipe(instance.recipe_id, instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def process_recipe_image(sender, instance, **kwargs):
+    """Ставит в очередь построение уменьшенных копий нового фото."""
+    if needs_processing(instance.image, instance.image_variants):
+        enqueue(
+            Recipe, instance.pk, "image", "image_variants", RECIPE_IMAGE_SIZES
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, **kwargs):
+    """Раскладывает новый рецепт по лентам подписчиков."""
+    if created:
+        feed.fan_out(instance)
+
+
+@receiver(post_save, sender=Subscription)
+def backfill_feed(sender, instance, created, **kwargs):
+    """Добавляет в ленту последние рецепты нового автора."""
+    if created:
+        feed.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def clear_feed(sender, instance, **kwargs):
+    """Убирает из ленты рецепты автора, от которого отписались."""
+    feed.remove_author(instance.user_id, instance.author_id)
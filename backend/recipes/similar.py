@@ -0,0 +1,293 @@
+"""Похожие рецепты: косинусное сходство по ингредиентам и тегам.
+
+Рецепты представлены строками разреженной матрицы «рецепт × признак»
+(ингредиенты с весом 1, теги с весом SIMILAR_TAG_WEIGHT), строки
+нормированы, сходство — произведение матрицы на транспонированную,
+которое считается блоками по SIMILAR_BLOCK_SIZE строк. Признаки,
+встречающиеся больше чем в SIMILAR_MAX_FEATURE_RECIPES рецептах
+(соль, популярные теги), отбрасываются: они почти не различают рецепты,
+но делают строки произведения плотными.
+"""
+
+import numpy as np
+from django.db.models import F, Q
+from django.utils import timezone
+from scipy import sparse
+
+from .constants import (
+    SIMILAR_BLOCK_SIZE,
+    SIMILAR_MAX_FEATURE_RECIPES,
+    SIMILAR_RECIPES_COUNT,
+    SIMILAR_TAG_WEIGHT,
+)
+from .models import Recipe, RecipeIngredients, SimilarRecipes
+
+PAIR = np.dtype((np.int64, 2))
+# Сколько лучших соседей изменённого рецепта получают его в свой список
+REVERSE_CANDIDATES = SIMILAR_RECIPES_COUNT * 10
+WRITE_BATCH_SIZE = 1000
+
+
+def _pairs(values):
+    pairs = np.fromiter(values.iterator(chunk_size=10_000), dtype=PAIR)
+    return pairs.reshape(-1, 2)
+
+
+def build_matrix():
+    """Загружает признаки из БД: (id рецептов по возрастанию, CSR-матрица)."""
+    recipe_ids = np.fromiter(
+        Recipe.objects.order_by("pk")
+        .values_list("pk", flat=True)
+        .iterator(chunk_size=10_000),
+        dtype=np.int64,
+    )
+    ingredients = _pairs(
+        RecipeIngredients.objects.order_by().values_list(
+            "recipe_id", "ingredient_id"
+        )
+    )
+    tags = _pairs(
+        Recipe.tags.through.objects.order_by().values_list(
+            "recipe_id", "tag_id"
+        )
+    )
+    # Рецепты, созданные между запросами, посчитаются при следующем расчёте
+    ingredients = ingredients[np.isin(ingredients[:, 0], recipe_ids)]
+    tags = tags[np.isin(tags[:, 0], recipe_ids)]
+    _, ingredient_columns = np.unique(ingredients[:, 1], return_inverse=True)
+    _, tag_columns = np.unique(tags[:, 1], return_inverse=True)
+    offset = ingredient_columns.max() + 1 if len(ingredients) else 0
+
+    rows = np.searchsorted(
+        recipe_ids, np.concatenate((ingredients[:, 0], tags[:, 0]))
+    )
+    columns = np.concatenate((ingredient_columns, tag_columns + offset))
+    weights = np.concatenate(
+        (
+            np.ones(len(ingredients), dtype=np.float32),
+            np.full(len(tags), SIMILAR_TAG_WEIGHT, dtype=np.float32),
+        )
+    )
+    frequency = np.bincount(columns)
+    keep = frequency[columns] <= SIMILAR_MAX_FEATURE_RECIPES
+    matrix = sparse.csr_matrix(
+        (weights[keep], (rows[keep], columns[keep])),
+        shape=(len(recipe_ids), len(frequency)),
+        dtype=np.float32,
+    )
+    norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+    norms[norms == 0] = 1
+    return recipe_ids, sparse.diags(1 / norms) @ matrix
+
+
+def neighbours(matrix, rows, limit):
+    """Для каждой строки — (строка, столбцы соседей, сходство) по убыванию.
+
+    Возвращается не больше limit соседей; полностью сортируются только
+    они, остальные отсекаются argpartition.
+    """
+    transposed = matrix.T.tocsr()
+    for start in range(0, len(rows), SIMILAR_BLOCK_SIZE):
+        block = rows[start:][:SIMILAR_BLOCK_SIZE]
+        products = (matrix[block] @ transposed).tocsr()
+        for position, row in enumerate(block):
+            begin, end = (
+                products.indptr[position],
+                products.indptr[position + 1],
+            )
+            columns = products.indices[begin:end]
+            scores = products.data[begin:end]
+            mask = columns != row
+            columns, scores = columns[mask], scores[mask]
+            if len(scores) > limit:
+                best = np.argpartition(-scores, limit)[:limit]
+                columns, scores = columns[best], scores[best]
+            order = np.lexsort((columns, -scores))
+            yield row, columns[order], scores[order]
+
+
+def _save(entries, built_at):
+    SimilarRecipes.objects.bulk_create(
+        [
+            SimilarRecipes(
+                recipe_id=recipe_id,
+                recipe_ids=similar_ids,
+                scores=scores,
+                built_at=built_at,
+            )
+            for recipe_id, similar_ids, scores in entries
+        ],
+        update_conflicts=True,
+        unique_fields=["recipe"],
+        update_fields=["recipe_ids", "scores", "built_at"],
+    )
+
+
+def _dirty_ids():
+    """Id рецептов без расчёта и изменённых после него."""
+    return np.fromiter(
+        Recipe.objects.filter(
+            Q(similar__isnull=True) | Q(updated_at__gt=F("similar__built_at"))
+        )
+        .order_by("pk")
+        .values_list("pk", flat=True)
+        .iterator(chunk_size=10_000),
+        dtype=np.int64,
+    )
+
+
+def _entry(recipe_ids, row, columns, scores):
+    top = slice(0, SIMILAR_RECIPES_COUNT)
+    return (
+        int(recipe_ids[row]),
+        recipe_ids[columns[top]].tolist(),
+        scores[top].astype(float).round(4).tolist(),
+    )
+
+
+def _update(changed):
+    """Записывает объединённые списки; upsert быстрее bulk_update с CASE."""
+    SimilarRecipes.objects.bulk_create(
+        changed,
+        update_conflicts=True,
+        unique_fields=["recipe"],
+        update_fields=["recipe_ids", "scores"],
+    )
+
+
+def build(full=False):
+    """Пересчитывает похожие рецепты; возвращает число обновлённых.
+
+    Без full пересчитываются только рецепты без расчёта и изменённые
+    после него, а изменённые рецепты дополнительно вносятся в списки
+    своих ближайших соседей (и убираются из прежних). Частичный расчёт
+    переписывает до REVERSE_CANDIDATES чужих списков на каждый изменённый
+    рецепт, поэтому при большом числе изменённых (например, при первом
+    расчёте) выполняется полный пересчёт.
+
+    Записи фиксируются пачками по WRITE_BATCH_SIZE, без общей транзакции.
+    При частичном расчёте собственные списки изменённых рецептов
+    пишутся последними: если расчёт прервётся, они останутся
+    изменёнными и следующий расчёт повторит его.
+    """
+    built_at = timezone.now()
+    if not full:
+        dirty = _dirty_ids()
+        if not len(dirty):
+            return 0
+    recipe_ids, matrix = build_matrix()
+    if not full:
+        # Рецепты, созданные после загрузки матрицы, посчитаются позже
+        dirty = dirty[np.isin(dirty, recipe_ids)]
+        full = len(dirty) * REVERSE_CANDIDATES >= len(recipe_ids)
+    if full:
+        _build_full(recipe_ids, matrix, built_at)
+        return len(recipe_ids)
+    _build_partial(recipe_ids, matrix, dirty, built_at)
+    return len(dirty)
+
+
+def _build_full(recipe_ids, matrix, built_at):
+    batch = []
+    rows = np.arange(len(recipe_ids))
+    for row, columns, scores in neighbours(
+        matrix, rows, SIMILAR_RECIPES_COUNT
+    ):
+        batch.append(_entry(recipe_ids, row, columns, scores))
+        if len(batch) >= WRITE_BATCH_SIZE:
+            _save(batch, built_at)
+            batch = []
+    _save(batch, built_at)
+
+
+def _build_partial(recipe_ids, matrix, dirty, built_at):
+    if not len(dirty):
+        return
+    rows = np.searchsorted(recipe_ids, dirty)
+    entries = []
+    targets, sources, reverse_scores = [], [], []
+    for row, columns, scores in neighbours(matrix, rows, REVERSE_CANDIDATES):
+        entries.append(_entry(recipe_ids, row, columns, scores))
+        targets.append(recipe_ids[columns])
+        sources.append(np.full(len(columns), recipe_ids[row]))
+        reverse_scores.append(scores.astype(float).round(4))
+    _merge_reverse(
+        dirty,
+        np.concatenate(targets),
+        np.concatenate(sources),
+        np.concatenate(reverse_scores),
+    )
+    for start in range(0, len(entries), WRITE_BATCH_SIZE):
+        _save(entries[start:][:WRITE_BATCH_SIZE], built_at)
+
+
+def _merge_reverse(dirty, targets, sources, scores):
+    """Обновляет списки соседей, не пересчитывая их целиком.
+
+    targets[i] получает в свой список sources[i] со сходством scores[i];
+    изменённые рецепты (dirty, по возрастанию) убираются из всех
+    прежних списков.
+    """
+    keep = ~np.isin(targets, dirty)
+    order = np.argsort(targets[keep], kind="stable")
+    targets = targets[keep][order]
+    sources = sources[keep][order].tolist()
+    scores = scores[keep][order].tolist()
+    affected = np.unique(targets)
+    dirty_ids = set(dirty.tolist())
+
+    def merge(similar):
+        begin, end = np.searchsorted(
+            targets, [similar.recipe_id, similar.recipe_id + 1]
+        )
+        merged = [
+            (recipe_id, score)
+            for recipe_id, score in zip(similar.recipe_ids, similar.scores)
+            if recipe_id not in dirty_ids
+        ]
+        merged.extend(zip(sources[begin:end], scores[begin:end]))
+        merged.sort(key=lambda item: (-item[1], item[0]))
+        merged = merged[:SIMILAR_RECIPES_COUNT]
+        similar.recipe_ids = [recipe_id for recipe_id, _ in merged]
+        similar.scores = [score for _, score in merged]
+        return similar
+
+    for start in range(0, len(affected), WRITE_BATCH_SIZE):
+        chunk = affected[start:][:WRITE_BATCH_SIZE].tolist()
+        _update(
+            [
+                merge(similar)
+                for similar in SimilarRecipes.objects.filter(recipe__in=chunk)
+            ]
+        )
+    # Списки, из которых изменённые рецепты только выбывают
+    batch = []
+    stale = SimilarRecipes.objects.filter(
+        recipe_ids__overlap=dirty.tolist()
+    ).order_by("pk")
+    for similar in stale.iterator(chunk_size=WRITE_BATCH_SIZE):
+        position = np.searchsorted(affected, similar.recipe_id)
+        if similar.recipe_id in dirty_ids or (
+            position < len(affected)
+            and affected[position] == similar.recipe_id
+        ):
+            continue
+        batch.append(merge(similar))
+        if len(batch) >= WRITE_BATCH_SIZE:
+            SimilarRecipes.objects.bulk_update(batch, ["recipe_ids", "scores"])
+            batch = []
+    SimilarRecipes.objects.bulk_update(batch, ["recipe_ids", "scores"])
+
+
+def similar_recipes(recipe_id):
+    """Id похожих рецептов из последнего расчёта (None — рецепта нет)."""
+    row = (
+        SimilarRecipes.objects.filter(recipe_id=recipe_id)
+        .values_list("recipe_ids", flat=True)
+        .first()
+    )
+    if row is not None:
+        return row
+    if Recipe.objects.filter(pk=recipe_id).exists():
+        return []
+    return None
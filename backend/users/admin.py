@@ -1,5 +1,4 @@
 from django.contrib import admin
-from django.db.models import Count
 from django.utils.html import format_html
 
 from .models import Profile, Subscription
@@ -8,48 +7,36 @@ from .models import Profile, Subscription
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "author", "subscribers_count")
-    list_select_related = ("user", "author")
+    list_select_related = ("user", "author__profile")
 
     @admin.display(description="Количество подписчиков автора")
     def subscribers_count(self, obj):
-        return obj.author.subscribers.count()
+        return obj.author.profile.subscribers_count
 
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
     list_display = (
         "user",
+        "recipes_count",
         "subscribers_count",
         "avatar_preview",
     )
+    list_select_related = ("user",)
     search_fields = (
         "user__username",
         "user__first_name",
         "user__last_name",
         "user__email",
     )
-    readonly_fields = ("avatar_preview",)
-    fields = ("user", "avatar", "avatar_preview")
-
-    def get_queryset(self, request):
-        """Оптимизация запросов: аннотация рецептов и подписчиков"""
-        return (
-            super()
-            .get_queryset(request)
-            .select_related("user")
-            .annotate(
-                _recipes_count=Count("user__recipes", distinct=True),
-                _subscribers_count=Count("user__subscribers", distinct=True),
-            )
-        )
-
-    @admin.display(description="Рецепты")
-    def recipes_count(self, obj):
-        return obj._recipes_count
-
-    @admin.display(description="Подписчики")
-    def subscribers_count(self, obj):
-        return obj._subscribers_count
+    readonly_fields = ("avatar_preview", "recipes_count", "subscribers_count")
+    fields = (
+        "user",
+        "avatar",
+        "avatar_preview",
+        "recipes_count",
+        "subscribers_count",
+    )
 
     @admin.display(description="Аватар")
     def avatar_preview(self, obj):
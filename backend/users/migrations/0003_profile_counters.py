@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-18 06:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Profile = apps.get_model('users', 'Profile')
+    for field, related in (
+        ('recipes_count', apps.get_model('recipes', 'Recipe')),
+        ('subscribers_count', apps.get_model('users', 'Subscription')),
+    ):
+        Profile.objects.update(
+            **{
+                field: Coalesce(
+                    Subquery(
+                        related.objects.filter(author=OuterRef('user'))
+                        .order_by()
+                        .values('author')
+                        .annotate(total=Count('pk'))
+                        .values('total')
+                    ),
+                    0,
+                )
+            }
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_counters'),
+        (
+            'users',
+            '0002_alter_profile_options_alter_subscription_options_and_more',
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='recipes_count',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='Рецепты'
+            ),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='subscribers_count',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='Подписчики'
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
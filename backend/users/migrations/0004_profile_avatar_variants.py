@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-18 06:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_profile_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_variants',
+            field=models.JSONField(
+                default=dict,
+                editable=False,
+                verbose_name='Уменьшенные копии аватара',
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-18 08:40
+
+from django.db import migrations, models
+
+# Раньше авторы с FEED_FANOUT_LIMIT (10 000) подписчиков и больше
+# подмешивались в ленту по живому счётчику.
+FEED_FANOUT_LIMIT = 10_000
+
+
+def fill_feed_merged(apps, schema_editor):
+    Profile = apps.get_model('users', 'Profile')
+    Profile.objects.filter(subscribers_count__gte=FEED_FANOUT_LIMIT).update(
+        feed_merged=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_profile_avatar_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='feed_merged',
+            field=models.BooleanField(
+                default=False,
+                editable=False,
+                verbose_name='Рецепты подмешиваются в ленту при чтении',
+            ),
+        ),
+        migrations.RunPython(fill_feed_merged, migrations.RunPython.noop),
+    ]
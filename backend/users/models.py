@@ -4,6 +4,8 @@ from django.db import models
 from django.db.models import F, Q
 from django.core.exceptions import ValidationError
 
+from foodgram.models import CountersModel
+
 User = get_user_model()
 
 
@@ -49,7 +51,7 @@ class Subscription(models.Model):
             raise ValidationError("Нельзя подписаться на самого себя")
 
 
-class Profile(models.Model):
+class Profile(CountersModel):
     """Профиль пользователя с аватаром."""
 
     user = models.OneToOneField(
@@ -66,6 +68,28 @@ class Profile(models.Model):
         default="",
         validators=[FileExtensionValidator(["png", "jpg", "jpeg"])],
     )
+    avatar_variants = models.JSONField(
+        default=dict,
+        editable=False,
+        verbose_name="Уменьшенные копии аватара",
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Рецепты",
+    )
+    subscribers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Подписчики",
+    )
+    feed_merged = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name="Рецепты подмешиваются в ленту при чтении",
+    )
+
+    counter_fields = ("recipes_count", "subscribers_count", "feed_merged")
 
     class Meta:
         verbose_name = "Профиль"
@@ -1,7 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Profile
+from recipes.constants import AVATAR_IMAGE_SIZES
+from recipes.counters import change_counter
+from recipes.feed import start_merging
+from recipes.images import enqueue, needs_processing
+from .models import Profile, Subscription
 
 User = get_user_model()
 
@@ -16,5 +20,38 @@ def create_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def save_profile(sender, instance, **kwargs):
     """Сохраняет профиль при сохранении пользователя."""
+    if kwargs.get("update_fields") == frozenset(("last_login",)):
+        return
     if hasattr(instance, 'profile'):
         instance.profile.save()
+
+
+@receiver(post_save, sender=Subscription)
+def increment_subscribers_count(sender, instance, created, **kwargs):
+    """Увеличивает число подписчиков автора."""
+    if created:
+        change_counter(
+            Profile, "subscribers_count", 1, user_id=instance.author_id
+        )
+        start_merging(instance.author_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def decrement_subscribers_count(sender, instance, **kwargs):
+    """Уменьшает число подписчиков автора."""
+    change_counter(
+        Profile, "subscribers_count", -1, user_id=instance.author_id
+    )
+
+
+@receiver(post_save, sender=Profile)
+def process_avatar(sender, instance, **kwargs):
+    """Ставит в очередь построение уменьшенных копий нового аватара."""
+    if needs_processing(instance.avatar, instance.avatar_variants):
+        enqueue(
+            Profile,
+            instance.pk,
+            "avatar",
+            "avatar_variants",
+            AVATAR_IMAGE_SIZES,
+        )